@@ -1,20 +1,96 @@
-import io
-import json
-import logging.config
+import contextlib
 import os
 import sys
-from typing import List, TextIO
+from typing import Dict, List, Optional, Tuple
 
-from .constants import COMMAND_LINE_HELP
-from .database import RoverMemoryRepo, RoverRepo
-from .enums import RoverInputType
-from .exceptions import InvalidInputException
-from .logging import logging_config
-from .parsers import (PlateauInputTextParser, RoverLandingTextParser,
-                      RoverMovingTextParser)
+# Only what every invocation needs is imported here, modules of each
+# mode are imported once the mode is known to keep startup fast
+from .constants import (COMMAND_LINE_CONFLICTING_OPTIONS, COMMAND_LINE_HELP,
+                        COMMAND_LINE_MODE_OPTIONS, COMMAND_LINE_OPTIONS,
+                        COMMAND_LINE_REQUIRED_OPTIONS, OCCUPANCY_BACKENDS)
+from .logging import get_logger
 
-logging.config.dictConfig(logging_config)
-log = logging.getLogger("marsrover")
+
+def __getattr__(name):
+    # parse_input used to be imported here, it is now loaded on demand
+    if name == "parse_input":
+        from .missions import parse_input
+        return parse_input
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def parse_command_line_options(
+        argv_list: List[str]) -> Tuple[Dict[str, str], List[str]]:
+    """Splits user's command line arguments into options
+    and inputs. Options are given as --name or --name=value.
+
+    Args:
+        argv_list (str): list of input argument strings
+
+    Returns:
+        Tuple[Dict[str, str], List[str]]: options mapped to their
+        values (empty string if no value), and remaining inputs
+    """
+    options = {}
+    inputs = []
+    for argument in argv_list[1:]:
+        if argument.startswith("--"):
+            option_name, _, option_value = argument.partition("=")
+            options[option_name] = option_value
+        else:
+            inputs.append(argument)
+
+    return options, inputs
+
+
+def find_command_line_error(options: Dict[str, str],
+                            inputs: List[str]) -> Optional[str]:
+    """Checks options and inputs given together make a valid run.
+    The mode of the run is picked by the first option of
+    COMMAND_LINE_MODE_OPTIONS given, and every other option must
+    be one the mode accepts.
+
+    Args:
+        options (Dict[str, str]): User's command line options
+        inputs (List[str]): User's command line inputs
+
+    Returns:
+        Optional[str]: Why the command line is invalid, naming the
+        conflicting option, None if it is valid
+    """
+    if len(inputs) > 1:
+        return f"Only one input can be given, got {len(inputs)}"
+
+    mode = next((mode for mode in COMMAND_LINE_MODE_OPTIONS
+                 if mode in options), None)
+    for option in options:
+        if option not in COMMAND_LINE_OPTIONS:
+            return f"Unknown option: {option}"
+        if option in ("--debug", "--help", mode):
+            continue
+        if option not in COMMAND_LINE_MODE_OPTIONS[mode]:
+            if mode is not None:
+                return f"{option} cannot be combined with {mode}"
+            return f"{option} needs one of " + ", ".join(
+                other_mode for other_mode, mode_options
+                in COMMAND_LINE_MODE_OPTIONS.items()
+                if other_mode and option in mode_options)
+
+        required_option = COMMAND_LINE_REQUIRED_OPTIONS.get(option)
+        if required_option and required_option not in options:
+            return f"{option} needs {required_option}"
+        conflicting_option = COMMAND_LINE_CONFLICTING_OPTIONS.get(option)
+        if conflicting_option in options:
+            return f"{option} cannot be combined with {conflicting_option}"
+
+    occupancy_backend = options.get("--occupancy") or "auto"
+    if occupancy_backend not in OCCUPANCY_BACKENDS:
+        return f"Unknown occupancy backend: {occupancy_backend}"
+    if (options.get("--occupancy") == "auto"
+            and not options.keys() & {"--expected-rovers", "--packed"}):
+        return "--occupancy=auto needs --expected-rovers or --packed"
+
+    return None
 
 
 def parse_command_line_argv(argv_list: List[str]):
@@ -23,90 +99,303 @@ def parse_command_line_argv(argv_list: List[str]):
     Args:
         argv_list (str): list of input argument strings
 
-    Raises:
-        Exception: If arguments length is not 2 or 3
-
     Returns:
         Tuple[bool, bool]: tuple of 2 bools to indicate
         whether user is in debug mode, and whether user
-        is only asking for command line help
+        is only asking for command line help, which is forced
+        if no argument is given or find_command_line_error finds
+        the arguments invalid
     """
-    if len(argv_list) < 2 or len(argv_list) > 3:
+    options, inputs = parse_command_line_options(argv_list)
+    if len(argv_list) < 2 or find_command_line_error(options, inputs):
         print_help = True
         debug_mode = False
     else:
-        debug_mode = "--debug" in argv_list
-        print_help = "--help" in argv_list
+        debug_mode = "--debug" in options
+        print_help = "--help" in options
 
     return debug_mode, print_help
 
 
-def parse_input(input_file: TextIO, rover_repo: RoverRepo):
-    """Main parser for input file.
-    It will parse user's input line
-    by line.
+def get_plateau_settings(options: Dict[str, str]):
+    """Reads occupancy and blocked move settings of a run.
+
+    Args:
+        options (Dict[str, str]): User's command line options
+
+    Returns:
+        PlateauSettings: Settings given to the run's plateaus
+    """
+    from .enums import BlockedMovePolicy
+    from .models import PlateauSettings
+
+    expected_rovers = options.get("--expected-rovers")
+    return PlateauSettings(
+        options.get("--occupancy") or "auto",
+        options.get("--occupancy-file") or None,
+        int(expected_rovers) if expected_rovers else None,
+        BlockedMovePolicy(options.get("--blocked-moves") or "abort"))
+
+
+def report_rovers(rover_repo, options: Dict[str, str]):
+    """Reports rovers in the format and to the file given by
+    --report-format and --report-output, as text to stdout
+    by default.
 
     Args:
-        input_file (TextIO): TextIO object for user's input.
+        rover_repo (RoverRepo): Repository to report rovers of
+        options (Dict[str, str]): User's command line options
     """
-    current_line = 1
-    first_line = input_file.readline()
+    report_format = options.get("--report-format") or "text"
+    report_path = options.get("--report-output")
+    if not report_path:
+        rover_repo.report_all_rovers(report_format)
+        return
 
-    try:
-        # Parse configuration
-        plateau = PlateauInputTextParser().parse_input_line(first_line)
+    with open(report_path, "wb") as report_output:
+        rover_repo.report_all_rovers(report_format, report_output)
 
-        # Parsers for rover input
-        # Try to reuse same parser instance instead of creating a new one
-        # per input line to save memory usage
-        rover_landing_parser = RoverLandingTextParser(plateau, rover_repo)
-        rover_moving_parser = RoverMovingTextParser(plateau, rover_repo)
 
-        # Parse rover input
-        for line in input_file:
-            current_line += 1
+def log_line_errors(error_log: list, options: Dict[str, str],
+                    debug_mode: bool):
+    """Saves errors of lines skipped by --keep-going to the file
+    given by --error-log, and logs them.
+
+    Args:
+        error_log (List[LineError]): Errors of skipped lines
+        options (Dict[str, str]): User's command line options
+        debug_mode (bool): Logs every error if True, their count
+        otherwise
+    """
+    error_log_path = options.get("--error-log")
+    if error_log_path:
+        from .missions import write_error_log
+
+        with open(error_log_path, "w") as error_log_file:
+            write_error_log(error_log, error_log_file)
+
+    if not error_log:
+        return
+    if debug_mode:
+        for error in error_log:
+            get_logger().error(
+                f"Invalid input line {error.line_number} skipped "
+                f"(rover {error.rover_name}): {error.message}")
+    else:
+        get_logger().error(
+            f"{len(error_log)} invalid input lines skipped. Please enable "
+            "debug mode or --error-log to see more details.")
 
-            if RoverInputType.LANDING.value in line.upper():
-                rover_landing_parser.parse_input_line(line)
-            elif RoverInputType.INSTRUCTIONS.value in line.upper():
-                rover_moving_parser.parse_input_line(line)
 
-            else:
-                raise InvalidInputException(
-                    f"Unknown rover input type: {line}")
+def log_syntax_errors(syntax_errors: list, debug_mode: bool):
+    """Logs syntax errors found by --validate.
 
-    except InvalidInputException as invalid_input_ex:
-        raise InvalidInputException(
-            invalid_input_ex.message, current_line)
+    Args:
+        syntax_errors (List[InvalidInputException]): Syntax errors
+        debug_mode (bool): Logs every error if True, their count
+        otherwise
+    """
+    if debug_mode:
+        for error in syntax_errors:
+            get_logger().error(error)
+    else:
+        get_logger().error(
+            f"{len(syntax_errors)} syntax errors found, the mission was "
+            "not run. Please enable debug mode or use --validate-only "
+            "to see more details.")
 
 
 # Program main entrance
 if __name__ == '__main__':
     try:
         debug_mode, print_help = parse_command_line_argv(sys.argv)
-
-        # Using memory repo in this case
-        rover_repo = RoverMemoryRepo()
+        options, inputs = parse_command_line_options(sys.argv)
 
         if print_help:
+            # Tells which option made the command line invalid
+            usage_error = find_command_line_error(options, inputs)
+            if usage_error:
+                get_logger().error(usage_error)
             print(COMMAND_LINE_HELP)
 
+        elif "--batch" in options:
+            from .batch import (print_batch_results, resolve_batch_inputs,
+                                run_batch)
+
+            workers = options.get("--workers")
+            print_batch_results(run_batch(
+                resolve_batch_inputs(inputs[-1]),
+                int(workers) if workers else None,
+                get_plateau_settings(options)), debug_mode)
+
+        elif "--follow" in options:
+            from .database import RoverMemoryRepo
+            from .follow import follow_mission
+
+            try:
+                for update in follow_mission(
+                        inputs[-1], RoverMemoryRepo(),
+                        plateau_settings=get_plateau_settings(options)):
+                    for error in update.errors:
+                        if debug_mode:
+                            get_logger().error(error)
+                        else:
+                            get_logger().error(
+                                "Invalid input line skipped. "
+                                "Please enable debug mode to see "
+                                "more details.")
+                    for report in update.reports:
+                        print(report, flush=True)
+            except KeyboardInterrupt:
+                pass
+
+        elif "--validate-only" in options:
+            from .validation import validate_input
+
+            workers = options.get("--workers")
+            validation_report = validate_input(
+                inputs[-1], int(workers) if workers else None)
+            for error_line in validation_report.iter_error_lines():
+                print(error_line)
+            print(f"Lines: {validation_report.line_count}, "
+                  f"syntax errors: {len(validation_report.errors)}")
+            if validation_report.errors:
+                sys.exit(1)
+
+        elif "--db" in options and not inputs:
+            from .database import RoverSQLiteRepo
+
+            # Reports rovers stored by an earlier mission
+            with RoverSQLiteRepo(options["--db"]) as rover_repo:
+                report_rovers(rover_repo, options)
+
         else:
-            input_argv = sys.argv[-1]
-            if os.path.isfile(input_argv):
-                with open(input_argv) as input_file:
-                    parse_input(input_file, rover_repo)
+            from .metrics import NULL_METRICS
+
+            metrics_collection = contextlib.nullcontext(NULL_METRICS)
+            if "--metrics" in options:
+                from .metrics import collect_metrics
+
+                metrics_seconds = options.get("--metrics-seconds")
+                metrics_collection = collect_metrics(
+                    options["--metrics"],
+                    float(metrics_seconds) if metrics_seconds else None)
+
+            # Every resource is closed even if the mission fails,
+            # flushing the cache before the repo it writes back to
+            with metrics_collection as metrics, \
+                    contextlib.ExitStack() as resources:
+                from .database import (RoverCachingRepo, RoverMemoryRepo,
+                                       RoverSQLiteRepo, RoverTableRepo)
+                from .missions import open_mission_input, parse_input
+
+                plateau_settings = get_plateau_settings(options)
+
+                if "--db" in options:
+                    stored_repo = resources.enter_context(RoverSQLiteRepo(
+                        options["--db"], reset=True))
+                elif "--table" in options:
+                    stored_repo = RoverTableRepo()
+                else:
+                    # Using memory repo in this case
+                    stored_repo = RoverMemoryRepo()
+
+                # Failing lines are skipped and kept here with --keep-going
+                error_log = [] if "--keep-going" in options else None
+                syntax_errors = []
+
+                journal = None
+                if "--journal" in options:
+                    from .journal import MoveJournalWriter
+
+                    journal = resources.enter_context(
+                        MoveJournalWriter(options["--journal"]))
+
+                rover_repo = stored_repo
+                if "--cache" in options:
+                    cache_size = options["--cache"]
+                    rover_repo = RoverCachingRepo(
+                        stored_repo,
+                        *([int(cache_size)] if cache_size else []))
+                    resources.callback(rover_repo.flush)
+
+                # Byte offsets are only needed to log skipped lines
+                # and to resume from checkpoints
+                mission_input = resources.enter_context(open_mission_input(
+                    inputs[-1], bool(options.keys()
+                                     & {"--keep-going", "--checkpoint"}),
+                    metrics))
+                if "--checkpoint" in options:
+                    from .checkpoints import (CheckpointWriter,
+                                              resume_mission)
+                    from .constants import (CHECKPOINT_EVERY_LINES,
+                                            CHECKPOINT_EVERY_SECONDS)
+
+                    checkpoint_path = options["--checkpoint"]
+                    checkpoint_writer = CheckpointWriter(
+                        checkpoint_path,
+                        int(options.get("--checkpoint-lines")
+                            or CHECKPOINT_EVERY_LINES),
+                        float(options.get("--checkpoint-seconds")
+                              or CHECKPOINT_EVERY_SECONDS))
+                    if ("--resume" in options
+                            and os.path.isfile(checkpoint_path)):
+                        resume_mission(mission_input, rover_repo,
+                                       checkpoint_path, checkpoint_writer,
+                                       error_log, metrics, plateau_settings)
+                    else:
+                        parse_input(mission_input, rover_repo,
+                                    checkpoint_writer, error_log,
+                                    metrics=metrics,
+                                    plateau_settings=plateau_settings)
+                elif "--ticks" in options:
+                    from .ticks import run_tick_mission
+
+                    simulation = run_tick_mission(
+                        mission_input, rover_repo, metrics, plateau_settings)
+                    if debug_mode:
+                        get_logger().info(
+                            f"Ticks: {simulation.tick}, moves: "
+                            f"{simulation.moves}, blocked moves: "
+                            f"{simulation.blocked_moves}")
+                elif "--packed" in options:
+                    from .packed import run_packed_mission
+
+                    run_packed_mission(inputs[-1], rover_repo, error_log,
+                                       journal, metrics, plateau_settings)
+                elif "--validate" in options:
+                    from .validation import parse_input_validated
+
+                    workers = options.get("--workers")
+                    syntax_errors = parse_input_validated(
+                        inputs[-1], rover_repo,
+                        int(workers) if workers else None,
+                        error_log=error_log, journal=journal,
+                        metrics=metrics,
+                        plateau_settings=plateau_settings).errors
+                else:
+                    parse_input(mission_input, rover_repo,
+                                error_log=error_log, journal=journal,
+                                metrics=metrics,
+                                plateau_settings=plateau_settings)
 
-            else:
-                with io.StringIO(input_argv) as input_io:
-                    parse_input(input_io, rover_repo)
+                if syntax_errors:
+                    # Mission has not been run
+                    log_syntax_errors(syntax_errors, debug_mode)
+                    sys.exit(1)
 
-            # Outputs report
-            rover_repo.report_all_rovers()
+                # Outputs report
+                with metrics.stage("report"):
+                    report_rovers(rover_repo, options)
+                if error_log is not None:
+                    log_line_errors(error_log, options, debug_mode)
+                if debug_mode and rover_repo is not stored_repo:
+                    get_logger().info(
+                        f"Rover cache: {rover_repo.cache_info()}")
 
     except Exception as ex:
         if debug_mode:
-            log.error(ex)
+            get_logger().error(ex)
         else:
-            log.error("Application exception occurred. "
-                      "Please enable debug mode to see more details.")
+            get_logger().error("Application exception occurred. "
+                               "Please enable debug mode to see more details.")
@@ -0,0 +1,133 @@
+"""Module for running many independent missions in a process pool"""
+import functools
+import glob
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .database import RoverMemoryRepo
+from .missions import parse_input
+from .models import DEFAULT_PLATEAU_SETTINGS, PlateauSettings
+
+
+class MissionResult(NamedTuple):
+    """Outcome of one mission in a batch"""
+    input_path: str
+    report: str
+    rover_count: int
+    error: Optional[str]
+
+
+def resolve_batch_inputs(batch_argv: str) -> List[str]:
+    """Finds mission input files of a batch.
+
+    Args:
+        batch_argv (str): A directory of mission files, a manifest
+        file listing one mission path per line, or a glob pattern
+
+    Returns:
+        List[str]: Mission input paths, sorted unless listed
+        in a manifest
+    """
+    if os.path.isdir(batch_argv):
+        return sorted(
+            os.path.join(batch_argv, file_name)
+            for file_name in os.listdir(batch_argv)
+            if os.path.isfile(os.path.join(batch_argv, file_name)))
+
+    if os.path.isfile(batch_argv):
+        # Manifest paths are relative to the manifest itself
+        manifest_dir = os.path.dirname(batch_argv)
+        with open(batch_argv) as manifest:
+            return [os.path.join(manifest_dir, line.strip())
+                    for line in manifest if line.strip()]
+
+    return sorted(glob.glob(batch_argv))
+
+
+def run_mission_file(input_path: str,
+                     plateau_settings: PlateauSettings =
+                     DEFAULT_PLATEAU_SETTINGS) -> MissionResult:
+    """Runs one mission file and captures its report.
+    Any exception is captured in the result instead of raised.
+
+    Args:
+        input_path (str): Path to the mission input file
+        plateau_settings (PlateauSettings, optional): Occupancy
+        settings of the mission's plateau
+
+    Returns:
+        MissionResult: Report or error of the mission
+    """
+    rover_repo = RoverMemoryRepo()
+    try:
+        with open(input_path) as input_file:
+            parse_input(input_file, rover_repo,
+                        plateau_settings=plateau_settings)
+
+        report = io.BytesIO()
+        rover_repo.report_all_rovers(output=report)
+
+    except Exception as ex:
+        return MissionResult(input_path, "", 0, str(ex))
+
+    report = report.getvalue().decode()
+    return MissionResult(input_path, report, report.count("\n"), None)
+
+
+def run_batch(input_paths: List[str], workers: int = None,
+              plateau_settings: PlateauSettings = DEFAULT_PLATEAU_SETTINGS) \
+        -> Iterator[MissionResult]:
+    """Runs missions across a process pool.
+
+    Args:
+        input_paths (List[str]): Mission input paths
+        workers (int, optional): Number of worker processes,
+        defaults to number of CPUs, 1 runs in this process
+        plateau_settings (PlateauSettings, optional): Occupancy
+        settings of every mission's plateau
+
+    Yields:
+        MissionResult: Results in the same order as input paths
+    """
+    run_mission = functools.partial(
+        run_mission_file, plateau_settings=plateau_settings)
+    if workers == 1:
+        yield from map(run_mission, input_paths)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, len(input_paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(
+            run_mission, input_paths, chunksize=chunk_size)
+
+
+def print_batch_results(results: Iterable[MissionResult],
+                        debug_mode: bool = False) -> Tuple[int, int]:
+    """Prints per mission reports followed by an aggregate summary.
+
+    Args:
+        results (Iterable[MissionResult]): Mission results in order
+        debug_mode (bool): Whether to show mission error details
+
+    Returns:
+        Tuple[int, int]: Number of succeeded and failed missions
+    """
+    succeeded = failed = rover_count = 0
+    for result in results:
+        print(f"== {result.input_path} ==")
+        if result.error is None:
+            succeeded += 1
+            rover_count += result.rover_count
+            print(result.report, end="")
+        else:
+            failed += 1
+            print(f"Mission failed: {result.error}" if debug_mode else
+                  "Mission failed. "
+                  "Please enable debug mode to see more details.")
+
+    print(f"Missions: {succeeded + failed}, succeeded: {succeeded}, "
+          f"failed: {failed}, rovers: {rover_count}")
+    return succeeded, failed
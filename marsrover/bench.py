@@ -0,0 +1,371 @@
+"""Module for benchmarking the parse and simulate pipeline
+
+Usage: python3 -m marsrover.bench run [--quick] [--output PATH]
+       python3 -m marsrover.bench compare BASELINE CURRENT [--threshold F]
+       python3 -m marsrover.bench threads [--threads N ...] [--length L]
+
+Each scenario of the matrix lands parked rovers on a plateau to reach
+an occupancy density, then lands active rovers in free lanes and times
+their instruction lines. Rovers drive from one end of their lane to
+the other and back, so the same lines can run again for each repeat.
+The whole mission text is also timed through parse_input, so reading,
+tokenizing and landing are measured along with the simulation.
+Results are saved as JSON, and compare flags scenarios slower or
+larger than a stored baseline. The threads command times a whole
+generated mission run sequentially and on threads, to check whether
+threaded mode pays off on the running Python build.
+"""
+import argparse
+import io
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, NamedTuple, Tuple
+
+from .database import RoverMemoryRepo
+from .gen import MissionGenerator, build_lane_trip
+from .missions import Mission, parse_input
+from .parsers import PlateauInputTextParser
+
+# Quick matrix runs in seconds, full matrix in minutes
+QUICK_MATRIX = {
+    "plateau_size": [10, 100],
+    "rover_count": [1, 5],
+    "instruction_length": [10, 100],
+    "occupancy_density": [0.0, 0.3],
+}
+FULL_MATRIX = {
+    "plateau_size": [10, 100, 1000],
+    "rover_count": [1, 50, 500],
+    "instruction_length": [10, 100, 1000],
+    "occupancy_density": [0.0, 0.1, 0.3],
+}
+
+# Instruction lines run by each active rover in one repeat, even so
+# that rovers are back at their landing location after each repeat
+LINES_PER_ROVER = 20
+
+# Metrics where a higher value is better, all others are lower is better
+HIGHER_IS_BETTER = {"lines_per_second", "commands_per_second",
+                    "parse_lines_per_second"}
+
+
+class Scenario(NamedTuple):
+    """One point of the benchmark matrix"""
+    plateau_size: int
+    rover_count: int
+    instruction_length: int
+    occupancy_density: float
+
+    @property
+    def name(self) -> str:
+        return (f"plateau={self.plateau_size} rovers={self.rover_count} "
+                f"length={self.instruction_length} "
+                f"density={self.occupancy_density}")
+
+
+def iter_scenarios(matrix: Dict[str, list]) -> List[Scenario]:
+    """Lists scenarios of a matrix, skipping those with more
+    active rovers than free lanes on the plateau.
+    """
+    scenarios = [Scenario(*values) for values in itertools.product(
+        matrix["plateau_size"], matrix["rover_count"],
+        matrix["instruction_length"], matrix["occupancy_density"])]
+    return [scenario for scenario in scenarios
+            if scenario.rover_count <= (scenario.plateau_size + 1) // 2]
+
+
+def build_mission_lines(scenario: Scenario, seed: int = 0) \
+        -> Tuple[List[str], List[str]]:
+    """Lists input lines of a scenario's mission.
+
+    Returns:
+        Tuple[List[str], List[str]]: Plateau line followed by lines
+        landing parked and active rovers, and instruction lines of
+        one repeat
+    """
+    rng = random.Random(seed)
+    max_coordinate = scenario.plateau_size - 1
+    setup_lines = [f"Bench:{max_coordinate} {max_coordinate}"]
+
+    # Active rovers drive between both ends of even rows
+    lanes = [2 * lane for lane in range(scenario.rover_count)]
+    for lane, y in enumerate(lanes):
+        setup_lines.append(f"Active{lane} Landing:0 {y} W")
+
+    lane_set = set(lanes)
+    free_cells = [(x, y) for y in range(scenario.plateau_size)
+                  if y not in lane_set for x in range(scenario.plateau_size)]
+    parked_count = int(len(free_cells) * scenario.occupancy_density)
+    for index, (x, y) in enumerate(rng.sample(free_cells, parked_count)):
+        # A turn marks the parked rover's location as occupied
+        setup_lines.append(f"Parked{index} Landing:{x} {y} N")
+        setup_lines.append(f"Parked{index} Instructions:L")
+
+    run = max(0, min(max_coordinate, scenario.instruction_length - 2))
+    instruction_lines = [
+        f"Active{lane} Instructions:" + build_lane_trip(
+            rng, scenario.instruction_length, run)
+        for _ in range(LINES_PER_ROVER) for lane in range(len(lanes))]
+    return setup_lines, instruction_lines
+
+
+def build_mission(scenario: Scenario, seed: int = 0):
+    """Lands parked and active rovers of a scenario.
+
+    Returns:
+        Tuple[Mission, List[str]]: Mission with all rovers landed,
+        and instruction lines of one repeat
+    """
+    setup_lines, instruction_lines = build_mission_lines(scenario, seed)
+    mission = Mission(
+        PlateauInputTextParser().parse_input_line(setup_lines[0]),
+        RoverMemoryRepo())
+    for line in setup_lines[1:]:
+        mission.run_line(line)
+    return mission, instruction_lines
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    index = min(len(sorted_values) - 1,
+                int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+
+def run_scenario(scenario: Scenario, repeat: int = 3) -> dict:
+    """Measures throughput, line latency and peak memory of
+    a scenario.
+
+    Args:
+        scenario (Scenario): Scenario to run
+        repeat (int, optional): Timed passes over instruction lines,
+        throughput is taken from the fastest
+
+    Returns:
+        dict: Scenario parameters and measurements
+    """
+    mission, instruction_lines = build_mission(scenario)
+    command_count = sum(len(line.partition(":")[2])
+                        for line in instruction_lines)
+
+    best_seconds = float("inf")
+    latencies = []
+    for _ in range(repeat):
+        pass_start = time.perf_counter()
+        for line in instruction_lines:
+            line_start = time.perf_counter()
+            mission.run_line(line)
+            latencies.append(time.perf_counter() - line_start)
+        best_seconds = min(best_seconds, time.perf_counter() - pass_start)
+    latencies.sort()
+
+    # Whole mission from its text, plateau line and landings included
+    setup_lines, instruction_lines = build_mission_lines(scenario)
+    mission_text = "".join(
+        f"{line}\n" for line in setup_lines + instruction_lines)
+    parse_line_count = len(setup_lines) + len(instruction_lines)
+    best_parse_seconds = float("inf")
+    for _ in range(repeat):
+        parse_start = time.perf_counter()
+        parse_input(io.StringIO(mission_text), RoverMemoryRepo())
+        best_parse_seconds = min(best_parse_seconds,
+                                 time.perf_counter() - parse_start)
+
+    # Memory is traced on a fresh mission, tracing slows it down
+    tracemalloc.start()
+    try:
+        mission, instruction_lines = build_mission(scenario)
+        for line in instruction_lines:
+            mission.run_line(line)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "name": scenario.name,
+        "parameters": scenario._asdict(),
+        "lines": len(instruction_lines),
+        "commands": command_count,
+        "metrics": {
+            "lines_per_second": len(instruction_lines) / best_seconds,
+            "commands_per_second": command_count / best_seconds,
+            "parse_lines_per_second": parse_line_count / best_parse_seconds,
+            "latency_p50_us": _percentile(latencies, 50) * 1e6,
+            "latency_p90_us": _percentile(latencies, 90) * 1e6,
+            "latency_p99_us": _percentile(latencies, 99) * 1e6,
+            "latency_max_us": latencies[-1] * 1e6,
+            "peak_memory_bytes": peak_memory,
+        },
+    }
+
+
+def run_benchmarks(matrix: Dict[str, list], repeat: int = 3) -> dict:
+    """Runs every scenario of a matrix.
+
+    Returns:
+        dict: Environment and scenario results, ready to save as JSON
+    """
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "scenarios": [run_scenario(scenario, repeat)
+                      for scenario in iter_scenarios(matrix)],
+    }
+
+
+def run_threads_benchmark(threads: List[int], length: int = 20,
+                          rover_count: int = 2000,
+                          repeat: int = 3) -> Dict[str, float]:
+    """Times a generated mission run by parse_input and by
+    parse_input_scheduled with each thread count.
+
+    Args:
+        threads (List[int]): Thread counts to time
+        length (int, optional): Instruction string length, lines
+        at least VECTORIZED_MIN_COMMANDS long run on NumPy
+        rover_count (int, optional): Number of rovers
+        repeat (int, optional): Timed runs of each mode, the fastest
+        is kept
+
+    Returns:
+        Dict[str, float]: Lines per second of sequential and of
+        each threads=N run
+    """
+    from .scheduling import parse_input_scheduled
+
+    mission_text = "".join(f"{line}\n" for line in MissionGenerator(
+        rover_count, length=length, lane_length=50).iter_lines())
+    line_count = mission_text.count("\n")
+
+    runs = {"sequential": lambda: parse_input(
+        io.StringIO(mission_text), RoverMemoryRepo())}
+    for thread_count in threads:
+        runs[f"threads={thread_count}"] = (
+            lambda thread_count=thread_count: parse_input_scheduled(
+                io.StringIO(mission_text), RoverMemoryRepo(), thread_count))
+
+    results = {}
+    for name, run in runs.items():
+        best_seconds = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            best_seconds = min(best_seconds, time.perf_counter() - start)
+        results[name] = line_count / best_seconds
+    return results
+
+
+def compare_results(baseline: dict, current: dict,
+                    threshold: float = 0.1) -> List[str]:
+    """Finds metrics of current results worse than baseline by more
+    than a relative threshold. Scenarios missing from either side
+    are skipped.
+
+    Returns:
+        List[str]: One description per regressed metric
+    """
+    baseline_scenarios = {
+        scenario["name"]: scenario for scenario in baseline["scenarios"]}
+    regressions = []
+    for scenario in current["scenarios"]:
+        baseline_scenario = baseline_scenarios.get(scenario["name"])
+        if baseline_scenario is None:
+            continue
+
+        for metric, value in scenario["metrics"].items():
+            baseline_value = baseline_scenario["metrics"].get(metric)
+            if not baseline_value:
+                continue
+            change = (value - baseline_value) / baseline_value
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if change > threshold:
+                regressions.append(
+                    f"{scenario['name']}: {metric} {baseline_value:.6g} -> "
+                    f"{value:.6g} ({change:+.1%} worse)")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m marsrover.bench",
+        description="Benchmarks the rover parse and simulate pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="runs the benchmark matrix")
+    run_parser.add_argument("--quick", action="store_true",
+                            help="runs the small matrix only")
+    run_parser.add_argument("--repeat", type=int, default=3,
+                            help="timed passes per scenario, defaults to 3")
+    run_parser.add_argument("--output", metavar="PATH",
+                            help="saves results as JSON to PATH")
+
+    compare_parser = commands.add_parser(
+        "compare", help="flags regressions against a baseline")
+    compare_parser.add_argument("baseline", help="baseline results JSON")
+    compare_parser.add_argument("current", help="current results JSON")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="relative change counted as regression, defaults to 0.1")
+
+    threads_parser = commands.add_parser(
+        "threads", help="times threaded mode against sequential runs")
+    threads_parser.add_argument(
+        "--threads", type=int, nargs="+", default=[1, 2, 4, 8],
+        help="thread counts to time, defaults to 1 2 4 8")
+    threads_parser.add_argument(
+        "--length", type=int, default=20,
+        help="instruction string length, defaults to 20")
+    threads_parser.add_argument(
+        "--rovers", type=int, default=2000,
+        help="number of rovers, defaults to 2000")
+    threads_parser.add_argument("--repeat", type=int, default=3,
+                                help="timed runs per mode, defaults to 3")
+
+    arguments = parser.parse_args(argv)
+
+    if arguments.command == "threads":
+        results = run_threads_benchmark(
+            arguments.threads, arguments.length, arguments.rovers,
+            arguments.repeat)
+        for name, lines_per_second in results.items():
+            print(f"{name}: {lines_per_second:.0f} lines/s, "
+                  f"{lines_per_second / results['sequential']:.2f}x "
+                  "sequential")
+        return 0
+
+    if arguments.command == "run":
+        results = run_benchmarks(
+            QUICK_MATRIX if arguments.quick else FULL_MATRIX,
+            arguments.repeat)
+        for scenario in results["scenarios"]:
+            metrics = scenario["metrics"]
+            print(f"{scenario['name']}: "
+                  f"{metrics['lines_per_second']:.0f} lines/s, "
+                  f"{metrics['commands_per_second']:.0f} commands/s, "
+                  f"{metrics['parse_lines_per_second']:.0f} parsed lines/s, "
+                  f"p99 {metrics['latency_p99_us']:.1f} us, "
+                  f"peak {metrics['peak_memory_bytes'] / 1024:.0f} KiB")
+        if arguments.output:
+            with open(arguments.output, "w") as output_file:
+                json.dump(results, output_file, indent=2)
+        return 0
+
+    with open(arguments.baseline) as baseline_file, \
+            open(arguments.current) as current_file:
+        regressions = compare_results(
+            json.load(baseline_file), json.load(current_file),
+            arguments.threshold)
+    for regression in regressions:
+        print(regression)
+    print(f"Regressions: {len(regressions)}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""Module for binary checkpoints of mission state
+
+A checkpoint holds everything needed to continue a mission: plateau
+configuration and occupancy, every rover in registration order, and
+the line number and input offset reached. Layout, little endian:
+
+- header: magic, version, max_x, max_y, line number, input offset,
+  input size and modification time in nanoseconds, rover count,
+  occupied location count, plateau name length, followed by the
+  plateau name
+- rovers: x, y, orientation code and name length, followed by name
+- occupied locations: x, y and occupant name length, followed by name
+
+Names are UTF-8. A checkpoint is written to a temporary file first and
+then renamed over the previous one, so a crash while writing leaves
+the latest complete checkpoint in place. Input size and modification
+time are zero for inline input, a mission is only resumed from input
+they match, so that the input offset points into the same lines.
+"""
+import mmap
+import os
+import struct
+import time
+from typing import List, NamedTuple, Optional, TextIO, Tuple
+
+from .database import RoverRepo
+from .exceptions import InvalidInputException
+from .metrics import NULL_METRICS, Metrics
+from .missions import LineError, Mission, run_mission
+from .models import (DEFAULT_PLATEAU_SETTINGS, Plateau, PlateauSettings,
+                     Rover)
+from .programs import ORIENTATION_ORDER
+
+_MAGIC = b"MRCK"
+_VERSION = 2
+_HEADER = struct.Struct("<4sHqqQQQqQQH")
+_ROVER = struct.Struct("<qqBH")
+_OCCUPANT = struct.Struct("<qqH")
+
+
+class InputIdentity(NamedTuple):
+    """Size and modification time of the file a mission is read from,
+    zero for inline input
+    """
+    size: int = 0
+    mtime_ns: int = 0
+
+
+def get_input_identity(input_file: TextIO) -> InputIdentity:
+    """Identifies the file behind a mission input.
+
+    Args:
+        input_file (TextIO): Text mode file, MappedInputFile or
+        inline input
+
+    Returns:
+        InputIdentity: Size and modification time of the file, zero
+        for inline input
+    """
+    input_stat = getattr(input_file, "file_stat", None)
+    if input_stat is None:
+        try:
+            input_stat = os.fstat(input_file.fileno())
+        except (AttributeError, OSError):
+            # StringIO over inline input has no file
+            return InputIdentity()
+    return InputIdentity(input_stat.st_size, input_stat.st_mtime_ns)
+
+
+def write_checkpoint(path: str, mission: Mission, input_offset: int,
+                     input_identity: InputIdentity = InputIdentity()):
+    """Saves state of a mission between two input lines.
+
+    Args:
+        path (str): Path to the checkpoint file, replaced if it exists
+        mission (Mission): Mission to save
+        input_offset (int): Input offset of the line after the
+        mission's last line
+        input_identity (InputIdentity, optional): Identity of the
+        input, resuming from other input is refused
+    """
+    plateau = mission.plateau
+    plateau_name = plateau.name.encode()
+    occupants = plateau.get_occupants()
+    temporary_path = f"{path}.tmp"
+
+    with open(temporary_path, "wb") as checkpoint_file:
+        # Rovers are streamed, so their count is filled in afterwards
+        checkpoint_file.write(bytes(_HEADER.size))
+        checkpoint_file.write(plateau_name)
+
+        rover_count = 0
+        for rover in mission.rover_repo.iter_rovers():
+            name = rover.name.encode()
+            checkpoint_file.write(_ROVER.pack(
+                rover.current_x, rover.current_y,
+                ORIENTATION_ORDER.index(rover.current_orientation),
+                len(name)))
+            checkpoint_file.write(name)
+            rover_count += 1
+
+        for (x, y), rover_name in occupants:
+            name = rover_name.encode()
+            checkpoint_file.write(_OCCUPANT.pack(x, y, len(name)))
+            checkpoint_file.write(name)
+
+        checkpoint_file.seek(0)
+        checkpoint_file.write(_HEADER.pack(
+            _MAGIC, _VERSION, plateau.max_x, plateau.max_y,
+            mission.line_number, input_offset, input_identity.size,
+            input_identity.mtime_ns, rover_count, len(occupants),
+            len(plateau_name)))
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+
+    os.replace(temporary_path, path)
+
+
+def load_checkpoint(path: str, rover_repo: RoverRepo,
+                    metrics: Metrics = NULL_METRICS,
+                    input_identity: InputIdentity = None,
+                    plateau_settings: PlateauSettings =
+                    DEFAULT_PLATEAU_SETTINGS) -> Tuple[Mission, int]:
+    """Restores a mission saved in a checkpoint, reading the
+    checkpoint through a memory map.
+
+    Args:
+        path (str): Path to the checkpoint file
+        rover_repo (RoverRepo): Empty repository to register
+        saved rovers into
+        metrics (Metrics, optional): Metrics recording the stages
+        of the restored mission
+        input_identity (InputIdentity, optional): Identity of the
+        input to continue, checked against the saved one if given
+        plateau_settings (PlateauSettings, optional): Occupancy and
+        blocked move settings of the restored plateau
+
+    Raises:
+        InvalidInputException: If the file is not a checkpoint
+        InvalidInputException: If the checkpoint was taken from
+        other input than input_identity
+
+    Returns:
+        Tuple[Mission, int]: Restored mission, and input offset
+        of the line to continue from
+    """
+    with open(path, "rb") as checkpoint_file:
+        # Empty files cannot be mapped
+        if os.fstat(checkpoint_file.fileno()).st_size < _HEADER.size:
+            raise InvalidInputException(f"Invalid checkpoint file: {path}")
+        checkpoint_map = mmap.mmap(
+            checkpoint_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    with checkpoint_map:
+        if checkpoint_map[:len(_MAGIC)] != _MAGIC:
+            raise InvalidInputException(f"Invalid checkpoint file: {path}")
+
+        (_, version, max_x, max_y, line_number, input_offset, input_size,
+         input_mtime_ns, rover_count, occupied_count,
+         name_length) = _HEADER.unpack_from(checkpoint_map)
+        if version != _VERSION:
+            raise InvalidInputException(
+                f"Unsupported checkpoint version: {version}")
+        if (input_identity is not None and input_identity
+                != InputIdentity(input_size, input_mtime_ns)):
+            raise InvalidInputException(
+                f"Checkpoint {path} was taken from other input, or the "
+                "input has changed since")
+
+        offset = _HEADER.size
+        plateau = Plateau(
+            checkpoint_map[offset:offset + name_length].decode(),
+            max_x, max_y, rover_count, metrics, plateau_settings)
+        offset += name_length
+
+        for _ in range(rover_count):
+            x, y, orientation_code, name_length = _ROVER.unpack_from(
+                checkpoint_map, offset)
+            offset += _ROVER.size
+            name = checkpoint_map[offset:offset + name_length].decode()
+            offset += name_length
+            rover_repo.register_new_rover(name, Rover(
+                plateau, name, x, y, ORIENTATION_ORDER[orientation_code]))
+
+        for _ in range(occupied_count):
+            x, y, name_length = _OCCUPANT.unpack_from(checkpoint_map, offset)
+            offset += _OCCUPANT.size
+            plateau.occupy_location(
+                (x, y), checkpoint_map[offset:offset + name_length].decode())
+            offset += name_length
+
+    return Mission(plateau, rover_repo, line_number,
+                   metrics=metrics), input_offset
+
+
+class CheckpointWriter:
+    """Writes a checkpoint every N lines or T seconds, whichever
+    comes first, after a line has run successfully.
+    """
+
+    def __init__(self, path: str, every_lines: Optional[int] = None,
+                 every_seconds: Optional[float] = None):
+        self.path = path
+        self._every_lines = every_lines
+        self._every_seconds = every_seconds
+        self._lines_since_checkpoint = 0
+        self._last_checkpoint_time = time.monotonic()
+
+    def line_done(self, mission: Mission, input_file: TextIO):
+        """Counts a line that ran, and writes a checkpoint if due.
+
+        Args:
+            mission (Mission): Running mission
+            input_file (TextIO): Mission input, positioned at the
+            next line
+        """
+        self._lines_since_checkpoint += 1
+        if ((self._every_lines
+             and self._lines_since_checkpoint >= self._every_lines)
+                or (self._every_seconds
+                    and time.monotonic() - self._last_checkpoint_time
+                    >= self._every_seconds)):
+            write_checkpoint(self.path, mission, input_file.tell(),
+                             get_input_identity(input_file))
+            self._lines_since_checkpoint = 0
+            self._last_checkpoint_time = time.monotonic()
+
+
+def resume_mission(input_file: TextIO, rover_repo: RoverRepo,
+                   checkpoint_path: str,
+                   checkpoint_writer: CheckpointWriter = None,
+                   error_log: List[LineError] = None,
+                   metrics: Metrics = NULL_METRICS,
+                   plateau_settings: PlateauSettings =
+                   DEFAULT_PLATEAU_SETTINGS):
+    """Continues a mission from its checkpoint, giving the same
+    rovers and errors as an uninterrupted parse_input.
+
+    Args:
+        input_file (TextIO): User's input the checkpoint was taken
+        from, unchanged since, seekable to the saved offset
+        rover_repo (RoverRepo): Empty repository to register rovers into
+        checkpoint_path (str): Path to the checkpoint file
+        checkpoint_writer (CheckpointWriter, optional): Writer saving
+        mission state as lines run
+        error_log (List[LineError], optional): Keeps going after a
+        failing rover line, appending errors of lines after the
+        checkpoint here
+        metrics (Metrics, optional): Metrics recording the stages
+        of the lines after the checkpoint
+        plateau_settings (PlateauSettings, optional): Occupancy and
+        blocked move settings of the restored plateau
+
+    Raises:
+        InvalidInputException: If the checkpoint was taken from other
+        input, or the input has changed since
+    """
+    mission, input_offset = load_checkpoint(
+        checkpoint_path, rover_repo, metrics,
+        get_input_identity(input_file), plateau_settings)
+    input_file.seek(input_offset)
+    run_mission(mission, input_file, checkpoint_writer, error_log)
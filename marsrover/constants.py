@@ -2,12 +2,198 @@
 
 COMMAND_LINE_HELP = """Usage: python3 -m marsrover [--debug] input_path
        python3 -m marsrover [--debug] inline_input
+       python3 -m marsrover [--debug] --batch [--workers=N] batch_input
+       python3 -m marsrover [--debug] --db=PATH [--cache[=N]] input_path
+       python3 -m marsrover --db=PATH
+       python3 -m marsrover [--debug] --table [--cache[=N]] input_path
+       python3 -m marsrover [--debug] --checkpoint=PATH [--resume]
+                            [--checkpoint-lines=N] [--checkpoint-seconds=T]
+                            input_path
+       python3 -m marsrover [--debug] --follow input_path
+       python3 -m marsrover [--debug] --metrics=PATH [--metrics-seconds=T]
+                            input_path
+       python3 -m marsrover [--debug] --report-format=FORMAT
+                            [--report-output=PATH] input_path
+       python3 -m marsrover [--debug] --keep-going [--error-log=PATH]
+                            [--blocked-moves=POLICY] input_path
+       python3 -m marsrover [--debug] --validate [--workers=N] input_path
+       python3 -m marsrover --validate-only [--workers=N] input_path
+       python3 -m marsrover [--debug] --packed packed_input_path
+       python3 -m marsrover [--debug] --ticks input_path
+       python3 -m marsrover [--debug] --occupancy=BACKEND
+                            [--occupancy-file=PATH] [--expected-rovers=N]
+                            input_path
+       python3 -m marsrover [--debug] --journal=PATH input_path
        python3 -m marsrover --help
 
 input_path   : path to the text input file
+packed_input_path : path to a packed input file, converted from a text
+                    input file by python3 -m marsrover.packed
 inline_input : inline text input
+batch_input  : directory of input files, manifest file listing
+               one input path per line, or glob pattern
 
 Options:
 --debug      : shows more details when error is raised
 --help       : prints command line usage help
-"""
\ No newline at end of file
+--batch      : runs every input of batch_input as an independent mission
+--workers=N  : number of worker processes in batch and validation
+               modes, defaults to number of CPUs
+--db=PATH    : stores rovers in the SQLite database at PATH, replacing
+               rovers stored there, without input it reports the rovers
+               already stored
+--table     : keeps rovers column by column in typed arrays instead
+               of one object per rover, for large fleets in memory
+--cache[=N]  : keeps N recently used rovers in memory in front of
+               the rover storage, defaults to 100000, debug mode
+               reports cache hits, misses and evictions
+--checkpoint=PATH       : saves mission state to PATH while running
+--checkpoint-lines=N    : lines between checkpoints, defaults to 1000000
+--checkpoint-seconds=T  : seconds between checkpoints, defaults to 300
+--resume                : continues from the checkpoint at PATH if
+                          it exists, input must be the same, unchanged
+                          file
+--follow     : keeps running and parses lines appended to input_path,
+               reporting rovers changed by each batch of new lines
+--metrics=PATH          : saves stage timings and counters of the run to
+                          PATH, in the Prometheus text format if PATH
+                          ends with .prom and as JSON otherwise
+--metrics-seconds=T     : also saves metrics every T seconds while running
+--report-format=FORMAT  : writes the report as text, jsonl, csv, binary
+                          records or an npy array, defaults to text
+--report-output=PATH    : writes the report to PATH instead of stdout,
+                          npy reports need it
+--keep-going            : skips failing lines instead of stopping the
+                          mission, logging how many were skipped
+--error-log=PATH        : saves line number, byte offset, rover and
+                          message of each skipped line to PATH
+--blocked-moves=POLICY  : abort fails the line of a blocked move, skip
+                          skips the blocked step, stop ignores the rest
+                          of the line, defaults to abort
+--validate              : checks syntax of every line across worker
+                          processes before running the mission, which
+                          is only run if no syntax error is found
+--validate-only         : only checks syntax, listing every syntax error
+--packed                : runs a packed binary input, error line numbers
+                          are those of the text input it was converted
+                          from, byte offsets are within the packed input
+--ticks                 : moves all rovers at once, one command per
+                          tick, blocked moves are resolved by landing
+                          order instead of failing, needs NumPy
+--occupancy=BACKEND     : keeps occupied locations in a sparse hash or a
+                          dense grid, auto picks dense if rovers are
+                          expected on a large share of the plateau and
+                          needs --expected-rovers unless the input is
+                          packed, defaults to auto with a known rover
+                          count and to sparse otherwise
+--occupancy-file=PATH   : keeps dense grids in a new file at PATH instead
+                          of memory, an existing file is not overwritten
+--expected-rovers=N     : number of rovers expected, for auto occupancy
+--journal=PATH          : records every rover landing and instructions
+                          line in the move journal at PATH, queried with
+                          python3 -m marsrover.journal
+"""
+
+COMMAND_LINE_OPTIONS = {"--debug", "--help", "--batch", "--workers", "--db",
+                        "--cache", "--checkpoint", "--checkpoint-lines",
+                        "--checkpoint-seconds", "--resume", "--follow",
+                        "--metrics", "--metrics-seconds", "--report-format",
+                        "--report-output", "--keep-going", "--error-log",
+                        "--blocked-moves", "--validate", "--validate-only",
+                        "--packed", "--ticks", "--occupancy",
+                        "--occupancy-file", "--expected-rovers",
+                        "--journal", "--table"}
+
+# Options each mode of a run accepts besides --debug and --help, keyed
+# by the option picking the mode, None for a sequential run. The first
+# mode option given, in this order, picks the mode.
+_REPORT_OPTIONS = {"--db", "--table", "--cache", "--metrics",
+                   "--metrics-seconds", "--report-format", "--report-output"}
+_PLATEAU_OPTIONS = {"--occupancy", "--occupancy-file", "--expected-rovers"}
+_KEEP_GOING_OPTIONS = {"--keep-going", "--error-log", "--blocked-moves"}
+COMMAND_LINE_MODE_OPTIONS = {
+    "--batch": {"--workers", "--occupancy", "--expected-rovers"},
+    "--follow": {"--blocked-moves"} | _PLATEAU_OPTIONS,
+    "--validate-only": {"--workers"},
+    "--checkpoint": {"--resume", "--checkpoint-lines", "--checkpoint-seconds"}
+    | _REPORT_OPTIONS | _PLATEAU_OPTIONS | _KEEP_GOING_OPTIONS,
+    "--ticks": _REPORT_OPTIONS | _PLATEAU_OPTIONS,
+    "--packed": _REPORT_OPTIONS | _PLATEAU_OPTIONS | _KEEP_GOING_OPTIONS
+    | {"--journal"},
+    "--validate": {"--workers", "--journal"}
+    | _REPORT_OPTIONS | _PLATEAU_OPTIONS | _KEEP_GOING_OPTIONS,
+    None: _REPORT_OPTIONS | _PLATEAU_OPTIONS | _KEEP_GOING_OPTIONS
+    | {"--journal"},
+}
+
+# Options only accepted along with another option
+COMMAND_LINE_REQUIRED_OPTIONS = {"--error-log": "--keep-going",
+                                 "--metrics-seconds": "--metrics"}
+
+# Options which cannot be combined, whatever the mode
+COMMAND_LINE_CONFLICTING_OPTIONS = {"--table": "--db"}
+
+# Maximum number of compiled instruction programs kept in memory
+PROGRAM_CACHE_SIZE = 4096
+
+# Instruction strings at least this long run on the NumPy engine
+# when NumPy is installed
+VECTORIZED_MIN_COMMANDS = 10000
+
+# Maximum number of instruction lines scheduled together in threaded mode
+SCHEDULER_WINDOW_SIZE = 4096
+
+# Number of rover writes buffered before one SQLite transaction
+SQLITE_WRITE_BATCH_SIZE = 10000
+
+# Number of rovers read from SQLite at once while iterating them
+SQLITE_READ_PAGE_SIZE = 10000
+
+# Default number of rovers kept by a caching rover repo
+ROVER_CACHE_SIZE = 100000
+
+# Default interval between mission checkpoints, in lines and in seconds
+CHECKPOINT_EVERY_LINES = 1000000
+CHECKPOINT_EVERY_SECONDS = 300
+
+# Seconds to wait for new lines when following a mission file
+FOLLOW_POLL_SECONDS = 0.5
+
+# Bytes read at once from a followed mission file
+FOLLOW_READ_SIZE = 1 << 20
+
+# Metrics files ending with this are saved in the Prometheus text format
+METRICS_PROMETHEUS_SUFFIX = ".prom"
+
+# Plateau occupancy backends, auto picks sparse or dense
+OCCUPANCY_BACKENDS = ("auto", "sparse", "dense")
+
+# Automatic occupancy selection picks the dense grid when a plateau has
+# at most this many cells per expected rover: a sparse entry costs
+# about as much memory as 16 grid cells of 4 bytes
+OCCUPANCY_DENSE_CELLS_PER_ROVER = 16
+
+# Largest plateau, in cells, automatically given a dense grid in memory
+OCCUPANCY_DENSE_MAX_CELLS = 1 << 28
+
+# Approximate size of the input byte range validated by a worker at once
+VALIDATION_CHUNK_BYTES = 16 << 20
+
+# Number of rovers encoded per write of a report
+REPORT_CHUNK_SIZE = 8192
+
+# Default localhost TCP port of the mission server
+SERVER_DEFAULT_PORT = 8765
+
+# Longest request line accepted by the mission server, in bytes
+SERVER_MAX_LINE_BYTES = 1 << 22
+
+# Rover states between full fleet keyframes of a move journal
+JOURNAL_KEYFRAME_EVERY = 1000000
+
+# A move journal index keeps the offset of every Nth state of each rover,
+# point-in-time queries about a rover read at most N states
+JOURNAL_INDEX_EVERY = 64
+
+# Bytes of move journal records buffered before a write
+JOURNAL_WRITE_BUFFER_SIZE = 1 << 20
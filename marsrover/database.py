@@ -1,6 +1,13 @@
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import BinaryIO, Iterator, NamedTuple
 
-from .models import Rover
+from .constants import (ROVER_CACHE_SIZE, SQLITE_READ_PAGE_SIZE,
+                        SQLITE_WRITE_BATCH_SIZE)
+from .enums import Orientation
+from .fleet import RoverTable, RoverView
+from .models import Plateau, Rover
 
 
 class RoverRepo(ABC):
@@ -16,8 +23,57 @@ class RoverRepo(ABC):
                            **kwargs):
         pass
 
+    def land_new_rover(self, rover_name: str, plateau: Plateau,
+                       landing_x: int, landing_y: int,
+                       orientation: Orientation) -> Rover:
+        """Creates and registers a rover which has just landed.
+        Repos keeping rovers in a form of their own create it
+        there directly.
+
+        Args:
+            rover_name (str): Name of the new rover
+            plateau (Plateau): Plateau the rover landed on
+            landing_x (int): Landing x coordinate
+            landing_y (int): Landing y coordinate
+            orientation (Orientation): Initial orientation
+
+        Returns:
+            Rover: The new rover
+        """
+        new_rover = Rover(plateau, rover_name, landing_x, landing_y,
+                          orientation)
+        self.register_new_rover(rover_name, new_rover)
+        return new_rover
+
+    def report_all_rovers(self, report_format: str = "text",
+                          output: BinaryIO = None):
+        """Reports status of all rovers, streamed from iter_rovers
+        and written in buffered chunks.
+
+        Args:
+            report_format (str, optional): One of text, jsonl, csv,
+            binary or npy
+            output (BinaryIO, optional): Binary output, stdout
+            by default
+        """
+        from .reports import write_report
+
+        write_report(self, report_format, output)
+
     @abstractmethod
-    def report_all_rovers(self):
+    def iter_rovers(self) -> Iterator[Rover]:
+        """Iterates rovers in registration order, reports are
+        streamed from it.
+        """
+        pass
+
+    def update_rover(self, rover: Rover, *args, **kwargs):
+        """Saves a rover changed after it was fetched. Repos
+        handing out live rover objects have nothing to save.
+
+        Args:
+            rover (Rover): Rover fetched from this repo
+        """
         pass
 
 
@@ -51,8 +107,383 @@ class RoverMemoryRepo(RoverRepo):
         """
         self.rover_registry[rover_name] = new_rover_obj
 
-    def report_all_rovers(self):
-        """Reports status of all registered rovers.
+    def iter_rovers(self) -> Iterator[Rover]:
+        """Iterates registered rovers in registration order.
+        """
+        return iter(self.rover_registry.values())
+
+
+class RoverTableRepo(RoverRepo):
+    def __init__(self):
+        super().__init__()
+        self.rover_table = RoverTable()
+
+    def get_rover_by_name(self, rover_name: str, *args, **kwargs) -> 'Rover':
+        """Fetches a view of a rover from table by its name
+
+        Args:
+            rover_name (str): Name of the to look for from table
+
+        Returns:
+            Rover: RoverView on the rover with provided name,
+            None if the provided name cannot be found
+        """
+        rover_id = self.rover_table.get_id(rover_name)
+        if rover_id is None:
+            return None
+        return self.rover_table.view(rover_id)
+
+    def register_new_rover(self, rover_name: str, new_rover_obj: Rover, *args,
+                           **kwargs):
+        """Copies a new rover into table, the rover object
+        itself is not kept. Rovers are expected to share one
+        plateau.
+
+        Args:
+            rover_name (str): Name of the new rover, will be used
+            as ID (key) in table
+            rover_obj (Rover): New rover obj reference
+        """
+        if self.rover_table.plateau is None:
+            self.rover_table.plateau = new_rover_obj.plateau
+
+        self.rover_table.add(
+            rover_name, new_rover_obj.current_x, new_rover_obj.current_y,
+            new_rover_obj.current_orientation)
+
+    def land_new_rover(self, rover_name: str, plateau: Plateau,
+                       landing_x: int, landing_y: int,
+                       orientation: Orientation) -> Rover:
+        """Adds a rover which has just landed straight into table,
+        no rover object is created.
+
+        Returns:
+            Rover: RoverView on the new rover
+        """
+        if self.rover_table.plateau is None:
+            self.rover_table.plateau = plateau
+
+        return self.rover_table.view(self.rover_table.add(
+            rover_name, landing_x, landing_y, orientation))
+
+    def update_rover(self, rover: Rover, *args, **kwargs):
+        """Copies state of a rover into table. Views on
+        the table write through and need no copying.
+
+        Args:
+            rover (Rover): Rover with the name of a rover in table
+        """
+        if isinstance(rover, RoverView) and rover._table is self.rover_table:
+            return
+
+        rover_id = self.rover_table.get_id(rover.name)
+        view = self.rover_table.view(rover_id)
+        view.current_x = rover.current_x
+        view.current_y = rover.current_y
+        view.current_orientation = rover.current_orientation
+
+    def iter_rovers(self) -> Iterator[Rover]:
+        """Iterates views on rovers in table in registration order.
+        """
+        for rover_id in range(len(self.rover_table)):
+            yield self.rover_table.view(rover_id)
+
+
+class RoverSQLiteRepo(RoverRepo):
+    _create_statements = (
+        "CREATE TABLE IF NOT EXISTS plateau ("
+        "name TEXT NOT NULL, max_x INTEGER NOT NULL, max_y INTEGER NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS rovers ("
+        "id INTEGER PRIMARY KEY, name TEXT NOT NULL, x INTEGER NOT NULL, "
+        "y INTEGER NOT NULL, orientation TEXT NOT NULL)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS rovers_name ON rovers (name)",
+    )
+    _select_rover_statement = (
+        "SELECT name, x, y, orientation FROM rovers WHERE name = ?")
+    _select_rovers_page_statement = (
+        "SELECT id, name, x, y, orientation FROM rovers WHERE id > ? "
+        "ORDER BY id LIMIT ?")
+    # Overwriting a rover keeps its id, so report order is kept
+    _save_rover_statement = (
+        "INSERT INTO rovers (name, x, y, orientation) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (name) DO UPDATE SET "
+        "x = excluded.x, y = excluded.y, orientation = excluded.orientation")
+
+    def __init__(self, database_path: str, reset: bool = False):
+        """Opens a SQLite database of rovers, creating it if needed.
+
+        Args:
+            database_path (str): Path to the database file
+            reset (bool, optional): Whether to drop rovers and plateau
+            already stored in the database
+        """
+        # Imported here, most runs never use SQLite
+        import sqlite3
+
+        super().__init__()
+        # Threaded missions share the connection behind a lock
+        self._connection = sqlite3.connect(
+            database_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._plateau = None
+        # Rovers registered or changed but not written yet, in order
+        self._unsaved_rovers = {}
+
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("PRAGMA synchronous = NORMAL")
+            for statement in self._create_statements:
+                self._connection.execute(statement)
+            if reset:
+                self._connection.execute("DELETE FROM rovers")
+                self._connection.execute("DELETE FROM plateau")
+
+        row = self._connection.execute(
+            "SELECT name, max_x, max_y FROM plateau").fetchone()
+        if row:
+            self._plateau = Plateau(*row)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Writes unsaved rovers and closes the database."""
+        with self._lock:
+            self.flush()
+            self._connection.close()
+
+    def flush(self):
+        """Writes unsaved rovers in one transaction."""
+        with self._lock:
+            if not self._unsaved_rovers:
+                return
+            with self._connection:
+                self._connection.executemany(
+                    self._save_rover_statement,
+                    ((rover.name, rover.current_x, rover.current_y,
+                      rover.current_orientation.name)
+                     for rover in self._unsaved_rovers.values()))
+            self._unsaved_rovers.clear()
+
+    def _keep_unsaved_rover(self, rover_name: str, rover: Rover):
+        with self._lock:
+            self._unsaved_rovers[rover_name] = rover
+            if len(self._unsaved_rovers) >= SQLITE_WRITE_BATCH_SIZE:
+                self.flush()
+
+    def get_rover_by_name(self, rover_name: str, *args, **kwargs) -> 'Rover':
+        """Fetches a rover from database by its name.
+        Changes to the rover are kept after update_rover.
+
+        Args:
+            rover_name (str): Name of the to look for from database
+
+        Returns:
+            Rover: Rover object with provided name,
+            None if the provided name cannot be found
+        """
+        with self._lock:
+            rover = self._unsaved_rovers.get(rover_name)
+            if rover is not None:
+                return rover
+
+            row = self._connection.execute(
+                self._select_rover_statement, (rover_name,)).fetchone()
+
+        if row is None:
+            return None
+        return self._rover_from_row(row)
+
+    def _rover_from_row(self, row) -> Rover:
+        name, x, y, orientation = row
+        return Rover(self._plateau, name, x, y, Orientation[orientation])
+
+    def register_new_rover(self, rover_name: str, new_rover_obj: Rover, *args,
+                           **kwargs):
+        """Registers a new rover into database, written in batches.
+        It will overwrite if an existing name is
+        provided. Rovers are expected to share one plateau,
+        which is stored along with them.
+
+        Args:
+            rover_name (str): Name of the new rover, will be used
+            as ID (key) in database
+            rover_obj (Rover): New rover obj reference
+        """
+        with self._lock:
+            if self._plateau is None:
+                self._plateau = new_rover_obj.plateau
+                with self._connection:
+                    self._connection.execute(
+                        "INSERT INTO plateau VALUES (?, ?, ?)",
+                        (self._plateau.name, self._plateau.max_x,
+                         self._plateau.max_y))
+
+            self._keep_unsaved_rover(rover_name, new_rover_obj)
+
+    def update_rover(self, rover: Rover, *args, **kwargs):
+        """Saves a rover changed after it was fetched,
+        written in batches.
+
+        Args:
+            rover (Rover): Rover fetched from this repo
+        """
+        self._keep_unsaved_rover(rover.name, rover)
+
+    def iter_rovers(self) -> Iterator[Rover]:
+        """Iterates rovers in registration order, read a page at a
+        time instead of loaded at once. The lock is only held while
+        reading a page, so rovers may be written while iterating,
+        and pages after a write see it.
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                self.flush()
+                rows = self._connection.execute(
+                    self._select_rovers_page_statement,
+                    (last_id, SQLITE_READ_PAGE_SIZE)).fetchall()
+
+            for row in rows:
+                yield self._rover_from_row(row[1:])
+            if len(rows) < SQLITE_READ_PAGE_SIZE:
+                return
+            last_id = rows[-1][0]
+
+
+class RoverCacheInfo(NamedTuple):
+    """Counters of a RoverCachingRepo"""
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class RoverCachingRepo(RoverRepo):
+    def __init__(self, rover_repo: RoverRepo,
+                 maxsize: int = ROVER_CACHE_SIZE):
+        """Keeps recently used rovers of another repo in a bounded
+        LRU cache. Changed rovers are written back on eviction and
+        on flush, names known to be missing are cached as well.
+
+        Args:
+            rover_repo (RoverRepo): Repo to cache
+            maxsize (int, optional): Maximum number of cached rovers,
+            and of cached missing names
+        """
+        super().__init__()
+        self.rover_repo = rover_repo
+        self._maxsize = maxsize
+        self._rovers = OrderedDict()
+        self._dirty_names = set()
+        self._missing_names = OrderedDict()
+        # Threaded missions share the cache
+        self._lock = threading.RLock()
+        self.hits = self.misses = self.evictions = 0
+
+    def cache_info(self) -> RoverCacheInfo:
+        return RoverCacheInfo(self.hits, self.misses, self.evictions,
+                              self._maxsize, len(self._rovers))
+
+    def _cache_rover(self, rover_name: str, rover: Rover):
+        self._missing_names.pop(rover_name, None)
+        self._rovers[rover_name] = rover
+        self._rovers.move_to_end(rover_name)
+        if len(self._rovers) > self._maxsize:
+            evicted_name, evicted_rover = self._rovers.popitem(last=False)
+            self.evictions += 1
+            if evicted_name in self._dirty_names:
+                self._dirty_names.discard(evicted_name)
+                self.rover_repo.update_rover(evicted_rover)
+
+    def get_rover_by_name(self, rover_name: str, *args, **kwargs) -> 'Rover':
+        """Fetches a rover from cache, or from cached repo on a miss
+
+        Args:
+            rover_name (str): Name of the to look for
+
+        Returns:
+            Rover: Rover object with provided name,
+            None if the provided name cannot be found
+        """
+        with self._lock:
+            rover = self._rovers.get(rover_name)
+            if rover is not None:
+                self.hits += 1
+                self._rovers.move_to_end(rover_name)
+                return rover
+            if rover_name in self._missing_names:
+                self.hits += 1
+                self._missing_names.move_to_end(rover_name)
+                return None
+
+            self.misses += 1
+            rover = self.rover_repo.get_rover_by_name(rover_name)
+            if rover is not None:
+                self._cache_rover(rover_name, rover)
+            else:
+                self._missing_names[rover_name] = None
+                if len(self._missing_names) > self._maxsize:
+                    self._missing_names.popitem(last=False)
+            return rover
+
+    def register_new_rover(self, rover_name: str, new_rover_obj: Rover, *args,
+                           **kwargs):
+        """Registers a new rover into cached repo right away,
+        so its registration order is kept, and caches it.
+
+        Args:
+            rover_name (str): Name of the new rover
+            rover_obj (Rover): New rover obj reference
+        """
+        with self._lock:
+            self.rover_repo.register_new_rover(rover_name, new_rover_obj)
+            self._dirty_names.discard(rover_name)
+            self._cache_rover(rover_name, new_rover_obj)
+
+    def land_new_rover(self, rover_name: str, plateau: Plateau,
+                       landing_x: int, landing_y: int,
+                       orientation: Orientation) -> Rover:
+        """Lands a new rover in cached repo, which creates it in
+        its own form, and caches it.
+
+        Returns:
+            Rover: The new rover
+        """
+        with self._lock:
+            new_rover = self.rover_repo.land_new_rover(
+                rover_name, plateau, landing_x, landing_y, orientation)
+            self._dirty_names.discard(rover_name)
+            self._cache_rover(rover_name, new_rover)
+            return new_rover
+
+    def update_rover(self, rover: Rover, *args, **kwargs):
+        """Marks a cached rover as changed, it is written back
+        on eviction or flush.
+
+        Args:
+            rover (Rover): Rover fetched from this repo
+        """
+        with self._lock:
+            if self._rovers.get(rover.name) is rover:
+                self._dirty_names.add(rover.name)
+            else:
+                self.rover_repo.update_rover(rover)
+
+    def flush(self):
+        """Writes changed rovers back to cached repo."""
+        with self._lock:
+            for rover_name in self._dirty_names:
+                self.rover_repo.update_rover(self._rovers[rover_name])
+            self._dirty_names.clear()
+
+    def iter_rovers(self) -> Iterator[Rover]:
+        """Iterates rovers of cached repo, after writing
+        changed rovers back.
         """
-        for rover in self.rover_registry.values():
-            print(rover.report_status())
+        self.flush()
+        return self.rover_repo.iter_rovers()
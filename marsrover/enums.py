@@ -18,3 +18,14 @@ class RoverInputType(Enum):
     """
     LANDING = "LANDING"
     INSTRUCTIONS = "INSTRUCTIONS"
+
+
+class BlockedMovePolicy(Enum):
+    """Enum class for what a rover does when a move is blocked
+    by a border or another rover.
+    ABORT fails the instruction line, SKIP skips the blocked
+    step and goes on, STOP ignores the rest of the line.
+    """
+    ABORT = "abort"
+    SKIP = "skip"
+    STOP = "stop"
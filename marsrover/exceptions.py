@@ -1,17 +1,23 @@
 class InvalidInputException(Exception):
     """Exception raised for invalid user's input.
     Will record the exact line number of the problematic
-    input.
+    input, and its byte offset when the reader knows it.
     """
     error_template = "Invalid input detected on line {}: \n{}"
+    offset_error_template = (
+        "Invalid input detected on line {} (byte offset {}): \n{}")
 
-    def __init__(self, message, line_number=None):
+    def __init__(self, message, line_number=None, byte_offset=None):
         super().__init__(message)
         self.message = message
         self.line_number = line_number
+        self.byte_offset = byte_offset
 
     def __str__(self):
-        if self.line_number is not None:
+        if self.line_number is not None and self.byte_offset is not None:
+            return self.__class__.offset_error_template.format(
+                self.line_number, self.byte_offset, super().__str__())
+        elif self.line_number is not None:
             return self.__class__.error_template.format(
                 self.line_number, super().__str__())
         else:
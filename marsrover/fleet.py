@@ -0,0 +1,105 @@
+"""Module for compact struct-of-arrays rover fleet storage"""
+import sys
+from array import array
+from typing import Optional
+
+from .enums import Orientation
+from .models import BaseRover, Plateau
+from .programs import ORIENTATION_ORDER
+
+_ORIENTATION_CODES = {
+    orientation: code for code, orientation in enumerate(ORIENTATION_ORDER)}
+
+
+class RoverTable:
+    """Fleet of rovers on one plateau stored column by column.
+    Rover names are interned to integer ids, positions and
+    orientation codes are kept in typed arrays indexed by id.
+    """
+
+    def __init__(self, plateau: Plateau = None):
+        self.plateau = plateau
+        self._ids = {}
+        self._names = []
+        self._xs = array('q')
+        self._ys = array('q')
+        self._orientation_codes = array('b')
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, name: str, x: int, y: int,
+            orientation: Orientation) -> int:
+        """Adds a new rover to the table.
+
+        Args:
+            name (str): Name of the new rover
+            x (int): Current x coordinate
+            y (int): Current y coordinate
+            orientation (Orientation): Current orientation
+
+        Returns:
+            int: Id of the new rover
+        """
+        rover_id = len(self._names)
+        name = sys.intern(name)
+        self._ids[name] = rover_id
+        self._names.append(name)
+        self._xs.append(x)
+        self._ys.append(y)
+        self._orientation_codes.append(_ORIENTATION_CODES[orientation])
+        return rover_id
+
+    def get_id(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def view(self, rover_id: int) -> 'RoverView':
+        return RoverView(self, rover_id)
+
+
+class RoverView(BaseRover):
+    """Rover API on top of one row of a RoverTable.
+    Views only hold their table and row id, so they
+    can be created and dropped freely.
+    """
+    __slots__ = ("_table", "_id")
+
+    def __init__(self, table: RoverTable, rover_id: int):
+        self._table = table
+        self._id = rover_id
+
+    @property
+    def rover_id(self):
+        return self._id
+
+    @property
+    def plateau(self):
+        return self._table.plateau
+
+    @property
+    def name(self):
+        return self._table._names[self._id]
+
+    @property
+    def current_x(self):
+        return self._table._xs[self._id]
+
+    @current_x.setter
+    def current_x(self, value):
+        self._table._xs[self._id] = value
+
+    @property
+    def current_y(self):
+        return self._table._ys[self._id]
+
+    @current_y.setter
+    def current_y(self, value):
+        self._table._ys[self._id] = value
+
+    @property
+    def current_orientation(self):
+        return ORIENTATION_ORDER[self._table._orientation_codes[self._id]]
+
+    @current_orientation.setter
+    def current_orientation(self, value):
+        self._table._orientation_codes[self._id] = _ORIENTATION_CODES[value]
@@ -0,0 +1,192 @@
+"""Module for following a mission file as lines are appended to it"""
+import os
+import time
+from typing import Iterator, List, NamedTuple, Optional
+
+from .constants import FOLLOW_POLL_SECONDS, FOLLOW_READ_SIZE
+from .database import RoverRepo
+from .exceptions import InvalidInputException, InvalidRoverOperationException
+from .missions import Mission
+from .models import DEFAULT_PLATEAU_SETTINGS, PlateauSettings
+from .parsers import PlateauInputTextParser
+from .tokenizer import tokenize_rover_input_line
+
+_NEW_LINE = b"\n"
+_CARRIAGE_RETURN_NEW_LINE = b"\r\n"
+
+
+class FollowUpdate(NamedTuple):
+    """Outcome of the lines appended since the previous update"""
+    reports: List[str]
+    errors: List[Exception]
+
+
+class MissionFollower:
+    """Runs a mission file incrementally. Plateau and rovers stay in
+    memory between polls, and each poll only reads bytes appended
+    since the previous one. A line is run once its line ending has
+    been written, so partly written lines wait for the next poll.
+    A mission file that is truncated or replaced stops following,
+    as its lines no longer continue the mission in memory.
+    """
+
+    def __init__(self, input_path: str, rover_repo: RoverRepo,
+                 encoding: str = "utf-8",
+                 plateau_settings: PlateauSettings =
+                 DEFAULT_PLATEAU_SETTINGS):
+        self._input_path = input_path
+        self._input_file = open(input_path, "rb")
+        self._rover_repo = rover_repo
+        self._encoding = encoding
+        self._plateau_settings = plateau_settings
+        self._pending_bytes = b""
+        self._pending_offset = 0
+        self.mission: Optional[Mission] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._input_file.close()
+
+    def _check_input_file(self):
+        """Checks the followed file still continues the bytes read.
+
+        Raises:
+            InvalidInputException: If the file has been truncated below
+            the bytes already read, or replaced by another file
+        """
+        read_offset = self._pending_offset + len(self._pending_bytes)
+        input_stat = os.fstat(self._input_file.fileno())
+        if input_stat.st_size < read_offset:
+            raise InvalidInputException(
+                f"Input file was truncated to {input_stat.st_size} bytes "
+                f"after {read_offset} bytes were read")
+        try:
+            path_stat = os.stat(self._input_path)
+        except FileNotFoundError:
+            # Rotated away, a replacement may not exist yet
+            return
+        if (path_stat.st_dev, path_stat.st_ino) != \
+                (input_stat.st_dev, input_stat.st_ino):
+            raise InvalidInputException(
+                f"Input file {self._input_path} was replaced")
+
+    def _read_lines(self) -> Iterator[tuple]:
+        """Reads appended bytes and splits complete lines out of them.
+
+        Raises:
+            InvalidInputException: If the file has been truncated or
+            replaced
+
+        Yields:
+            Tuple[int, str]: Byte offset and decoded line, with
+            "\\r\\n" translated into "\\n"
+        """
+        self._check_input_file()
+        while True:
+            appended_bytes = self._input_file.read(FOLLOW_READ_SIZE)
+            if not appended_bytes:
+                return
+
+            pending_bytes = self._pending_bytes + appended_bytes
+            start = 0
+            end = pending_bytes.find(_NEW_LINE)
+            while end >= 0:
+                raw_line = pending_bytes[start:end + 1]
+                if raw_line.endswith(_CARRIAGE_RETURN_NEW_LINE):
+                    raw_line = raw_line[:-2] + _NEW_LINE
+                yield self._pending_offset + start, raw_line.decode(
+                    self._encoding)
+                start = end + 1
+                end = pending_bytes.find(_NEW_LINE, start)
+
+            self._pending_bytes = pending_bytes[start:]
+            self._pending_offset += start
+
+    def poll(self) -> FollowUpdate:
+        """Runs complete lines appended since the previous poll.
+        A failing line is reported and following goes on, moves it
+        made before failing are kept and the rover occupies the cell
+        it stopped on.
+
+        Raises:
+            InvalidInputException: If plateau configuration is invalid,
+            or the file has been truncated or replaced
+
+        Returns:
+            FollowUpdate: Reports of rovers whose state changed, in
+            the order they first changed, and errors of failing lines
+        """
+        changed_rover_names = {}
+        errors = []
+        for byte_offset, line in self._read_lines():
+            if self.mission is None:
+                try:
+                    plateau = PlateauInputTextParser(
+                        settings=self._plateau_settings).parse_input_line(line)
+                except InvalidInputException as invalid_input_ex:
+                    raise InvalidInputException(
+                        invalid_input_ex.message, 1, byte_offset)
+                self.mission = Mission(plateau, self._rover_repo)
+                continue
+
+            try:
+                record = self.mission.run_line(line)
+                # Parsers skip lines without a name or payload
+                if record.name and record.payload:
+                    changed_rover_names[record.name] = None
+            except InvalidInputException as invalid_input_ex:
+                errors.append(InvalidInputException(
+                    invalid_input_ex.message, self.mission.line_number,
+                    byte_offset))
+                # Rover may have moved before an unknown instruction
+                try:
+                    changed_rover_names[
+                        tokenize_rover_input_line(line).name] = None
+                except InvalidInputException:
+                    pass
+            except InvalidRoverOperationException as invalid_operation_ex:
+                errors.append(InvalidInputException(
+                    str(invalid_operation_ex), self.mission.line_number,
+                    byte_offset))
+                # Rover moved before it was blocked
+                changed_rover_names[invalid_operation_ex.rover_name] = None
+
+        reports = []
+        for rover_name in changed_rover_names:
+            rover = self._rover_repo.get_rover_by_name(rover_name)
+            if rover:
+                reports.append(rover.report_status())
+        return FollowUpdate(reports, errors)
+
+
+def follow_mission(input_path: str, rover_repo: RoverRepo,
+                   poll_seconds: float = FOLLOW_POLL_SECONDS,
+                   plateau_settings: PlateauSettings =
+                   DEFAULT_PLATEAU_SETTINGS) -> Iterator[FollowUpdate]:
+    """Follows a mission file until the caller stops iterating.
+
+    Args:
+        input_path (str): Path to the mission input file
+        rover_repo (RoverRepo): Repository to register rovers into
+        poll_seconds (float, optional): Seconds to wait when no new
+        line has been appended
+        plateau_settings (PlateauSettings, optional): Occupancy and
+        blocked move settings of the mission's plateau
+
+    Yields:
+        FollowUpdate: Update for each batch of appended lines
+        changing any rover or failing
+    """
+    with MissionFollower(input_path, rover_repo,
+                         plateau_settings=plateau_settings) as follower:
+        while True:
+            update = follower.poll()
+            if update.reports or update.errors:
+                yield update
+            else:
+                time.sleep(poll_seconds)
@@ -0,0 +1,261 @@
+"""Module for generating synthetic missions for load testing
+
+Usage: python3 -m marsrover.gen --rovers N [options] --output PATH
+           [--expected PATH]
+
+Missions are collision free by construction: the plateau is cut into
+lanes of a few cells along each row and every rover owns one lane.
+A rover lands at the west end of its lane facing west, and each of
+its instruction lines either drives it to the other end of its lane
+or only turns it in place. Output is streamed line by line, the only
+state kept is one bit per rover telling which end of its lane it is
+at, so the expected report can be written without running a mission.
+"""
+import argparse
+import random
+import sys
+from typing import Iterator, List, Optional, TextIO
+
+LENGTH_DISTRIBUTIONS = ("fixed", "uniform", "exponential")
+INTERLEAVINGS = ("grouped", "mixed")
+
+# Lines written at once to the output
+_WRITE_BATCH_SIZE = 4096
+
+
+def build_lane_trip(rng: random.Random, length: int, run: int) -> str:
+    """Builds an instruction string for a rover at one end of a lane
+    of `run` cells past its own, facing away from it. The rover
+    drives to the other end, bounces between there and the cell next
+    to its start, and ends at the other end facing away from the
+    lane, so the same kind of string drives it back. Its start cell,
+    occupied by itself, is never stepped on. The string is at most
+    `length` long unless shorter than one crossing, an odd leftover
+    is dropped.
+    """
+    head = "RR" + "M" * run
+    bounce = ("RR" + "M" * (run - 1)) * 2
+    commands = head + bounce * max(0, (length - len(head)) // len(bounce))
+
+    # A block of no-op turn pairs at a random place makes strings differ
+    split = rng.randrange(len(commands) + 1)
+    no_op = rng.choice(("LR", "RL")) * ((length - len(commands)) // 2)
+    return commands[:split] + no_op + commands[split:]
+
+
+class MissionGenerator:
+    """Deterministic synthetic mission for a seed and parameters.
+
+    Args:
+        rover_count (int): Number of rovers to land
+        max_x (int, optional): Plateau upper x coordinate
+        max_y (int, optional): Plateau upper y coordinate, by default
+        just large enough for every rover's lane
+        lane_length (int, optional): Cells of each rover's lane
+        lines_per_rover (int, optional): Average number of
+        instruction lines per rover
+        length (int, optional): Average instruction string length
+        length_distribution (str, optional): One of fixed, uniform
+        or exponential
+        interleaving (str, optional): grouped lands every rover
+        first, mixed spreads landings among instruction lines
+        invalid_fraction (float, optional): Fraction of lines which
+        are deliberately invalid without changing any rover
+        seed (int, optional): Random seed
+
+    Raises:
+        ValueError: If the rovers' lanes do not fit on the plateau
+    """
+
+    def __init__(self, rover_count: int, max_x: int = 999,
+                 max_y: Optional[int] = None, lane_length: int = 4,
+                 lines_per_rover: int = 10, length: int = 20,
+                 length_distribution: str = "fixed",
+                 interleaving: str = "grouped",
+                 invalid_fraction: float = 0.0, seed: int = 0):
+        if lane_length < 2 or lane_length > max_x + 1:
+            raise ValueError(f"Invalid lane length: {lane_length}")
+        if length_distribution not in LENGTH_DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown length distribution: {length_distribution}")
+        if interleaving not in INTERLEAVINGS:
+            raise ValueError(f"Unknown interleaving: {interleaving}")
+
+        self._lanes_per_row = (max_x + 1) // lane_length
+        rows = -(-rover_count // self._lanes_per_row)
+        if max_y is None:
+            max_y = max(0, rows - 1)
+        if rows > max_y + 1:
+            raise ValueError(
+                f"{rover_count} lanes of {lane_length} cells do not fit "
+                f"on a {max_x + 1}x{max_y + 1} plateau")
+
+        self.rover_count = rover_count
+        self.max_x = max_x
+        self.max_y = max_y
+        self._lane_length = lane_length
+        self._lines_per_rover = lines_per_rover
+        self._length = length
+        self._length_distribution = length_distribution
+        self._interleaving = interleaving
+        self._invalid_fraction = invalid_fraction
+        self._seed = seed
+        # Whether each rover is at the east end of its lane
+        self._at_east_end = bytearray(rover_count)
+
+    def _lane_start(self, rover_id: int):
+        row, lane = divmod(rover_id, self._lanes_per_row)
+        return lane * self._lane_length, row
+
+    def _sample_length(self, rng: random.Random) -> int:
+        if self._length_distribution == "uniform":
+            return rng.randint(1, 2 * self._length - 1)
+        if self._length_distribution == "exponential":
+            return int(rng.expovariate(1 / self._length)) + 1
+        return self._length
+
+    def _instructions_line(self, rng: random.Random, rover_id: int) -> str:
+        run = self._lane_length - 1
+        length = self._sample_length(rng)
+        if length >= run + 2:
+            commands = build_lane_trip(rng, length, run)
+            self._at_east_end[rover_id] ^= 1
+        else:
+            # Too short to cross the lane, only turns in place
+            commands = rng.choice(("LR", "RL")) * max(1, length // 2)
+        return f"Rover{rover_id} Instructions:{commands}"
+
+    def _invalid_line(self, rng: random.Random) -> str:
+        kind = rng.randrange(3)
+        if kind == 0:
+            return f"Rover{rng.randrange(self.rover_count)} Hover:1 2 N"
+        if kind == 1:
+            return f"Ghost{rng.randrange(self.rover_count)} Instructions:M"
+        return f"Ghost{rng.randrange(self.rover_count)} Landing:0 0 Q"
+
+    def iter_lines(self) -> Iterator[str]:
+        """Generates mission input lines, without line endings.
+        Invalid lines are skipped in the expected report, so
+        missions with them only match it when run keeping going
+        after errors.
+        """
+        rng = random.Random(self._seed)
+        self._at_east_end = bytearray(self.rover_count)
+        yield f"Plateau:{self.max_x} {self.max_y}"
+
+        landed_count = 0
+        instructions_left = self.rover_count * self._lines_per_rover
+        while landed_count < self.rover_count or instructions_left:
+            if self._invalid_fraction and \
+                    rng.random() < self._invalid_fraction:
+                yield self._invalid_line(rng)
+                continue
+
+            if self._interleaving == "grouped":
+                land = landed_count < self.rover_count
+            else:
+                # Lands rovers at the rate that spreads them evenly
+                landings_left = self.rover_count - landed_count
+                land = not landed_count or rng.random() < landings_left / (
+                    landings_left + instructions_left)
+
+            if land:
+                x, y = self._lane_start(landed_count)
+                yield f"Rover{landed_count} Landing:{x} {y} W"
+                landed_count += 1
+            else:
+                yield self._instructions_line(
+                    rng, rng.randrange(landed_count))
+                instructions_left -= 1
+
+    def iter_expected_report(self) -> Iterator[str]:
+        """Generates the report of the mission, to be called
+        after iter_lines has been exhausted.
+        """
+        for rover_id in range(self.rover_count):
+            x, y = self._lane_start(rover_id)
+            if self._at_east_end[rover_id]:
+                yield f"Rover{rover_id}:{x + self._lane_length - 1} {y} E"
+            else:
+                yield f"Rover{rover_id}:{x} {y} W"
+
+
+def _write_lines(lines: Iterator[str], output: TextIO):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= _WRITE_BATCH_SIZE:
+            output.write("\n".join(batch) + "\n")
+            batch = []
+    if batch:
+        output.write("\n".join(batch) + "\n")
+
+
+def write_mission(generator: MissionGenerator, output: TextIO,
+                  expected_output: TextIO = None):
+    """Streams a generated mission, and optionally its expected
+    report, to text outputs.
+    """
+    _write_lines(generator.iter_lines(), output)
+    if expected_output is not None:
+        _write_lines(generator.iter_expected_report(), expected_output)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        prog="python3 -m marsrover.gen",
+        description="Generates a deterministic collision free mission.")
+    parser.add_argument("--rovers", type=int, required=True,
+                        help="number of rovers")
+    parser.add_argument("--max-x", type=int, default=999,
+                        help="plateau upper x coordinate, defaults to 999")
+    parser.add_argument("--max-y", type=int,
+                        help="plateau upper y coordinate, defaults to "
+                             "the least fitting every rover")
+    parser.add_argument("--lane-length", type=int, default=4,
+                        help="cells each rover drives along, defaults to 4")
+    parser.add_argument("--lines-per-rover", type=int, default=10,
+                        help="instruction lines per rover, defaults to 10")
+    parser.add_argument("--length", type=int, default=20,
+                        help="mean instruction length, defaults to 20")
+    parser.add_argument("--length-distribution", default="fixed",
+                        choices=LENGTH_DISTRIBUTIONS,
+                        help="instruction length distribution")
+    parser.add_argument("--interleaving", default="grouped",
+                        choices=INTERLEAVINGS,
+                        help="grouped lands every rover first, mixed "
+                             "spreads landings among instructions")
+    parser.add_argument("--invalid-fraction", type=float, default=0.0,
+                        help="fraction of deliberately invalid lines")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--output", metavar="PATH",
+                        help="mission output path, defaults to stdout")
+    parser.add_argument("--expected", metavar="PATH",
+                        help="writes the expected report to PATH")
+    arguments = parser.parse_args(argv)
+
+    try:
+        generator = MissionGenerator(
+            arguments.rovers, arguments.max_x, arguments.max_y,
+            arguments.lane_length, arguments.lines_per_rover,
+            arguments.length, arguments.length_distribution,
+            arguments.interleaving, arguments.invalid_fraction,
+            arguments.seed)
+    except ValueError as ex:
+        parser.error(str(ex))
+
+    output = (open(arguments.output, "w", buffering=1 << 20)
+              if arguments.output else sys.stdout)
+    expected_output = (open(arguments.expected, "w", buffering=1 << 20)
+                       if arguments.expected else None)
+    try:
+        write_mission(generator, output, expected_output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if expected_output is not None:
+            expected_output.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,688 @@
+"""Module for append-only move journals and point-in-time queries
+
+Usage: python3 -m marsrover.journal journal_path --rover NAME
+           (--batch N | --line N)
+       python3 -m marsrover.journal journal_path --cell X Y --line N
+
+A journal holds the state of a rover after every landing and every
+instructions line run for it. Lines failing partway, whose moves made
+before the failure are kept, are journaled as failed states, so the
+journal always agrees with the rover repository while batches only
+count completed lines. All integers are little endian:
+
+- header: magic b"MRJN", version (uint8), plateau max x and max y
+  (int64), plateau name length (uint16) and UTF-8 plateau name
+- records, starting with their type (uint8):
+  - 0, rover name: rover id (uint32), name length (uint16) and UTF-8
+    name, written before the first state of a rover, ids count from 0
+  - 1, rover state: line number (int64), rover id (uint32), batch
+    (uint32), 0 for the landing and n after the n-th completed
+    instructions line, byte offset of the previous state of the rover
+    (int64, -1 for the landing), x and y (int64) and orientation code
+    (uint8), 0 for E, 1 for S, 2 for W and 3 for N
+  - 3, failed state: same fields as a rover state, after a failing
+    instructions line, batch is that of the last completed line
+  - 2, keyframe: line number (int64) and rover count (uint32), then
+    x (int64), y (int64) and orientation code (uint8) arrays of
+    every rover by id, written every N states
+
+The index, written next to the journal with an .idx suffix when it is
+closed, keeps offsets of keyframes and, for each rover, of its latest
+state and of every INDEX_EVERY-th state, failed states included:
+
+- header: magic b"MRJI", index version (uint8), INDEX_EVERY (uint32),
+  journal size (uint64) and keyframe count (uint32), then keyframe
+  offsets (uint64)
+- rover count (uint32), then for each rover by id: name length
+  (uint16), latest state offset (int64), indexed state count
+  (uint32), UTF-8 name and indexed state offsets (uint64)
+
+A rover's state at a batch or line is found from the nearest indexed
+state after it, following at most INDEX_EVERY previous state offsets
+back. A fleet's state at a line is rebuilt from the nearest keyframe
+before it, replaying only the records after it, and the replay is kept
+for following queries in the same keyframe segment. Journals without a
+matching index, such as those of an interrupted mission, are indexed
+by a scan.
+"""
+import argparse
+import bisect
+import mmap
+import os
+import struct
+from array import array
+from typing import (TYPE_CHECKING, Dict, Iterator, List, NamedTuple,
+                    Optional, Tuple)
+
+from .constants import (JOURNAL_INDEX_EVERY, JOURNAL_KEYFRAME_EVERY,
+                        JOURNAL_WRITE_BUFFER_SIZE)
+from .enums import Orientation
+from .exceptions import InvalidInputException
+from .models import Rover
+from .programs import ORIENTATION_ORDER
+
+if TYPE_CHECKING:
+    from .missions import Mission
+
+JOURNAL_MAGIC = b"MRJN"
+JOURNAL_INDEX_MAGIC = b"MRJI"
+JOURNAL_VERSION = 1
+# Version 1 indexes only held completed states
+JOURNAL_INDEX_VERSION = 2
+JOURNAL_INDEX_SUFFIX = ".idx"
+
+_HEADER = struct.Struct("<4sBqqH")
+_NAME = struct.Struct("<BIH")
+_STATE = struct.Struct("<BqIIqqqB")
+_KEYFRAME = struct.Struct("<BqI")
+_INDEX_HEADER = struct.Struct("<4sBIQI")
+_INDEX_ROVER = struct.Struct("<HqI")
+_COUNT = struct.Struct("<I")
+
+_NAME_RECORD = 0
+_STATE_RECORD = 1
+_KEYFRAME_RECORD = 2
+_FAILED_STATE_RECORD = 3
+
+_ORIENTATION_CODES = {orientation: code for code, orientation
+                      in enumerate(ORIENTATION_ORDER)}
+
+
+class JournalEntry(NamedTuple):
+    """State of a rover after a journaled line, failed if the line
+    failed after some of its moves
+    """
+    line_number: int
+    batch: int
+    x: int
+    y: int
+    orientation: Orientation
+    failed: bool = False
+
+
+class MoveJournalWriter:
+    """Appends rover states of a running mission to a journal file,
+    through a write buffer.
+
+    Args:
+        path (str): Path to the new journal file, its index is
+        written to path + .idx when closed
+        keyframe_every (int, optional): Number of rover states
+        between keyframes
+
+    Raises:
+        InvalidInputException: If the file at path already exists,
+        it is never overwritten
+    """
+
+    def __init__(self, path: str,
+                 keyframe_every: int = JOURNAL_KEYFRAME_EVERY):
+        self.path = path
+        self._keyframe_every = keyframe_every
+        try:
+            self._file = open(path, "xb")
+        except FileExistsError:
+            raise InvalidInputException(
+                f"Journal file already exists: {path}")
+        self._buffer = bytearray()
+        self._offset = 0
+        self._mission = None
+        self._states_since_keyframe = 0
+
+        self._rover_ids = {}
+        self._names = []
+        self._xs = array("q")
+        self._ys = array("q")
+        self._orientation_codes = bytearray()
+        self._batches = array("I")
+        self._state_counts = array("I")
+        self._latest_offsets = array("q")
+        # Offsets of every INDEX_EVERY-th state, only for rovers with
+        # that many states
+        self._indexed_offsets = {}
+        self._keyframe_offsets = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self, mission: 'Mission'):
+        """Writes the journal header, rover states are then journaled
+        at the mission's line number.
+
+        Args:
+            mission (Mission): Mission about to run its rover lines
+        """
+        self._mission = mission
+        plateau_name = mission.plateau.name.encode()
+        self._append(_HEADER.pack(
+            JOURNAL_MAGIC, JOURNAL_VERSION, mission.plateau.max_x,
+            mission.plateau.max_y, len(plateau_name)) + plateau_name)
+
+    def _append(self, record: bytes):
+        self._buffer += record
+        self._offset += len(record)
+        if len(self._buffer) >= JOURNAL_WRITE_BUFFER_SIZE:
+            self._flush()
+
+    def _flush(self):
+        self._file.write(self._buffer)
+        self._buffer.clear()
+
+    def append_rover(self, rover: Rover, completed: bool = True):
+        """Journals the current state of a rover, a landing the first
+        time the rover is seen.
+
+        Args:
+            rover (Rover): Rover which has just landed or run a line
+            completed (bool, optional): False if the line failed,
+            which does not count as a batch
+        """
+        rover_id = self._rover_ids.get(rover.name)
+        if rover_id is None:
+            rover_id = self._rover_ids[rover.name] = len(self._names)
+            self._names.append(rover.name)
+            encoded_name = rover.name.encode()
+            self._append(_NAME.pack(_NAME_RECORD, rover_id,
+                                    len(encoded_name)) + encoded_name)
+            self._xs.append(0)
+            self._ys.append(0)
+            self._orientation_codes.append(0)
+            self._batches.append(0)
+            self._state_counts.append(0)
+            self._latest_offsets.append(-1)
+            batch = 0
+        elif completed:
+            batch = self._batches[rover_id] = self._batches[rover_id] + 1
+        else:
+            batch = self._batches[rover_id]
+
+        x = self._xs[rover_id] = rover.current_x
+        y = self._ys[rover_id] = rover.current_y
+        orientation_code = self._orientation_codes[rover_id] = \
+            _ORIENTATION_CODES[rover.current_orientation]
+        # States are appended inline, there is one per rover line
+        offset = self._offset
+        self._buffer += _STATE.pack(
+            _STATE_RECORD if completed else _FAILED_STATE_RECORD,
+            self._mission.line_number, rover_id, batch,
+            self._latest_offsets[rover_id], x, y, orientation_code)
+        self._offset = offset + _STATE.size
+        if len(self._buffer) >= JOURNAL_WRITE_BUFFER_SIZE:
+            self._flush()
+        self._latest_offsets[rover_id] = offset
+        state_count = self._state_counts[rover_id] = \
+            self._state_counts[rover_id] + 1
+        if not state_count % JOURNAL_INDEX_EVERY:
+            self._indexed_offsets.setdefault(rover_id, []).append(offset)
+
+        self._states_since_keyframe += 1
+        if self._states_since_keyframe >= self._keyframe_every:
+            self._append_keyframe()
+
+    def _append_keyframe(self):
+        self._keyframe_offsets.append(self._offset)
+        self._append(_KEYFRAME.pack(
+            _KEYFRAME_RECORD, self._mission.line_number, len(self._names))
+            + self._xs.tobytes() + self._ys.tobytes()
+            + self._orientation_codes)
+        self._states_since_keyframe = 0
+
+    def close(self):
+        """Flushes the journal and writes its index."""
+        if self._file is None:
+            return
+        self._flush()
+        self._file.close()
+        self._file = None
+
+        rover_index = _JournalIndex(
+            self._keyframe_offsets, self._names, self._latest_offsets,
+            [self._indexed_offsets.get(rover_id, [])
+             for rover_id in range(len(self._names))])
+        rover_index.write(self.path + JOURNAL_INDEX_SUFFIX, self._offset)
+
+
+class _JournalIndex:
+    """Keyframe offsets and sparse per rover state offsets"""
+
+    def __init__(self, keyframe_offsets: List[int], names: List[str],
+                 latest_offsets: array, indexed_offsets: List[List[int]]):
+        self.keyframe_offsets = keyframe_offsets
+        self.names = names
+        self.rover_ids = {name: rover_id
+                          for rover_id, name in enumerate(names)}
+        self.latest_offsets = latest_offsets
+        self.indexed_offsets = indexed_offsets
+
+    def write(self, path: str, journal_size: int):
+        buffer = bytearray(_INDEX_HEADER.pack(
+            JOURNAL_INDEX_MAGIC, JOURNAL_INDEX_VERSION, JOURNAL_INDEX_EVERY,
+            journal_size, len(self.keyframe_offsets)))
+        buffer += array("Q", self.keyframe_offsets).tobytes()
+        buffer += _COUNT.pack(len(self.names))
+        for name, latest_offset, indexed_offsets in zip(
+                self.names, self.latest_offsets, self.indexed_offsets):
+            encoded_name = name.encode()
+            buffer += _INDEX_ROVER.pack(len(encoded_name), latest_offset,
+                                        len(indexed_offsets))
+            buffer += encoded_name
+            buffer += array("Q", indexed_offsets).tobytes()
+        with open(path, "wb") as index_file:
+            index_file.write(buffer)
+
+    @classmethod
+    def read(cls, path: str, journal_size: int) -> Optional['_JournalIndex']:
+        """Reads an index, None if it is missing, corrupted or
+        does not match the journal.
+        """
+        try:
+            with open(path, "rb") as index_file:
+                data = index_file.read()
+            magic, version, index_every, indexed_size, keyframe_count = \
+                _INDEX_HEADER.unpack_from(data)
+            if (magic != JOURNAL_INDEX_MAGIC
+                    or version != JOURNAL_INDEX_VERSION
+                    or index_every != JOURNAL_INDEX_EVERY
+                    or indexed_size != journal_size):
+                return None
+
+            offset = _INDEX_HEADER.size
+            keyframe_offsets = array("Q")
+            keyframe_offsets.frombytes(
+                data[offset:offset + 8 * keyframe_count])
+            offset += 8 * keyframe_count
+            rover_count, = _COUNT.unpack_from(data, offset)
+            offset += _COUNT.size
+
+            names = []
+            latest_offsets = array("q")
+            indexed_offsets = []
+            for _ in range(rover_count):
+                name_length, latest_offset, indexed_count = \
+                    _INDEX_ROVER.unpack_from(data, offset)
+                offset += _INDEX_ROVER.size
+                names.append(data[offset:offset + name_length].decode())
+                offset += name_length
+                rover_offsets = array("Q")
+                rover_offsets.frombytes(
+                    data[offset:offset + 8 * indexed_count])
+                offset += 8 * indexed_count
+                latest_offsets.append(latest_offset)
+                indexed_offsets.append(rover_offsets.tolist())
+        except (OSError, ValueError, struct.error):
+            return None
+        return cls(keyframe_offsets.tolist(), names, latest_offsets,
+                   indexed_offsets)
+
+
+class _FleetReplay:
+    """Fleet replayed from a keyframe up to a line, continued by
+    queries at later lines of the same keyframe segment
+    """
+
+    def __init__(self, keyframe: int, offset: int):
+        self.keyframe = keyframe
+        self.offset = offset
+        # Nothing after the keyframe has been replayed yet
+        self.line_number = -1
+        self.xs = array("q")
+        self.ys = array("q")
+        self.orientation_codes = bytearray()
+        # Rover name by location, built on the first cell query
+        self.occupants: Optional[Dict[Tuple[int, int], str]] = None
+
+
+class MoveJournalReader:
+    """Read-only journal mapped into memory, answering point-in-time
+    queries about rovers and plateau cells.
+
+    Args:
+        path (str): Path to the journal file
+
+    Raises:
+        InvalidInputException: If the file is not a journal of a
+        supported version
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as raw_file:
+            try:
+                self._map = mmap.mmap(
+                    raw_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                raise InvalidInputException(f"Not a journal file: {path}")
+
+        try:
+            magic, version, self.max_x, self.max_y, name_length = \
+                _HEADER.unpack_from(self._map)
+            if magic != JOURNAL_MAGIC:
+                raise InvalidInputException(f"Not a journal file: {path}")
+            if version != JOURNAL_VERSION:
+                raise InvalidInputException(
+                    f"Unsupported journal version: {version}")
+            self._records_start = _HEADER.size + name_length
+            self.plateau_name = self._map[
+                _HEADER.size:self._records_start].decode()
+
+            self._index = (_JournalIndex.read(path + JOURNAL_INDEX_SUFFIX,
+                                              len(self._map))
+                           or self._scan_index())
+        except (struct.error, UnicodeDecodeError):
+            self.close()
+            raise InvalidInputException(f"Corrupted journal file: {path}")
+        except InvalidInputException:
+            self.close()
+            raise
+        self._keyframe_lines = [
+            _KEYFRAME.unpack_from(self._map, offset)[1]
+            for offset in self._index.keyframe_offsets]
+        self._replay: Optional[_FleetReplay] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    @property
+    def rover_names(self) -> List[str]:
+        """Names of journaled rovers in landing order"""
+        return self._index.names
+
+    def _iter_records(self, offset: int) -> Iterator[Tuple[int, int, tuple]]:
+        """Decodes records from an offset to the end of the journal.
+
+        Yields:
+            Tuple: Byte offset of the record, its type, and its fields,
+            a truncated last record ends the journal
+        """
+        journal_map = self._map
+        journal_end = len(journal_map)
+        while offset < journal_end:
+            record_offset = offset
+            record_type = journal_map[offset]
+            if record_type in (_STATE_RECORD, _FAILED_STATE_RECORD):
+                if offset + _STATE.size > journal_end:
+                    return
+                fields = _STATE.unpack_from(journal_map, offset)
+                offset += _STATE.size
+            elif record_type == _NAME_RECORD:
+                if offset + _NAME.size > journal_end:
+                    return
+                _, rover_id, name_length = _NAME.unpack_from(
+                    journal_map, offset)
+                offset += _NAME.size + name_length
+                if offset > journal_end:
+                    return
+                fields = (rover_id, journal_map[
+                    offset - name_length:offset].decode())
+            elif record_type == _KEYFRAME_RECORD:
+                if offset + _KEYFRAME.size > journal_end:
+                    return
+                _, line_number, rover_count = _KEYFRAME.unpack_from(
+                    journal_map, offset)
+                offset += _KEYFRAME.size + 17 * rover_count
+                if offset > journal_end:
+                    return
+                fields = (line_number, rover_count)
+            else:
+                raise InvalidInputException(
+                    "Corrupted journal record", None, record_offset)
+            yield record_offset, record_type, fields
+
+    def _scan_index(self) -> _JournalIndex:
+        keyframe_offsets = []
+        names = []
+        latest_offsets = array("q")
+        state_counts = array("I")
+        indexed_offsets = []
+        for offset, record_type, fields in self._iter_records(
+                self._records_start):
+            if record_type in (_STATE_RECORD, _FAILED_STATE_RECORD):
+                rover_id = fields[2]
+                latest_offsets[rover_id] = offset
+                state_counts[rover_id] += 1
+                if not state_counts[rover_id] % JOURNAL_INDEX_EVERY:
+                    indexed_offsets[rover_id].append(offset)
+            elif record_type == _NAME_RECORD:
+                names.append(fields[1])
+                latest_offsets.append(-1)
+                state_counts.append(0)
+                indexed_offsets.append([])
+            else:
+                keyframe_offsets.append(offset)
+        return _JournalIndex(keyframe_offsets, names, latest_offsets,
+                             indexed_offsets)
+
+    def _read_state(self, offset: int) -> Tuple[int, int, int, int, int,
+                                                int, int, int]:
+        """Record type, line number, rover id, batch, previous offset,
+        x, y and orientation code of the state at offset
+        """
+        return _STATE.unpack_from(self._map, offset)
+
+    @staticmethod
+    def _entry(state: tuple) -> JournalEntry:
+        record_type, line_number, _, batch, _, x, y, orientation_code = \
+            state
+        return JournalEntry(line_number, batch, x, y,
+                            ORIENTATION_ORDER[orientation_code],
+                            record_type == _FAILED_STATE_RECORD)
+
+    def _rover_id(self, rover_name: str) -> int:
+        rover_id = self._index.rover_ids.get(rover_name)
+        if rover_id is None or self._index.latest_offsets[rover_id] < 0:
+            raise InvalidInputException(
+                f"Rover {rover_name} is not in the journal")
+        return rover_id
+
+    def _find_state(self, rover_id: int, is_after) -> Optional[tuple]:
+        """Latest state of a rover is_after is False for, None if there
+        is none. is_after must hold for every state following one it
+        holds for. The walk back starts from the first indexed state
+        is_after holds for, so at most INDEX_EVERY states are read.
+        """
+        # Indexed states then the latest, in journal order
+        offsets = (self._index.indexed_offsets[rover_id]
+                   + [self._index.latest_offsets[rover_id]])
+        low, high = 0, len(offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if is_after(self._read_state(offsets[middle])):
+                high = middle
+            else:
+                low = middle + 1
+
+        offset = offsets[low]
+        while offset >= 0:
+            state = self._read_state(offset)
+            if not is_after(state):
+                return state
+            offset = state[4]
+        return None
+
+    def rover_after_batch(self, rover_name: str,
+                          batch: int) -> Optional[JournalEntry]:
+        """State of a rover after a completed instructions line.
+
+        Args:
+            rover_name (str): Rover name(also id)
+            batch (int): 0 for the landing, n after the rover's n-th
+            completed instructions line, failed lines are not counted
+
+        Raises:
+            InvalidInputException: If the rover is not in the journal
+
+        Returns:
+            JournalEntry: State of the rover, None if it has completed
+            fewer instructions lines
+        """
+        # Failed states of a batch follow its completed state
+        state = self._find_state(
+            self._rover_id(rover_name),
+            lambda state: (state[3] > batch or (
+                state[3] == batch and state[0] == _FAILED_STATE_RECORD)))
+        if state is None or state[3] != batch:
+            return None
+        return self._entry(state)
+
+    def rover_at_line(self, rover_name: str,
+                      line_number: int) -> Optional[JournalEntry]:
+        """State of a rover once a line has run.
+
+        Args:
+            rover_name (str): Rover name(also id)
+            line_number (int): Input line number
+
+        Raises:
+            InvalidInputException: If the rover is not in the journal
+
+        Returns:
+            JournalEntry: State of the rover, None if it had not
+            landed yet
+        """
+        state = self._find_state(self._rover_id(rover_name),
+                                 lambda state: state[1] > line_number)
+        return None if state is None else self._entry(state)
+
+    def _start_replay(self, keyframe: int) -> _FleetReplay:
+        if not keyframe:
+            return _FleetReplay(0, self._records_start)
+
+        offset = self._index.keyframe_offsets[keyframe - 1]
+        _, _, rover_count = _KEYFRAME.unpack_from(self._map, offset)
+        offset += _KEYFRAME.size
+        replay = _FleetReplay(keyframe, offset + 17 * rover_count)
+        replay.xs.frombytes(self._map[offset:offset + 8 * rover_count])
+        offset += 8 * rover_count
+        replay.ys.frombytes(self._map[offset:offset + 8 * rover_count])
+        offset += 8 * rover_count
+        replay.orientation_codes += self._map[offset:offset + rover_count]
+        return replay
+
+    def _replay_fleet(self, line_number: int) -> _FleetReplay:
+        """Replays the fleet up to a line, from the nearest keyframe
+        before it or from where the previous replay stopped if that
+        is in the same keyframe segment.
+        """
+        keyframe = bisect.bisect_right(self._keyframe_lines, line_number)
+        replay = self._replay
+        if (replay is None or replay.keyframe != keyframe
+                or replay.line_number > line_number):
+            replay = self._replay = self._start_replay(keyframe)
+
+        xs = replay.xs
+        ys = replay.ys
+        orientation_codes = replay.orientation_codes
+        for offset, record_type, fields in self._iter_records(
+                replay.offset):
+            if record_type in (_STATE_RECORD, _FAILED_STATE_RECORD):
+                state_line, rover_id, _, _, x, y, orientation_code = \
+                    fields[1:]
+                if state_line > line_number:
+                    break
+                if rover_id == len(xs):
+                    xs.append(x)
+                    ys.append(y)
+                    orientation_codes.append(orientation_code)
+                else:
+                    xs[rover_id] = x
+                    ys[rover_id] = y
+                    orientation_codes[rover_id] = orientation_code
+                replay.occupants = None
+        else:
+            offset = len(self._map)
+        replay.offset = offset
+        replay.line_number = line_number
+        return replay
+
+    def fleet_at_line(self, line_number: int) -> Dict[str, Tuple[
+            int, int, Orientation]]:
+        """States of all rovers once a line has run, replayed from
+        the nearest keyframe before the line.
+
+        Args:
+            line_number (int): Input line number
+
+        Returns:
+            Dict[str, Tuple[int, int, Orientation]]: x, y and
+            orientation of each landed rover by name, in landing order
+        """
+        replay = self._replay_fleet(line_number)
+        return {name: (x, y, ORIENTATION_ORDER[orientation_code])
+                for name, x, y, orientation_code
+                in zip(self._index.names, replay.xs, replay.ys,
+                       replay.orientation_codes)}
+
+    def occupant_at_line(self, location: Tuple[int, int],
+                         line_number: int) -> Optional[str]:
+        """Rover on a location once a line has run.
+
+        Args:
+            location (Tuple[int, int]): x and y coordinates
+            line_number (int): Input line number
+
+        Returns:
+            str: Name of the rover, None if the location was free
+        """
+        replay = self._replay_fleet(line_number)
+        if replay.occupants is None:
+            replay.occupants = {}
+            for name, x, y in zip(self._index.names, replay.xs, replay.ys):
+                replay.occupants.setdefault((x, y), name)
+        return replay.occupants.get(tuple(location))
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        prog="python3 -m marsrover.journal",
+        description="Queries rover states recorded in a move journal.")
+    parser.add_argument("journal", help="journal path")
+    subject = parser.add_mutually_exclusive_group(required=True)
+    subject.add_argument("--rover", help="rover name")
+    subject.add_argument("--cell", nargs=2, type=int, metavar=("X", "Y"),
+                         help="plateau location, needs --line")
+    when = parser.add_mutually_exclusive_group(required=True)
+    when.add_argument("--batch", type=int,
+                      help="instructions lines completed, 0 for the "
+                           "landing")
+    when.add_argument("--line", type=int, help="input line number")
+    arguments = parser.parse_args(argv)
+    if arguments.cell and arguments.batch is not None:
+        parser.error("--cell needs --line")
+    if not os.path.isfile(arguments.journal):
+        parser.exit(1, f"Journal file {arguments.journal} does not exist\n")
+
+    try:
+        with MoveJournalReader(arguments.journal) as reader:
+            if arguments.cell:
+                print(reader.occupant_at_line(tuple(arguments.cell),
+                                              arguments.line) or "-")
+                return
+            if arguments.batch is not None:
+                entry = reader.rover_after_batch(arguments.rover,
+                                                 arguments.batch)
+            else:
+                entry = reader.rover_at_line(arguments.rover, arguments.line)
+    except InvalidInputException as invalid_input_ex:
+        parser.exit(1, f"{invalid_input_ex}\n")
+
+    if entry is None:
+        print("-")
+    else:
+        print(f"{arguments.rover}:{entry.x} {entry.y} "
+              f"{entry.orientation.name} line {entry.line_number} "
+              f"batch {entry.batch}{' failed' if entry.failed else ''}")
+
+
+if __name__ == '__main__':
+    main()
@@ -23,4 +23,18 @@ logging_config = {
             "propagate": "no"
         }
     }
-}
\ No newline at end of file
+}
+
+def get_logger():
+    """Returns the application logger. Logging is imported and
+    configured on first use, so runs that log nothing skip both.
+
+    Returns:
+        logging.Logger: Logger of the application
+    """
+    import logging.config
+
+    logger = logging.getLogger("marsrover")
+    if not logger.handlers:
+        logging.config.dictConfig(logging_config)
+    return logger
@@ -0,0 +1,303 @@
+"""Module for run metrics of parse and simulation stages
+
+Metrics are recorded by the Metrics instance a mission is given, which
+is passed to the plateau, parsers, readers and engines of that mission
+only. Each of them wraps its stage functions with Metrics.instrument
+once, when it is created. Missions run without metrics get NULL_METRICS,
+whose instrument returns functions unchanged, so they pay no overhead.
+Stage times are inclusive, the move stage includes the execute and
+collision_check stages run within it. A stage re-entered on the same
+thread is timed and counted once.
+
+Stages:
+
+- parse: running a mission, from first to last line
+- read: reading lines of a mapped input file
+- tokenize: splitting rover input lines, counts each line once
+- land, move: rover landing and instructions parsers
+- execute: BaseRover.execute_move_commands, counts commands
+- collision_check: plateau border and occupancy queries, including
+  the cell lookups of the vectorized engine, counts collision probes,
+  border rejections and collisions
+- repo_lookup: rovers looked up by the parsers, counts repo lookups
+  once however many repos a caching repo passes them on to
+- report: reporting rovers
+"""
+import contextlib
+import functools
+import os
+import threading
+import time
+from typing import Callable, Iterator
+
+from .constants import METRICS_PROMETHEUS_SUFFIX
+
+STAGES = ("parse", "read", "tokenize", "land", "move", "execute",
+          "collision_check", "repo_lookup", "report")
+COUNTERS = ("lines", "commands", "collision_probes", "border_rejections",
+            "collisions", "repo_lookups")
+
+_COUNTER_HELP = {
+    "lines": "Rover input lines tokenized",
+    "commands": "Rover instruction commands executed",
+    "collision_probes": "Plateau border and occupancy queries",
+    "border_rejections": "Moves rejected for crossing a plateau border",
+    "collisions": "Moves rejected for hitting an occupied location",
+    "repo_lookups": "Rovers looked up by name in a rover repo",
+}
+
+_COLLISION_MESSAGE = "Collision detected"
+
+
+class Metrics:
+    """Wall time and call count per stage, and event counters.
+    Updates are locked, so threaded parsers can share one instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Stages running on each thread, nested calls are not counted
+        self._running = threading.local()
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self.stage_calls = dict.fromkeys(STAGES, 0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def add_time(self, stage: str, seconds: float):
+        with self._lock:
+            self.stage_seconds[stage] += seconds
+            self.stage_calls[stage] += 1
+
+    def count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self.counters[counter] += amount
+
+    def count_rejection(self, message: str):
+        """Counts a move rejected with a plateau error message,
+        nothing if message is empty.
+        """
+        if message == _COLLISION_MESSAGE:
+            self.count("collisions")
+        elif message:
+            self.count("border_rejections")
+
+    @contextlib.contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Times the code within a with block as a stage.
+
+        Args:
+            stage (str): Stage name
+        """
+        running = self._running.__dict__
+        if running.get(stage):
+            yield
+            return
+
+        running[stage] = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+            running[stage] = False
+
+    def instrument(self, stage: str, function: Callable,
+                   counter: str = None, on_call: Callable = None,
+                   on_result: Callable = None,
+                   on_error: Callable = None) -> Callable:
+        """Wraps a function to time its calls as a stage.
+
+        Args:
+            stage (str): Stage name
+            function (Callable): Function to wrap, usually a bound
+            method of the object instrumenting itself
+            counter (str, optional): Counter to add one to per call
+            on_call (Callable, optional): Called with the arguments
+            on_result (Callable, optional): Called with the result
+            on_error (Callable, optional): Called with a raised error
+
+        Returns:
+            Callable: Instrumented function
+        """
+        perf_counter = time.perf_counter
+        running_stages = self._running
+
+        @functools.wraps(function)
+        def instrumented(*args, **kwargs):
+            running = running_stages.__dict__
+            if running.get(stage):
+                return function(*args, **kwargs)
+
+            running[stage] = True
+            start = perf_counter()
+            try:
+                if counter:
+                    self.count(counter)
+                if on_call:
+                    on_call(*args)
+                result = function(*args, **kwargs)
+                if on_result:
+                    on_result(result)
+                return result
+            except Exception as ex:
+                if on_error:
+                    on_error(ex)
+                raise
+            finally:
+                self.add_time(stage, perf_counter() - start)
+                running[stage] = False
+
+        return instrumented
+
+    def to_dict(self) -> dict:
+        """Returns a snapshot of the metrics, ready to save as JSON.
+        """
+        with self._lock:
+            return {
+                "stages": {stage: {"seconds": self.stage_seconds[stage],
+                                   "calls": self.stage_calls[stage]}
+                           for stage in STAGES},
+                "counters": dict(self.counters),
+            }
+
+    def to_json(self) -> str:
+        # Every mission imports this module for NULL_METRICS, json is
+        # only needed when metrics are saved
+        import json
+
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Returns a snapshot of the metrics in the Prometheus text
+        exposition format, as read by a node exporter textfile
+        collector.
+        """
+        snapshot = self.to_dict()
+        lines = [
+            "# HELP marsrover_stage_seconds_total Wall time spent in "
+            "each stage, including nested stages",
+            "# TYPE marsrover_stage_seconds_total counter",
+        ]
+        lines.extend(
+            f'marsrover_stage_seconds_total{{stage="{stage}"}} '
+            f'{values["seconds"]!r}'
+            for stage, values in snapshot["stages"].items())
+        lines.extend([
+            "# HELP marsrover_stage_calls_total Calls of each stage",
+            "# TYPE marsrover_stage_calls_total counter",
+        ])
+        lines.extend(
+            f'marsrover_stage_calls_total{{stage="{stage}"}} '
+            f'{values["calls"]}'
+            for stage, values in snapshot["stages"].items())
+        for counter, value in snapshot["counters"].items():
+            lines.extend([
+                f"# HELP marsrover_{counter}_total {_COUNTER_HELP[counter]}",
+                f"# TYPE marsrover_{counter}_total counter",
+                f"marsrover_{counter}_total {value}",
+            ])
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Saves a snapshot of the metrics, in the Prometheus text
+        format if path ends with .prom and as JSON otherwise. The
+        file is replaced at once, so readers never see it half written.
+
+        Args:
+            path (str): Path to the metrics file
+        """
+        if path.endswith(METRICS_PROMETHEUS_SUFFIX):
+            text = self.to_prometheus()
+        else:
+            text = self.to_json()
+
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as metrics_file:
+            metrics_file.write(text)
+        os.replace(temporary_path, path)
+
+
+class NullMetrics:
+    """Recorder of runs without metrics, instrumenting nothing"""
+
+    def count(self, counter: str, amount: int = 1):
+        pass
+
+    def count_rejection(self, message: str):
+        pass
+
+    def stage(self, stage: str):
+        return contextlib.nullcontext()
+
+    def instrument(self, stage: str, function: Callable,
+                   *args, **kwargs) -> Callable:
+        return function
+
+
+NULL_METRICS = NullMetrics()
+
+
+class PeriodicMetricsWriter:
+    """Saves metrics to a file every T seconds on a background
+    thread, and once more when stopped.
+
+    Args:
+        metrics (Metrics): Metrics to save
+        path (str): Path to the metrics file
+        every_seconds (float): Seconds between two saves
+    """
+
+    def __init__(self, metrics: Metrics, path: str, every_seconds: float):
+        self._metrics = metrics
+        self._path = path
+        self._every_seconds = every_seconds
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="marsrover-metrics", daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self._metrics.write(self._path)
+
+    def _run(self):
+        while not self._stopped.wait(self._every_seconds):
+            self._metrics.write(self._path)
+
+
+@contextlib.contextmanager
+def collect_metrics(path: str, every_seconds: float = None) \
+        -> Iterator[Metrics]:
+    """Collects metrics of the runs given the yielded Metrics within
+    a with block, saving them to a file when the block ends, and every
+    T seconds meanwhile if given.
+
+    Args:
+        path (str): Path to the metrics file, .prom for the
+        Prometheus text format, JSON otherwise
+        every_seconds (float, optional): Seconds between two saves
+
+    Yields:
+        Metrics: Metrics being collected
+    """
+    metrics = Metrics()
+    periodic_writer = (PeriodicMetricsWriter(metrics, path, every_seconds)
+                       if every_seconds else None)
+    if periodic_writer:
+        periodic_writer.start()
+    try:
+        yield metrics
+    finally:
+        if periodic_writer:
+            periodic_writer.stop()
+        else:
+            metrics.write(path)
@@ -0,0 +1,242 @@
+"""Module for parsing and running missions"""
+import io
+import os
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, TextIO
+
+from .database import RoverRepo
+from .enums import Orientation, RoverInputType
+from .exceptions import InvalidInputException, InvalidRoverOperationException
+from .metrics import NULL_METRICS, Metrics
+from .models import DEFAULT_PLATEAU_SETTINGS, Plateau, PlateauSettings
+from .parsers import (PlateauInputTextParser, RoverLandingTextParser,
+                      RoverMovingTextParser)
+from .readers import MappedInputFile
+from .tokenizer import RoverInputRecord, tokenize_rover_input_line
+
+if TYPE_CHECKING:
+    from .checkpoints import CheckpointWriter
+    from .journal import MoveJournalWriter
+
+
+def open_mission_input(input_argv: str, with_offsets: bool = False,
+                       metrics: Metrics = NULL_METRICS):
+    """Opens user's input for parsing.
+
+    Args:
+        input_argv (str): Path to the input file, or inline text input
+        with_offsets (bool, optional): Reads files through a
+        MappedInputFile, which is slower than a text mode file but
+        tells the byte offset of each line, and seeks to any line
+        metrics (Metrics, optional): Metrics recording reads of a
+        MappedInputFile
+
+    Returns:
+        Text mode file, or MappedInputFile if asked for, if a file
+        path is provided, StringIO over the inline text input otherwise
+    """
+    if os.path.isfile(input_argv):
+        if with_offsets:
+            return MappedInputFile(input_argv, metrics=metrics)
+        return open(input_argv)
+    return io.StringIO(input_argv)
+
+
+class Mission:
+    """A running mission: its plateau, its rovers and the
+    number of the last input line it ran. A journal, if given,
+    records the state of each rover landed or instructed, and
+    metrics, if given, record the stages of each line.
+    """
+
+    def __init__(self, plateau: Plateau, rover_repo: RoverRepo,
+                 line_number: int = 1,
+                 journal: 'MoveJournalWriter' = None,
+                 metrics: Metrics = NULL_METRICS):
+        self.plateau = plateau
+        self.rover_repo = rover_repo
+        self.line_number = line_number
+        self.metrics = metrics
+
+        # Parsers for rover input
+        # Try to reuse same parser instance instead of creating a new one
+        # per input line to save memory usage
+        landing_parser = RoverLandingTextParser(
+            plateau, rover_repo, journal, metrics)
+        moving_parser = RoverMovingTextParser(
+            plateau, rover_repo, journal, metrics)
+        self._rover_parsers = {
+            RoverInputType.LANDING: metrics.instrument(
+                "land", landing_parser.parse_rover_input),
+            RoverInputType.INSTRUCTIONS: metrics.instrument(
+                "move", moving_parser.parse_rover_input),
+        }
+        self._land_rover = metrics.instrument(
+            "land", landing_parser.land_rover)
+        self._tokenize = metrics.instrument(
+            "tokenize", tokenize_rover_input_line, "lines")
+        if journal is not None:
+            journal.start(self)
+
+    def run_line(self, line: str) -> RoverInputRecord:
+        """Runs the next rover input line, each line is
+        classified and split once.
+
+        Args:
+            line (str): Rover landing or instructions input line
+
+        Returns:
+            RoverInputRecord: Tokenized line
+        """
+        self.line_number += 1
+        record = self._tokenize(line)
+        self._rover_parsers[record.kind](record.name, record.payload)
+        return record
+
+    def run_record(self, record: RoverInputRecord):
+        """Runs the next rover input line, tokenized beforehand.
+
+        Args:
+            record (RoverInputRecord): Tokenized rover input line
+        """
+        self.line_number += 1
+        self._rover_parsers[record.kind](record.name, record.payload)
+
+    def run_landing(self, rover_name: str, landing_x: int, landing_y: int,
+                    orientation: Orientation):
+        """Runs the next rover input line, a landing decoded beforehand.
+
+        Args:
+            rover_name (str): Rover name(also id) to land
+            landing_x (int): Landing x coordinate
+            landing_y (int): Landing y coordinate
+            orientation (Orientation): Initial orientation
+        """
+        self.line_number += 1
+        self._land_rover(rover_name, landing_x, landing_y, orientation)
+
+
+class LineError(NamedTuple):
+    """Error of a failing line, kept when running with keep going"""
+    line_number: int
+    byte_offset: Optional[int]
+    rover_name: Optional[str]
+    message: str
+
+    def __str__(self) -> str:
+        # Tabs and line breaks inside fields would break records
+        return "\t".join(
+            "" if field is None else " ".join(str(field).split())
+            for field in self)
+
+
+def write_error_log(error_log: List[LineError], output: TextIO):
+    """Writes errors one per line, as tab separated line number,
+    byte offset, rover name and message, empty if unknown.
+    """
+    output.writelines(f"{error}\n" for error in error_log)
+
+
+def parse_input(input_file: TextIO, rover_repo: RoverRepo,
+                checkpoint_writer: 'CheckpointWriter' = None,
+                error_log: List[LineError] = None,
+                journal: 'MoveJournalWriter' = None,
+                metrics: Metrics = NULL_METRICS,
+                plateau_settings: PlateauSettings = DEFAULT_PLATEAU_SETTINGS):
+    """Main parser for input file.
+    It will parse user's input line
+    by line.
+
+    Args:
+        input_file (TextIO): TextIO object for user's input,
+        or a MappedInputFile
+        rover_repo (RoverRepo): Repository to register rovers into
+        checkpoint_writer (CheckpointWriter, optional): Writer saving
+        mission state as lines run
+        error_log (List[LineError], optional): Keeps going after a
+        failing rover line, appending its error here instead of
+        raising
+        journal (MoveJournalWriter, optional): Journal recording
+        rover states as lines run
+        metrics (Metrics, optional): Metrics recording the stages
+        of the mission
+        plateau_settings (PlateauSettings, optional): Occupancy and
+        blocked move settings of the mission's plateau
+    """
+    with metrics.stage("parse"):
+        first_line = input_file.readline()
+
+        try:
+            # Parse configuration
+            plateau = PlateauInputTextParser(
+                metrics, plateau_settings).parse_input_line(first_line)
+        except InvalidInputException as invalid_input_ex:
+            raise InvalidInputException(
+                invalid_input_ex.message, 1,
+                getattr(input_file, "line_offset", None))
+
+        run_mission(Mission(plateau, rover_repo, journal=journal,
+                            metrics=metrics),
+                    input_file, checkpoint_writer, error_log)
+
+
+def run_mission(mission: Mission, input_file: TextIO,
+                checkpoint_writer: 'CheckpointWriter' = None,
+                error_log: List[LineError] = None):
+    """Runs remaining rover input lines of a mission, recording
+    them into the mission's metrics.
+
+    Args:
+        mission (Mission): Mission to continue
+        input_file (TextIO): User's input, positioned at the
+        line after the mission's last line
+        checkpoint_writer (CheckpointWriter, optional): Writer saving
+        mission state as lines run
+        error_log (List[LineError], optional): Keeps going after a
+        failing rover line, appending its error here instead of
+        raising
+    """
+    with mission.metrics.stage("parse"):
+        if error_log is not None:
+            _run_mission_keeping_going(
+                mission, input_file, checkpoint_writer, error_log)
+        else:
+            _run_mission_stopping(mission, input_file, checkpoint_writer)
+
+
+def _run_mission_stopping(mission: Mission, input_file: TextIO,
+                          checkpoint_writer: 'CheckpointWriter'):
+    try:
+        for line in input_file:
+            mission.run_line(line)
+            if checkpoint_writer:
+                checkpoint_writer.line_done(mission, input_file)
+
+    except InvalidInputException as invalid_input_ex:
+        # Only byte oriented readers know where the line starts
+        raise InvalidInputException(
+            invalid_input_ex.message, mission.line_number,
+            getattr(input_file, "line_offset", None))
+
+
+def _run_mission_keeping_going(mission: Mission, input_file: TextIO,
+                               checkpoint_writer: 'CheckpointWriter',
+                               error_log: List[LineError]):
+    for line in input_file:
+        try:
+            mission.run_line(line)
+        except InvalidInputException as invalid_input_ex:
+            # Tokenized again, outside of metrics, only for the name
+            try:
+                rover_name = tokenize_rover_input_line(line).name or None
+            except InvalidInputException:
+                rover_name = None
+            error_log.append(LineError(
+                mission.line_number, getattr(input_file, "line_offset", None),
+                rover_name, invalid_input_ex.message))
+        except InvalidRoverOperationException as invalid_operation_ex:
+            error_log.append(LineError(
+                mission.line_number, getattr(input_file, "line_offset", None),
+                invalid_operation_ex.rover_name, invalid_operation_ex.message))
+
+        if checkpoint_writer:
+            checkpoint_writer.line_done(mission, input_file)
@@ -1,17 +1,98 @@
 """Module to handle logic about plateau"""
-from typing import Tuple
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import List, NamedTuple, Optional, Tuple
 
-from .enums import Orientation, RoverInputType
+from . import vectorized
+from .constants import VECTORIZED_MIN_COMMANDS
+from .enums import BlockedMovePolicy, Orientation, RoverInputType
 from .exceptions import InvalidInputException, InvalidRoverOperationException
+from .metrics import NULL_METRICS, Metrics
+from .occupancy import create_occupancy, find_occupied_cells
+from .programs import ORIENTATION_ORDER, CompiledProgram, ProgramCache
 from .util import strip_str_list
 
 
+class PlateauSettings(NamedTuple):
+    """Settings of a mission run, given to its plateau"""
+    # Occupancy backend, auto picks sparse or dense from plateau
+    # size and expected rover count
+    occupancy_backend: str = "auto"
+
+    # File keeping dense occupancy grids, anonymous memory if None
+    occupancy_path: Optional[str] = None
+
+    # Rover count expected on plateaus not told theirs
+    expected_rovers: Optional[int] = None
+
+    # What a rover does when one of its moves is blocked
+    blocked_move_policy: BlockedMovePolicy = BlockedMovePolicy.ABORT
+
+
+DEFAULT_PLATEAU_SETTINGS = PlateauSettings()
+
+
 class Plateau:
-    def __init__(self, name: str, max_x: int, max_y: int):
+    def __init__(self, name: str, max_x: int, max_y: int,
+                 expected_rovers: int = None,
+                 metrics: Metrics = NULL_METRICS,
+                 settings: PlateauSettings = DEFAULT_PLATEAU_SETTINGS):
         self._name = name
         self._max_x = max_x
         self._max_y = max_y
-        self._occupied_locations = {}
+
+        # Read by rovers on this plateau when one of their moves
+        # is blocked
+        self.blocked_move_policy = settings.blocked_move_policy
+
+        # Names of rovers on occupied locations, keyed by (x, y)
+        self._occupied_locations = create_occupancy(
+            max_x, max_y, settings.occupancy_backend,
+            expected_rovers or settings.expected_rovers,
+            settings.occupancy_path)
+
+        # Sorted x coordinates per row and y coordinates per column
+        # of occupied locations, for ray-cast queries
+        self._occupied_rows = {}
+        self._occupied_columns = {}
+
+        # Guards occupancy updates and index reads, so rovers that
+        # cannot interact may move from different threads
+        self._index_lock = threading.Lock()
+
+        if metrics is not NULL_METRICS:
+            self._instrument_collision_checks(metrics)
+
+    def _instrument_collision_checks(self, metrics: Metrics):
+        """Times and counts the border and occupancy queries of this
+        plateau, whoever makes them.
+
+        Args:
+            metrics (Metrics): Metrics to record into
+        """
+        def count_collision(collisions):
+            # A vectorized run stops at its first collision
+            if collisions.any():
+                metrics.count("collisions")
+
+        self.verify_target_location = metrics.instrument(
+            "collision_check", self.verify_target_location,
+            "collision_probes",
+            on_error=lambda ex: metrics.count_rejection(
+                getattr(ex, "message", None)))
+        self.check_target_location = metrics.instrument(
+            "collision_check", self.check_target_location,
+            "collision_probes", on_result=metrics.count_rejection)
+        self.has_occupied_location_within = metrics.instrument(
+            "collision_check", self.has_occupied_location_within,
+            "collision_probes")
+        self.find_first_obstacle = metrics.instrument(
+            "collision_check", self.find_first_obstacle,
+            "collision_probes",
+            on_result=lambda result: metrics.count_rejection(result[1]))
+        self.find_occupied_cells = metrics.instrument(
+            "collision_check", self.find_occupied_cells,
+            "collision_probes", on_result=count_collision)
 
     @property
     def name(self):
@@ -26,36 +107,219 @@ class Plateau:
         return self._max_y
 
     def verify_target_location(self, x: int, y: int):
+        message = self.check_target_location(x, y)
+        if message:
+            raise InvalidRoverOperationException(message)
+
+    def check_target_location(self, x: int, y: int) -> Optional[str]:
+        """Checks whether a rover can move to a location, by status
+        instead of by raising, for per-step checks.
+
+        Returns:
+            Optional[str]: Error message if the location is out of
+            borders or occupied, None if it is free
+        """
         if x < 0:
-            raise InvalidRoverOperationException(
-                "Crossing left border")
+            return "Crossing left border"
 
         if x > self.max_x:
-            raise InvalidRoverOperationException(
-                "Crossing right border")
+            return "Crossing right border"
 
         if y < 0:
-            raise InvalidRoverOperationException(
-                "Crossing lower border")
+            return "Crossing lower border"
 
         if y > self.max_y:
-            raise InvalidRoverOperationException(
-                "Crossing upper border")
+            return "Crossing upper border"
 
         if (x, y) in self._occupied_locations:
-            raise InvalidRoverOperationException(
-                "Collision detected")
+            return "Collision detected"
+
+        return None
+
+    def contains_area(self, min_x: int, min_y: int, max_x: int,
+                      max_y: int) -> bool:
+        """Checks whether a rectangular area lies within borders.
+
+        Returns:
+            bool: True if every cell of the area is on the plateau
+        """
+        return (min_x >= 0 and min_y >= 0
+                and max_x <= self.max_x and max_y <= self.max_y)
+
+    def has_occupied_location_within(
+            self, min_x: int, min_y: int, max_x: int, max_y: int,
+            excluded_location: Tuple[int, int] = None) -> bool:
+        """Checks whether any occupied location lies within
+        a rectangular area.
+
+        Args:
+            excluded_location (Tuple[int, int], optional): Location
+            to ignore even if it is occupied
+
+        Returns:
+            bool: True if an occupied location is found in the area
+        """
+        with self._index_lock:
+            occupied_rows = self._occupied_rows
+
+            # Walk whichever is smaller, the area rows or occupied rows
+            if max_y - min_y + 1 <= len(occupied_rows):
+                rows = (y for y in range(min_y, max_y + 1)
+                        if y in occupied_rows)
+            else:
+                rows = (y for y in occupied_rows if min_y <= y <= max_y)
+
+            for y in rows:
+                row = occupied_rows[y]
+                start = bisect_left(row, min_x)
+                count = bisect_right(row, max_x) - start
+                if count > 1 or (
+                        count == 1 and (row[start], y) != excluded_location):
+                    return True
+
+        return False
+
+    def find_first_obstacle(self, x: int, y: int, step_x: int, step_y: int,
+                            distance: int) -> Tuple[int, Optional[str]]:
+        """Finds the first border or occupied location along a
+        straight run, starting from a location on the plateau.
+
+        Args:
+            x (int): Starting x coordinate
+            y (int): Starting y coordinate
+            step_x (int): x ratio of movement, from Orientation
+            step_y (int): y ratio of movement, from Orientation
+            distance (int): Number of steps in the run
+
+        Returns:
+            Tuple[int, Optional[str]]: Number of steps that can be
+            made, and the error message of the blocked step if the
+            run is blocked within distance
+        """
+        with self._index_lock:
+            if step_x:
+                line = self._occupied_rows.get(y, ())
+                position, limit = x, self.max_x
+                border_messages = ("Crossing left border",
+                                   "Crossing right border")
+                forward = step_x > 0
+            else:
+                line = self._occupied_columns.get(x, ())
+                position, limit = y, self.max_y
+                border_messages = ("Crossing lower border",
+                                   "Crossing upper border")
+                forward = step_y > 0
+
+            if forward:
+                blocked_at = limit - position + 1
+                message = border_messages[1]
+                index = bisect_right(line, position)
+                if index < len(line) and line[index] - position < blocked_at:
+                    blocked_at = line[index] - position
+                    message = "Collision detected"
+            else:
+                blocked_at = position + 1
+                message = border_messages[0]
+                index = bisect_left(line, position) - 1
+                if index >= 0 and position - line[index] < blocked_at:
+                    blocked_at = position - line[index]
+                    message = "Collision detected"
+
+        if blocked_at > distance:
+            return distance, None
+        return blocked_at - 1, message
+
+    def get_occupied_locations(self) -> List[Tuple[int, int]]:
+        """Returns a snapshot of all occupied locations.
+        """
+        with self._index_lock:
+            return list(self._occupied_locations)
+
+    def find_occupied_cells(self, cell_ids):
+        """Checks which cells of an array are occupied, for the
+        vectorized engine. Cell ids are `y * (max_x + 1) + x`.
+
+        Args:
+            cell_ids (numpy.ndarray): Cell ids within borders
+
+        Returns:
+            numpy.ndarray: Boolean mask of occupied cells
+        """
+        with self._index_lock:
+            return find_occupied_cells(
+                self._occupied_locations, self._max_x, cell_ids)
+
+    def get_occupants(self) -> List[Tuple[Tuple[int, int], str]]:
+        """Returns a snapshot of all occupied locations along
+        with names of the rovers occupying them.
+        """
+        with self._index_lock:
+            return list(self._occupied_locations.items())
+
+    def get_occupant(self, location: Tuple[int, int]) -> Optional[str]:
+        """Returns name of the rover occupying a location, None if
+        the location is free.
+        """
+        with self._index_lock:
+            return self._occupied_locations.get(location)
 
     def update_occupied_location(
             self, moved_rover, previous_rover_location: Tuple[int, int] = None):
-        if (previous_rover_location and previous_rover_location in self._occupied_locations):
-            del self._occupied_locations[previous_rover_location]
+        if previous_rover_location:
+            self.release_location(previous_rover_location)
+
+        self.occupy_location(
+            (moved_rover.current_x, moved_rover.current_y), moved_rover.name)
+
+    def occupy_location(self, location: Tuple[int, int], rover_name: str):
+        """Marks a location as occupied.
+
+        Args:
+            location (Tuple[int, int]): Location to occupy
+            rover_name (str): Name of the occupying rover, only the
+            name is kept so plateau does not hold rover objects
+        """
+        with self._index_lock:
+            if location not in self._occupied_locations:
+                self._add_to_index(*location)
+            self._occupied_locations[location] = rover_name
 
-        self._occupied_locations[(
-            moved_rover.current_x, moved_rover.current_y)] = moved_rover
+    def release_location(self, location: Tuple[int, int]):
+        """Marks a location as free, if it is occupied.
 
+        Args:
+            location (Tuple[int, int]): Location to release
+        """
+        with self._index_lock:
+            if location in self._occupied_locations:
+                del self._occupied_locations[location]
+                self._remove_from_index(*location)
+
+    def _add_to_index(self, x: int, y: int):
+        insort(self._occupied_rows.setdefault(y, []), x)
+        insort(self._occupied_columns.setdefault(x, []), y)
+
+    def _remove_from_index(self, x: int, y: int):
+        row = self._occupied_rows[y]
+        del row[bisect_left(row, x)]
+        if not row:
+            del self._occupied_rows[y]
+
+        column = self._occupied_columns[x]
+        del column[bisect_left(column, y)]
+        if not column:
+            del self._occupied_columns[x]
+
+
+class BaseRover:
+    """Rover behaviour on top of plateau, name, current_x, current_y
+    and current_orientation properties, which subclasses keep in
+    storage of their own. Settings below are read from the class of
+    each rover, so setting them on BaseRover applies to every kind,
+    the blocked move policy is read from the rover's plateau.
+    """
+    __slots__ = ()
 
-class Rover:
     commands_registry = {
         'L': "turn_left",
         'R': "turn_right",
@@ -70,49 +334,18 @@ class Rover:
         Orientation.N,
     ]
 
-    def __init__(self, plateau: Plateau, name: str, current_x: int,
-                 current_y: int, current_orientation: Orientation):
-        self._plateau = plateau
-        self._name = name
-        self._current_orientation = current_orientation
-
-        # Set through setters
-        self.current_x = current_x
-        self.current_y = current_y
-
-    @property
-    def plateau(self):
-        return self._plateau
-
-    @property
-    def name(self):
-        return self._name
-
-    @property
-    def current_x(self):
-        return self._current_x
-
-    @current_x.setter
-    def current_x(self, value):
-        self._current_x = value
-
-    @property
-    def current_y(self):
-        return self._current_y
-
-    @current_y.setter
-    def current_y(self, value):
-        self._current_y = value
+    # Compiled programs shared by all rovers
+    program_cache = ProgramCache()
 
-    @property
-    def current_orientation(self):
-        return self._current_orientation
+    # Long instruction strings skip the program cache and run on
+    # the NumPy engine if available, None disables it
+    vectorized_min_commands = VECTORIZED_MIN_COMMANDS
 
     def turn_left(self):
         """Let rover do a left turn (counter-clockwise).
         """
         # Move 1 step left in circular list
-        self._current_orientation = self.__class__.orientations[
+        self.current_orientation = self.__class__.orientations[
             (self.__class__.orientations.index(self.current_orientation)
              - 1) % len(self.__class__.orientations)]
 
@@ -120,25 +353,35 @@ class Rover:
         """Let rover do a right turn (clockwise).
         """
         # Move 1 step right in circular list
-        self._current_orientation = self.__class__.orientations[
+        self.current_orientation = self.__class__.orientations[
             (self.__class__.orientations.index(self.current_orientation)
              + 1) % len(self.__class__.orientations)]
 
     def move_forward(self):
         """Modifies x or y based on orientation.
+
+        Raises:
+            InvalidRoverOperationException: If the move is blocked
+        """
+        message = self._step_forward()
+        if message:
+            raise InvalidRoverOperationException(message, self.name)
+
+    def _step_forward(self) -> Optional[str]:
+        """Moves one step forward if the target location is free.
+
+        Returns:
+            Optional[str]: Error message if the move is blocked,
+            None if the rover moved
         """
         proposed_x = self.current_x + self.current_orientation.value[0]
         proposed_y = self.current_y + self.current_orientation.value[1]
 
-        try:
-            self.plateau.verify_target_location(proposed_x, proposed_y)
+        message = self.plateau.check_target_location(proposed_x, proposed_y)
+        if message is None:
             self.current_x = proposed_x
             self.current_y = proposed_y
-
-        except InvalidRoverOperationException as ex:
-            # Raise up with rover name
-            raise InvalidRoverOperationException(
-                ex.message, self.name)
+        return message
 
     def execute_move_commands(self, commands: str):
         """Executes a series of movement command characters.
@@ -148,11 +391,139 @@ class Rover:
             commands (str): Input strong consists of a series
             of character commands
         """
+        min_commands = self.__class__.vectorized_min_commands
+        if (min_commands is not None and len(commands) >= min_commands
+                and self.plateau.blocked_move_policy
+                is BlockedMovePolicy.ABORT
+                and vectorized.is_available()):
+            vectorized.execute_commands_vectorized(self, commands)
+        else:
+            self.execute_program(self.__class__.program_cache.get(commands))
+
+    def execute_program(self, program: CompiledProgram):
+        """Executes a compiled instruction program.
+        When the swept area is on the plateau and holds no
+        occupied location, the net displacement is applied at
+        once. Otherwise straight runs are resolved one by one
+        so errors surface exactly as before.
+
+        Args:
+            program (CompiledProgram): Compiled instruction program
+        """
         original_location = (self.current_x, self.current_y)
-        for command in commands:
-            self.execute_single_move_command(command)
 
-        self.update_location_on_plateau(original_location)
+        try:
+            if self._can_apply_program(program):
+                heading = ORIENTATION_ORDER.index(self.current_orientation)
+                delta_x, delta_y = program.displacements[heading]
+                self.current_x += delta_x
+                self.current_y += delta_y
+                self.current_orientation = ORIENTATION_ORDER[
+                    (heading + program.total_turn) % 4]
+
+            elif self.plateau.contains_area(
+                    self.current_x, self.current_y,
+                    self.current_x, self.current_y):
+                self._execute_program_runs(program)
+
+            else:
+                self._execute_program_steps(program)
+        finally:
+            # Moves made before an error are kept, so the plateau
+            # must know where the rover stopped
+            self.update_location_on_plateau(original_location)
+
+    def _can_apply_program(self, program: CompiledProgram) -> bool:
+        """Checks whether a program can run without any error.
+
+        Args:
+            program (CompiledProgram): Compiled instruction program
+
+        Returns:
+            bool: True if net displacement can be applied directly
+        """
+        if program.unknown_command_index is not None:
+            return False
+
+        if not program.move_count:
+            return True
+
+        x, y = self.current_x, self.current_y
+        heading = ORIENTATION_ORDER.index(self.current_orientation)
+        min_dx, min_dy, max_dx, max_dy = program.bounding_boxes[heading]
+        if not self.plateau.contains_area(
+                x + min_dx, y + min_dy, x + max_dx, y + max_dy):
+            return False
+
+        # Rover's own location only matters if the path returns to it
+        excluded_location = None if program.revisits_origin else (x, y)
+        return not self.plateau.has_occupied_location_within(
+            x + min_dx, y + min_dy, x + max_dx, y + max_dy,
+            excluded_location)
+
+    def _execute_program_runs(self, program: CompiledProgram):
+        """Executes a program one straight run at a time, each run
+        resolved by a single obstacle query on the plateau.
+        Blocked moves are handled, and errors raised, the same as
+        executing commands one by one.
+
+        Args:
+            program (CompiledProgram): Compiled instruction program
+
+        Raises:
+            InvalidRoverOperationException: If a move is blocked
+            and the blocked move policy is ABORT
+            InvalidInputException: If an unknown command is reached
+        """
+        policy = self.plateau.blocked_move_policy
+        heading = ORIENTATION_ORDER.index(self.current_orientation)
+        for turn, run in program.segments:
+            heading = (heading + turn) % 4
+            self.current_orientation = ORIENTATION_ORDER[heading]
+            if not run:
+                continue
+
+            step_x, step_y = self.current_orientation.value
+            steps, message = self.plateau.find_first_obstacle(
+                self.current_x, self.current_y, step_x, step_y, run)
+            self.current_x += step_x * steps
+            self.current_y += step_y * steps
+            if message:
+                if policy is BlockedMovePolicy.ABORT:
+                    raise InvalidRoverOperationException(message, self.name)
+                if policy is BlockedMovePolicy.STOP:
+                    return
+                # Skipped steps left in the run face the same obstacle
+
+        if program.unknown_command_index is not None:
+            raise InvalidInputException(
+                "Unknown rover instruction: "
+                f"{program.commands[program.unknown_command_index]}")
+
+    def _execute_program_steps(self, program: CompiledProgram):
+        """Executes a program one command at a time, checking each
+        step by status and handling blocked moves by policy.
+
+        Args:
+            program (CompiledProgram): Compiled instruction program
+
+        Raises:
+            InvalidRoverOperationException: If a move is blocked
+            and the blocked move policy is ABORT
+            InvalidInputException: If an unknown command is reached
+        """
+        policy = self.plateau.blocked_move_policy
+        for command in program.commands:
+            if command != 'M':
+                self.execute_single_move_command(command)
+                continue
+
+            message = self._step_forward()
+            if message:
+                if policy is BlockedMovePolicy.ABORT:
+                    raise InvalidRoverOperationException(message, self.name)
+                if policy is BlockedMovePolicy.STOP:
+                    return
 
     def execute_single_move_command(self, command_char):
         """Executes a single command.
@@ -190,3 +561,50 @@ class Rover:
             of the rover before it moves
         """
         self.plateau.update_occupied_location(self, original_location)
+
+
+class Rover(BaseRover):
+    __slots__ = ("_plateau", "_name", "_current_x", "_current_y",
+                 "_current_orientation")
+
+    def __init__(self, plateau: Plateau, name: str, current_x: int,
+                 current_y: int, current_orientation: Orientation):
+        self._plateau = plateau
+        self._name = name
+        self._current_orientation = current_orientation
+
+        # Set through setters
+        self.current_x = current_x
+        self.current_y = current_y
+
+    @property
+    def plateau(self):
+        return self._plateau
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def current_x(self):
+        return self._current_x
+
+    @current_x.setter
+    def current_x(self, value):
+        self._current_x = value
+
+    @property
+    def current_y(self):
+        return self._current_y
+
+    @current_y.setter
+    def current_y(self, value):
+        self._current_y = value
+
+    @property
+    def current_orientation(self):
+        return self._current_orientation
+
+    @current_orientation.setter
+    def current_orientation(self, value):
+        self._current_orientation = value
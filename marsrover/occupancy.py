@@ -0,0 +1,213 @@
+"""Module for plateau occupancy backends
+
+Backends map occupied (x, y) locations to the name of the rover on
+them:
+
+- sparse: a plain dict, memory grows with rovers. It is the default,
+  collision checks on every step stay built-in dict lookups
+- dense: int32 grid with one slot per cell, keyed by linear cell id
+  `y * (max_x + 1) + x`, holding 1 + the id of the rover on it in a
+  rover name table, or 0 if the cell is free, so memory grows with
+  cells and only by a pointer per rover. The grid lives in an
+  anonymous memory map, whose pages are only allocated once touched,
+  or in a file. Locations outside the plateau are never occupied
+
+Arrays of cell ids are checked at once for the vectorized engine on
+both backends, touching only the cells asked about.
+"""
+import mmap
+from collections.abc import MutableMapping
+from itertools import compress
+from typing import Dict, Iterator, Optional, Tuple
+
+from . import vectorized
+from .constants import (OCCUPANCY_BACKENDS, OCCUPANCY_DENSE_CELLS_PER_ROVER,
+                        OCCUPANCY_DENSE_MAX_CELLS)
+from .exceptions import InvalidInputException
+
+_GRID_ITEM_SIZE = 4
+
+
+class DenseOccupancy(MutableMapping):
+    """Occupied locations in an int32 grid of rover ids.
+
+    Args:
+        max_x (int): Plateau upper x coordinate
+        max_y (int): Plateau upper y coordinate
+        path (str, optional): New file to keep the grid in,
+        anonymous memory if None
+
+    Raises:
+        InvalidInputException: If the file at path already exists,
+        it is never overwritten
+    """
+
+    def __init__(self, max_x: int, max_y: int, path: Optional[str] = None):
+        self._width = max_x + 1
+        self._height = max_y + 1
+        cell_count = self._width * self._height
+        if path is None:
+            self._map = mmap.mmap(-1, cell_count * _GRID_ITEM_SIZE)
+        else:
+            try:
+                grid_file = open(path, "x+b")
+            except FileExistsError:
+                raise InvalidInputException(
+                    f"Occupancy file already exists: {path}")
+            with grid_file:
+                grid_file.truncate(cell_count * _GRID_ITEM_SIZE)
+                self._map = mmap.mmap(grid_file.fileno(), 0)
+        self._grid = memoryview(self._map).cast("i")
+
+        # Rover name table, ids of released locations are reused, so
+        # a rover moving keeps the id it had
+        self._names = []
+        self._free_ids = []
+
+    def __contains__(self, location) -> bool:
+        x, y = location
+        return (0 <= x < self._width and 0 <= y < self._height
+                and self._grid[y * self._width + x] != 0)
+
+    def __getitem__(self, location: Tuple[int, int]) -> str:
+        if location not in self:
+            raise KeyError(location)
+        x, y = location
+        return self._names[self._grid[y * self._width + x] - 1]
+
+    def __setitem__(self, location: Tuple[int, int], rover_name: str):
+        x, y = location
+        if not (0 <= x < self._width and 0 <= y < self._height):
+            raise KeyError(location)
+
+        cell = y * self._width + x
+        if self._grid[cell]:
+            self._names[self._grid[cell] - 1] = rover_name
+        elif self._free_ids:
+            rover_id = self._free_ids.pop()
+            self._names[rover_id] = rover_name
+            self._grid[cell] = rover_id + 1
+        else:
+            self._names.append(rover_name)
+            self._grid[cell] = len(self._names)
+
+    def __delitem__(self, location: Tuple[int, int]):
+        if location not in self:
+            raise KeyError(location)
+        x, y = location
+        cell = y * self._width + x
+        rover_id = self._grid[cell] - 1
+        self._names[rover_id] = None
+        self._free_ids.append(rover_id)
+        self._grid[cell] = 0
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        # Scans the whole grid, vectorized if NumPy is available
+        if vectorized.is_available():
+            cells = vectorized.numpy.frombuffer(
+                self._map, dtype=vectorized.numpy.int32).nonzero()[0].tolist()
+        else:
+            cells = list(compress(range(len(self._grid)), self._grid))
+
+        width = self._width
+        for cell in cells:
+            y, x = divmod(cell, width)
+            yield x, y
+
+    def __len__(self) -> int:
+        return len(self._names) - len(self._free_ids)
+
+    def find_occupied_cells(self, cell_ids):
+        """Checks which cells of an array are occupied, reading only
+        their slots of the grid.
+
+        Args:
+            cell_ids (numpy.ndarray): Cell ids within the plateau
+
+        Returns:
+            numpy.ndarray: Boolean mask of occupied cells
+        """
+        numpy = vectorized.numpy
+        grid = numpy.frombuffer(self._map, dtype=numpy.int32)
+        return grid[cell_ids] != 0
+
+
+def find_occupied_cells(occupancy: MutableMapping, max_x: int, cell_ids):
+    """Checks which cells of an array are occupied. A sparse dict is
+    looked up by whichever is fewer, the cells or its locations.
+
+    Args:
+        occupancy (MutableMapping): Sparse dict or dense grid
+        max_x (int): Plateau upper x coordinate
+        cell_ids (numpy.ndarray): Cell ids within the plateau
+
+    Returns:
+        numpy.ndarray: Boolean mask of occupied cells
+    """
+    if isinstance(occupancy, DenseOccupancy):
+        return occupancy.find_occupied_cells(cell_ids)
+
+    numpy = vectorized.numpy
+    width = max_x + 1
+    if len(occupancy) < len(cell_ids):
+        return numpy.isin(cell_ids, numpy.fromiter(
+            (y * width + x for x, y in occupancy), dtype=numpy.int64,
+            count=len(occupancy)))
+    return numpy.fromiter(
+        ((cell % width, cell // width) in occupancy
+         for cell in cell_ids.tolist()),
+        dtype=bool, count=len(cell_ids))
+
+
+def select_occupancy_backend(max_x: int, max_y: int,
+                             expected_rovers: Optional[int]) -> str:
+    """Picks the backend using the least memory, the dense grid
+    when rovers are expected on a large enough share of cells.
+
+    Args:
+        max_x (int): Plateau upper x coordinate
+        max_y (int): Plateau upper y coordinate
+        expected_rovers (int, optional): Number of rovers expected
+        on the plateau, sparse is picked if unknown
+
+    Returns:
+        str: sparse or dense
+    """
+    cell_count = (max_x + 1) * (max_y + 1)
+    if (expected_rovers and cell_count <= OCCUPANCY_DENSE_MAX_CELLS
+            and cell_count <= expected_rovers
+            * OCCUPANCY_DENSE_CELLS_PER_ROVER):
+        return "dense"
+    return "sparse"
+
+
+def create_occupancy(max_x: int, max_y: int, backend: str = "auto",
+                     expected_rovers: int = None,
+                     path: str = None) \
+        -> Dict[Tuple[int, int], str]:
+    """Creates the occupancy backend of a plateau.
+
+    Args:
+        max_x (int): Plateau upper x coordinate
+        max_y (int): Plateau upper y coordinate
+        backend (str, optional): One of auto, sparse or dense
+        expected_rovers (int, optional): Number of rovers expected
+        on the plateau, for auto selection
+        path (str, optional): New file to keep a dense grid in
+
+    Raises:
+        InvalidInputException: If backend is unknown
+        InvalidInputException: If a dense grid file already exists
+
+    Returns:
+        Dict[Tuple[int, int], str]: Empty dict for sparse, empty
+        DenseOccupancy, which behaves like one, for dense
+    """
+    if backend not in OCCUPANCY_BACKENDS:
+        raise InvalidInputException(f"Unknown occupancy backend: {backend}")
+    if backend == "auto":
+        backend = select_occupancy_backend(max_x, max_y, expected_rovers)
+
+    if backend == "dense":
+        return DenseOccupancy(max_x, max_y, path)
+    return {}
@@ -0,0 +1,372 @@
+"""Module for the packed binary mission format
+
+Usage: python3 -m marsrover.packed input_path output_path
+
+Packed missions hold the same lines as text missions in a compact
+form which needs no tokenizing. All integers are little endian:
+
+- header: magic b"MRPK", version (uint8), plateau max x and max y
+  (int64), byte offset of the rover name table (uint64), plateau
+  name length (uint16) and UTF-8 plateau name
+- records, one per rover input line, starting with their type (uint8):
+  - 0, skipped line: nothing else, kept so line numbers still match
+    the text mission
+  - 1, landing: rover id (uint32), x and y (int64), orientation code
+    (uint8), 0 for E, 1 for S, 2 for W and 3 for N
+  - 2, instructions: rover id (uint32), command count (uint32), then
+    commands packed 2 bits each, four per byte from the lowest bits,
+    0 for L, 1 for R and 2 for M
+- rover name table: name count (uint32), then the length (uint16)
+  and UTF-8 bytes of each name, ids count from 0 in table order
+
+Only syntactically valid text missions convert. Errors depending on
+mission state, such as collisions or unknown rovers, are still found
+when the packed mission runs.
+"""
+import argparse
+import itertools
+import mmap
+import struct
+from typing import TYPE_CHECKING, BinaryIO, Iterator, List, Optional, Tuple
+
+from .database import RoverRepo
+from .enums import Orientation, RoverInputType
+from .exceptions import InvalidInputException, InvalidRoverOperationException
+from .metrics import NULL_METRICS, Metrics
+from .missions import LineError, Mission
+from .models import DEFAULT_PLATEAU_SETTINGS, Plateau, PlateauSettings
+from .parsers import PlateauInputTextParser
+from .programs import ORIENTATION_ORDER
+from .readers import MappedInputFile
+from .tokenizer import RoverInputRecord, tokenize_rover_input_line
+from .validation import check_rover_record
+
+if TYPE_CHECKING:
+    from .journal import MoveJournalWriter
+
+PACKED_MISSION_MAGIC = b"MRPK"
+PACKED_MISSION_VERSION = 1
+
+_HEADER = struct.Struct("<4sBqqQH")
+_RECORD_TYPE = struct.Struct("<B")
+_LANDING = struct.Struct("<BIqqB")
+_INSTRUCTIONS = struct.Struct("<BII")
+_NAME_COUNT = struct.Struct("<I")
+_NAME_LENGTH = struct.Struct("<H")
+
+_SKIPPED_RECORD = 0
+_LANDING_RECORD = 1
+_INSTRUCTIONS_RECORD = 2
+
+_COMMANDS = "LRM"
+# Every run of four commands and the byte packing it, and back. Code
+# 3 is never written, it decodes to "?" to fail as an unknown command
+_PACKED_RUNS = {
+    "".join(run): sum(_COMMANDS.index(command) << (2 * position)
+                      for position, command in enumerate(run))
+    for run in itertools.product(_COMMANDS, repeat=4)}
+_UNPACKED_RUNS = [
+    "".join((_COMMANDS + "?")[(code >> (2 * position)) & 3]
+            for position in range(4))
+    for code in range(256)]
+_ORIENTATION_CODES = {orientation: code for code, orientation
+                      in enumerate(ORIENTATION_ORDER)}
+
+# Records buffered before a write while converting
+_WRITE_BUFFER_SIZE = 1 << 20
+
+
+def pack_commands(commands: str) -> bytes:
+    """Packs an instruction string of L, R and M commands, four
+    commands per byte. The last byte is padded with L commands.
+    """
+    padded = commands + "L" * (-len(commands) % 4)
+    return bytes(map(_PACKED_RUNS.__getitem__,
+                     [padded[start:start + 4]
+                      for start in range(0, len(padded), 4)]))
+
+
+def unpack_commands(packed: bytes, command_count: int) -> str:
+    """Unpacks an instruction string, a whole byte of four
+    commands at a time.
+    """
+    return "".join(map(_UNPACKED_RUNS.__getitem__, packed))[:command_count]
+
+
+def _encode_record(record: RoverInputRecord, rover_id: int) -> bytes:
+    if record.kind is RoverInputType.INSTRUCTIONS:
+        return _INSTRUCTIONS.pack(
+            _INSTRUCTIONS_RECORD, rover_id, len(record.payload)) \
+            + pack_commands(record.payload)
+
+    x, y, orientation = record.payload.split(" ")
+    return _LANDING.pack(_LANDING_RECORD, rover_id, int(x), int(y),
+                         _ORIENTATION_CODES[Orientation[orientation.upper()]])
+
+
+def convert_text_mission(input_path: str, output: BinaryIO) -> int:
+    """Converts a text mission file to a packed mission.
+
+    Args:
+        input_path (str): Path to the text mission file
+        output (BinaryIO): Seekable binary output, the name table
+        offset is written into the header last
+
+    Raises:
+        InvalidInputException: If a line is not syntactically valid,
+        or holds a number out of the packed format's range
+
+    Returns:
+        int: Number of lines converted
+    """
+    rover_ids = {}
+    with MappedInputFile(input_path) as input_file:
+        line_number = 1
+        try:
+            plateau = PlateauInputTextParser().parse_input_line(
+                input_file.readline())
+            plateau_name = plateau.name.encode()
+            start = output.tell()
+            output.write(_HEADER.pack(
+                PACKED_MISSION_MAGIC, PACKED_MISSION_VERSION,
+                plateau.max_x, plateau.max_y, 0, len(plateau_name)))
+            output.write(plateau_name)
+
+            buffer = bytearray()
+            for line in input_file:
+                line_number += 1
+                record = tokenize_rover_input_line(line)
+                check_rover_record(record)
+                if not (record.name and record.payload):
+                    buffer += _RECORD_TYPE.pack(_SKIPPED_RECORD)
+                else:
+                    rover_id = rover_ids.setdefault(
+                        record.name, len(rover_ids))
+                    buffer += _encode_record(record, rover_id)
+                if len(buffer) >= _WRITE_BUFFER_SIZE:
+                    output.write(buffer)
+                    buffer.clear()
+            output.write(buffer)
+        except InvalidInputException as invalid_input_ex:
+            raise InvalidInputException(
+                invalid_input_ex.message, line_number,
+                input_file.line_offset)
+        except struct.error:
+            raise InvalidInputException(
+                "Number out of packed mission range", line_number,
+                input_file.line_offset)
+
+    name_table_offset = output.tell()
+    output.write(_NAME_COUNT.pack(len(rover_ids)))
+    for rover_name in rover_ids:
+        encoded_name = rover_name.encode()
+        output.write(_NAME_LENGTH.pack(len(encoded_name)))
+        output.write(encoded_name)
+
+    end = output.tell()
+    output.seek(start)
+    output.write(_HEADER.pack(
+        PACKED_MISSION_MAGIC, PACKED_MISSION_VERSION, plateau.max_x,
+        plateau.max_y, name_table_offset, len(plateau_name)))
+    output.seek(end)
+    return line_number
+
+
+class PackedMissionReader:
+    """Read-only packed mission file mapped into memory.
+
+    Args:
+        path (str): Path to the packed mission file
+
+    Raises:
+        InvalidInputException: If the file is not a packed mission
+        of a supported version
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as raw_file:
+            try:
+                self._map = mmap.mmap(
+                    raw_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                raise InvalidInputException(
+                    f"Not a packed mission file: {path}")
+
+        try:
+            magic, version, self.max_x, self.max_y, self._records_end, \
+                name_length = _HEADER.unpack_from(self._map)
+            if magic != PACKED_MISSION_MAGIC:
+                raise InvalidInputException(
+                    f"Not a packed mission file: {path}")
+            if version != PACKED_MISSION_VERSION:
+                raise InvalidInputException(
+                    f"Unsupported packed mission version: {version}")
+
+            self._records_start = _HEADER.size + name_length
+            self.plateau_name = self._map[
+                _HEADER.size:self._records_start].decode()
+            self.rover_names = self._read_name_table()
+        except (struct.error, UnicodeDecodeError):
+            self.close()
+            raise InvalidInputException(
+                f"Corrupted packed mission file: {path}")
+        except InvalidInputException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _read_name_table(self) -> List[str]:
+        offset = self._records_end
+        name_count, = _NAME_COUNT.unpack_from(self._map, offset)
+        offset += _NAME_COUNT.size
+        rover_names = []
+        for _ in range(name_count):
+            name_length, = _NAME_LENGTH.unpack_from(self._map, offset)
+            offset += _NAME_LENGTH.size
+            rover_names.append(
+                self._map[offset:offset + name_length].decode())
+            offset += name_length
+        return rover_names
+
+    def create_plateau(self, metrics: Metrics = NULL_METRICS,
+                       settings: PlateauSettings = DEFAULT_PLATEAU_SETTINGS) \
+            -> Plateau:
+        return Plateau(self.plateau_name, self.max_x, self.max_y,
+                       len(self.rover_names), metrics, settings)
+
+    def iter_records(self) -> Iterator[Tuple[int, Optional[RoverInputType],
+                                             Optional[str], object]]:
+        """Decodes records in file order.
+
+        Raises:
+            InvalidInputException: If a record is truncated or unknown
+
+        Yields:
+            Tuple: Byte offset of the record, its input type, None for
+            a skipped line, rover name, and payload: x, y and
+            Orientation of a landing, or an instruction string
+        """
+        packed_map = self._map
+        rover_names = self.rover_names
+        offset = self._records_start
+        records_end = self._records_end
+        while offset < records_end:
+            record_offset = offset
+            try:
+                record_type = packed_map[offset]
+                if record_type == _INSTRUCTIONS_RECORD:
+                    _, rover_id, command_count = _INSTRUCTIONS.unpack_from(
+                        packed_map, offset)
+                    offset += _INSTRUCTIONS.size
+                    packed_end = offset + (command_count + 3) // 4
+                    if packed_end > records_end:
+                        raise struct.error
+                    yield (record_offset, RoverInputType.INSTRUCTIONS,
+                           rover_names[rover_id], unpack_commands(
+                               packed_map[offset:packed_end], command_count))
+                    offset = packed_end
+                elif record_type == _LANDING_RECORD:
+                    _, rover_id, x, y, orientation_code = \
+                        _LANDING.unpack_from(packed_map, offset)
+                    offset += _LANDING.size
+                    yield (record_offset, RoverInputType.LANDING,
+                           rover_names[rover_id],
+                           (x, y, ORIENTATION_ORDER[orientation_code]))
+                elif record_type == _SKIPPED_RECORD:
+                    offset += 1
+                    yield record_offset, None, None, None
+                else:
+                    raise struct.error
+            except (struct.error, IndexError):
+                raise InvalidInputException(
+                    "Corrupted packed mission record", None, record_offset)
+
+
+def run_packed_mission(input_path: str, rover_repo: RoverRepo,
+                       error_log: List[LineError] = None,
+                       journal: 'MoveJournalWriter' = None,
+                       metrics: Metrics = NULL_METRICS,
+                       plateau_settings: PlateauSettings =
+                       DEFAULT_PLATEAU_SETTINGS):
+    """Runs a packed mission, feeding decoded records to the
+    mission's rovers and plateau without tokenizing any text.
+
+    Errors hold the line number of the text mission the record was
+    converted from, and the byte offset of the record in the packed
+    file.
+
+    Args:
+        input_path (str): Path to the packed mission file
+        rover_repo (RoverRepo): Repository to register rovers into
+        error_log (List[LineError], optional): Keeps going after a
+        failing record, appending its error here instead of raising
+        journal (MoveJournalWriter, optional): Journal recording
+        rover states as records run
+        metrics (Metrics, optional): Metrics recording the stages
+        of the mission, records are not tokenized
+        plateau_settings (PlateauSettings, optional): Occupancy and
+        blocked move settings of the mission's plateau, the rover
+        count of the file is expected
+
+    Raises:
+        InvalidInputException: If the file is not a valid packed
+        mission
+    """
+    with PackedMissionReader(input_path) as reader, metrics.stage("parse"):
+        mission = Mission(reader.create_plateau(metrics, plateau_settings),
+                          rover_repo,
+                          journal=journal, metrics=metrics)
+        for byte_offset, kind, rover_name, payload in reader.iter_records():
+            try:
+                if kind is RoverInputType.INSTRUCTIONS:
+                    mission.run_record(RoverInputRecord(
+                        rover_name, kind, payload))
+                elif kind is RoverInputType.LANDING:
+                    mission.run_landing(rover_name, *payload)
+                else:
+                    mission.line_number += 1
+            except InvalidInputException as invalid_input_ex:
+                if error_log is None:
+                    raise InvalidInputException(
+                        invalid_input_ex.message, mission.line_number,
+                        byte_offset)
+                error_log.append(LineError(
+                    mission.line_number, byte_offset, rover_name,
+                    invalid_input_ex.message))
+            except InvalidRoverOperationException as invalid_operation_ex:
+                if error_log is None:
+                    raise
+                error_log.append(LineError(
+                    mission.line_number, byte_offset,
+                    invalid_operation_ex.rover_name,
+                    invalid_operation_ex.message))
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        prog="python3 -m marsrover.packed",
+        description="Converts a text mission to a packed mission.")
+    parser.add_argument("input", help="text mission path")
+    parser.add_argument("output", help="packed mission output path")
+    arguments = parser.parse_args(argv)
+
+    try:
+        with open(arguments.output, "wb") as output:
+            convert_text_mission(arguments.input, output)
+    except InvalidInputException as invalid_input_ex:
+        parser.exit(1, f"{invalid_input_ex}\n")
+
+
+if __name__ == '__main__':
+    main()
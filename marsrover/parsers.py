@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
 
 from .exceptions import InvalidInputException, InvalidRoverOperationException
-from .models import Plateau, Rover
+from .metrics import NULL_METRICS, Metrics
+from .models import (DEFAULT_PLATEAU_SETTINGS, BaseRover, Plateau,
+                     PlateauSettings)
 from .enums import Orientation
+from .tokenizer import split_rover_input_line
 from .util import strip_str_list
 
 
@@ -17,8 +20,13 @@ class TextParser(ABC):
 
 
 class PlateauInputTextParser(TextParser):
-    def __init__(self):
+    def __init__(self, metrics: Metrics = NULL_METRICS,
+                 settings: PlateauSettings = DEFAULT_PLATEAU_SETTINGS):
         super().__init__()
+        # Metrics recorded by parsed plateaus
+        self._metrics = metrics
+        # Run settings given to parsed plateaus
+        self._settings = settings
 
     def parse_input_line(self, input_line: str, *args, **kwargs) -> Plateau:
         """Parser for plateau input.
@@ -60,15 +68,21 @@ class PlateauInputTextParser(TextParser):
                 "integers because lower-left coordinates "
                 "are assumed to be 0,0")
 
-        return Plateau(input_parts[0], initial_x, initial_y)
+        return Plateau(input_parts[0], initial_x, initial_y,
+                       metrics=self._metrics, settings=self._settings)
 
 
 class RoverTextParser(TextParser):
-    def __init__(self, plateau: Plateau, rover_repo):
+    def __init__(self, plateau: Plateau, rover_repo, journal=None,
+                 metrics: Metrics = NULL_METRICS):
         self._subject_plateau = plateau
         self._rover_repo = rover_repo
-        self._acting_rover_name = None
-        self._instructions_details = None
+        # MoveJournalWriter recording rover states, if any
+        self._journal = journal
+        # Lookups are counted here rather than in the repo, so a
+        # caching repo passing one on to its stored repo counts once
+        self._get_rover_by_name = metrics.instrument(
+            "repo_lookup", rover_repo.get_rover_by_name, "repo_lookups")
 
     def parse_input_line(self, input_line, *args, **kwargs):
         """Praser for all rover inputs.
@@ -84,34 +98,32 @@ class RoverTextParser(TextParser):
             InvalidInputException: If none or more than one colon found from input
             InvalidInputException: If none or more than one space found from input header part
         """
-        input_parts = input_line.split(":")
-        if len(input_parts) != 2:
-            raise InvalidInputException("Invalid Rover input")
-        input_parts = strip_str_list(input_parts)
+        self.parse_rover_input(*split_rover_input_line(input_line))
 
-        header_parts = input_parts[0].split(" ")
-        if len(header_parts) != 2:
-            raise InvalidInputException("Invalid Rover input")
-
-        self._acting_rover_name = header_parts[0]
-        self._instructions_details = input_parts[1]
+    @abstractmethod
+    def parse_rover_input(self, rover_name: str, instructions_details: str):
+        """Parses an already tokenized rover input.
 
-    def parser_clean_up(self):
-        self._acting_rover_name = None
-        self._instructions_details = None
+        Args:
+            rover_name (str): Rover name(also id)
+            instructions_details (str): Stripped part after the colon
+        """
+        pass
 
 
 class RoverLandingTextParser(RoverTextParser):
-    def __init__(self, plateau, rover_repo):
-        super().__init__(plateau, rover_repo)
+    def __init__(self, plateau, rover_repo, journal=None,
+                 metrics: Metrics = NULL_METRICS):
+        super().__init__(plateau, rover_repo, journal, metrics)
 
-    def parse_input_line(self, input_line, *args, **kwargs):
+    def parse_rover_input(self, rover_name: str, instructions_details: str):
         """Parses rover landing inputs.
         Will add newly landed rover to rover registry.
 
         Args:
-            input_line (str): Landing input line from user
-            valid sample: "Rover1 Landing:1 2 N"
+            rover_name (str): Rover name(also id) to land
+            instructions_details (str): Landing coordinates and orientation
+            valid sample: "1 2 N"
 
         Raises:
             InvalidInputException: If landing input format is wrong
@@ -119,17 +131,13 @@ class RoverLandingTextParser(RoverTextParser):
             InvalidInputException: If invalid initial orientation is provided
             InvalidInputException: If target location has already been occupied
         """
-        super().parse_input_line(input_line, *args, **kwargs)
-
-        if self._acting_rover_name and self._instructions_details:
+        if rover_name and instructions_details:
 
-            landing_input_parts = self._instructions_details.split(" ")
+            landing_input_parts = instructions_details.split(" ")
             if len(landing_input_parts) != 3:
                 raise InvalidInputException("Invalid rover landing input")
 
-            if self._rover_repo.get_rover_by_name(self._acting_rover_name):
-                raise InvalidInputException(
-                    f"Rover {self._acting_rover_name} has already landed before")
+            self._verify_not_landed(rover_name)
 
             try:
                 landing_x = int(landing_input_parts[0])
@@ -137,7 +145,7 @@ class RoverLandingTextParser(RoverTextParser):
             except ValueError:
                 raise InvalidInputException(
                     "Invalid rover landing coordinates input: "
-                    f"{self._instructions_details}")
+                    f"{instructions_details}")
 
             try:
                 orientation = Orientation[landing_input_parts[2].upper()]
@@ -145,48 +153,84 @@ class RoverLandingTextParser(RoverTextParser):
                 raise InvalidInputException(
                     f"Invalid rover orientation input: {landing_input_parts[2]}")
 
-            # Check landing collision
-            try:
-                self._subject_plateau.verify_target_location(
-                    landing_x, landing_y)
-            except InvalidRoverOperationException:
-                raise InvalidInputException(
-                    f"Invalid landing location: {landing_x, landing_y}")
+            self._place_rover(rover_name, landing_x, landing_y, orientation)
 
-            # Add newly landed rover to registry
-            self._rover_repo.register_new_rover(self._acting_rover_name, Rover(
-                self._subject_plateau, self._acting_rover_name, landing_x,
-                landing_y, orientation))
+    def land_rover(self, rover_name: str, landing_x: int, landing_y: int,
+                   orientation: Orientation):
+        """Lands a rover from already decoded landing input, such as
+        a packed mission record.
 
-            super().parser_clean_up()
+        Args:
+            rover_name (str): Rover name(also id) to land
+            landing_x (int): Landing x coordinate
+            landing_y (int): Landing y coordinate
+            orientation (Orientation): Initial orientation
 
+        Raises:
+            InvalidInputException: If rover has already landed
+            InvalidInputException: If target location has already been occupied
+        """
+        self._verify_not_landed(rover_name)
+        self._place_rover(rover_name, landing_x, landing_y, orientation)
 
-class RoverMovingTextParser(RoverTextParser):
-    def __init__(self, plateau, rover_repo):
-        super().__init__(plateau, rover_repo)
+    def _verify_not_landed(self, rover_name: str):
+        if self._get_rover_by_name(rover_name):
+            raise InvalidInputException(
+                f"Rover {rover_name} has already landed before")
 
-    def parse_input_line(self, input_line, *args, **kwargs):
+    def _place_rover(self, rover_name: str, landing_x: int, landing_y: int,
+                     orientation: Orientation):
+        # Check landing collision
+        try:
+            self._subject_plateau.verify_target_location(
+                landing_x, landing_y)
+        except InvalidRoverOperationException:
+            raise InvalidInputException(
+                f"Invalid landing location: {landing_x, landing_y}")
+
+        # Add newly landed rover to registry
+        new_rover = self._rover_repo.land_new_rover(
+            rover_name, self._subject_plateau, landing_x, landing_y,
+            orientation)
+        if self._journal is not None:
+            self._journal.append_rover(new_rover)
+
+
+class RoverMovingTextParser(RoverTextParser):
+    def __init__(self, plateau, rover_repo, journal=None,
+                 metrics: Metrics = NULL_METRICS):
+        super().__init__(plateau, rover_repo, journal, metrics)
+        self._execute_move_commands = metrics.instrument(
+            "execute", BaseRover.execute_move_commands,
+            on_call=lambda _, commands: metrics.count(
+                "commands", len(commands)))
+
+    def parse_rover_input(self, rover_name: str, instructions_details: str):
         """Parses rover instructions inputs.
 
         Args:
             rover_name (str): Rover name(also id) to instruct
-            instructions_input (str): List of characters instructions
+            instructions_details (str): List of characters instructions
             for specific rover
-            valid sample: "Rover2 Instructions:MMRMMRMRRM"
+            valid sample: "MMRMMRMRRM"
 
         Raises:
             InvalidInputException: If rover_name does not exist in registry
             InvalidInputException: If an unknown command is passed in
         """
-        super().parse_input_line(input_line, *args, **kwargs)
-
-        if self._acting_rover_name and self._instructions_details:
-            acting_rover = self._rover_repo.get_rover_by_name(
-                self._acting_rover_name)
+        if rover_name and instructions_details:
+            acting_rover = self._get_rover_by_name(rover_name)
             if not acting_rover:
                 raise InvalidInputException(
-                    f"Rover {self._acting_rover_name} does not exist")
-
-            acting_rover.execute_move_commands(self._instructions_details)
+                    f"Rover {rover_name} does not exist")
 
-            super().parser_clean_up()
+            completed = False
+            try:
+                self._execute_move_commands(
+                    acting_rover, instructions_details)
+                completed = True
+            finally:
+                # Moves made before an error are kept as well
+                self._rover_repo.update_rover(acting_rover)
+                if self._journal is not None:
+                    self._journal.append_rover(acting_rover, completed)
@@ -0,0 +1,156 @@
+"""Module for compiled rover instruction programs"""
+import re
+import threading
+from collections import OrderedDict
+from itertools import groupby
+
+from .constants import PROGRAM_CACHE_SIZE
+from .enums import Orientation
+
+# Clockwise order of orientations, a right turn is +1
+ORIENTATION_ORDER = list(Orientation)
+
+UNKNOWN_COMMAND_PATTERN = re.compile(r"[^LRM]")
+
+
+class CompiledProgram:
+    """Compact form of an instruction string.
+
+    Turns are folded mod 4 and consecutive moves are merged into
+    straight runs, so a program is a list of (turn, run) segments:
+    turn the rover clockwise `turn` times, then move forward `run`
+    steps. Net displacement and swept bounding box are precomputed
+    for each starting orientation, indexed like ORIENTATION_ORDER.
+    """
+    __slots__ = ("commands", "segments", "total_turn", "move_count",
+                 "unknown_command_index", "revisits_origin",
+                 "displacements", "bounding_boxes")
+
+    def __init__(self, commands: str):
+        self.commands = commands
+
+        unknown_command = UNKNOWN_COMMAND_PATTERN.search(commands)
+        if unknown_command:
+            self.unknown_command_index = unknown_command.start()
+            valid_commands = commands[:self.unknown_command_index]
+        else:
+            self.unknown_command_index = None
+            valid_commands = commands
+
+        segments = []
+        pending_turn = 0
+        move_count = 0
+        for command, group in groupby(valid_commands):
+            count = len(list(group))
+            if command == 'M':
+                if segments and not pending_turn:
+                    # Turns folded to nothing, keep going straight
+                    turn, run = segments[-1]
+                    segments[-1] = (turn, run + count)
+                else:
+                    segments.append((pending_turn, count))
+                pending_turn = 0
+                move_count += count
+            elif command == 'R':
+                pending_turn = (pending_turn + count) % 4
+            else:
+                pending_turn = (pending_turn - count) % 4
+
+        # Trailing turns without any move afterwards
+        if pending_turn:
+            segments.append((pending_turn, 0))
+
+        self.segments = tuple(segments)
+        self.total_turn = sum(turn for turn, _ in segments) % 4
+        self.move_count = move_count
+        self.revisits_origin = False
+
+        self.displacements = []
+        self.bounding_boxes = []
+        for heading in range(len(ORIENTATION_ORDER)):
+            displacement, bounding_box, revisits_origin = \
+                self._trace(heading)
+            self.displacements.append(displacement)
+            self.bounding_boxes.append(bounding_box)
+            self.revisits_origin = self.revisits_origin or revisits_origin
+
+    def _trace(self, heading: int):
+        """Walks segments from origin with given starting heading.
+
+        Args:
+            heading (int): Index of the starting orientation
+
+        Returns:
+            Tuple: net displacement, swept bounding box as
+            (min_dx, min_dy, max_dx, max_dy), and whether the path
+            steps back onto the origin cell
+        """
+        x = y = min_x = min_y = max_x = max_y = 0
+        revisits_origin = False
+        for turn, run in self.segments:
+            heading = (heading + turn) % 4
+            step_x, step_y = ORIENTATION_ORDER[heading].value
+            next_x = x + step_x * run
+            next_y = y + step_y * run
+
+            # A straight run crosses origin only if it stays on
+            # origin's row or column and origin is strictly ahead
+            if run and not revisits_origin:
+                if step_x and y == 0 and 0 < -x * step_x <= run:
+                    revisits_origin = True
+                elif step_y and x == 0 and 0 < -y * step_y <= run:
+                    revisits_origin = True
+
+            x, y = next_x, next_y
+            min_x, max_x = min(min_x, x), max(max_x, x)
+            min_y, max_y = min(min_y, y), max(max_y, y)
+
+        return (x, y), (min_x, min_y, max_x, max_y), revisits_origin
+
+
+class ProgramCache:
+    """Bounded LRU cache of compiled programs keyed by
+    instruction string. Safe to share between threads.
+    """
+
+    def __init__(self, maxsize: int = PROGRAM_CACHE_SIZE):
+        self._maxsize = maxsize
+        self._programs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    def __len__(self):
+        return len(self._programs)
+
+    def get(self, commands: str) -> CompiledProgram:
+        """Returns compiled program of an instruction string,
+        compiling and caching it on a miss.
+
+        Args:
+            commands (str): Instruction string
+
+        Returns:
+            CompiledProgram: Compiled program for the string
+        """
+        with self._lock:
+            program = self._programs.get(commands)
+            if program is not None:
+                self._programs.move_to_end(commands)
+                return program
+
+        # Compile outside the lock, a concurrent miss compiles twice
+        program = CompiledProgram(commands)
+        with self._lock:
+            self._programs[commands] = program
+            if len(self._programs) > self._maxsize:
+                self._programs.popitem(last=False)
+
+        return program
+
+    def clear(self):
+        with self._lock:
+            self._programs.clear()
+
@@ -0,0 +1,99 @@
+"""Module for input file readers"""
+import mmap
+import os
+
+from .metrics import NULL_METRICS, Metrics
+
+_NEW_LINE = b"\n"
+_CARRIAGE_RETURN = b"\r"
+
+
+class MappedInputFile:
+    """Read-only input file mapped into memory.
+
+    Lines are scanned and split by the memory map itself, in C, then
+    decoded. Reading is slower than a text mode file, so this reader
+    is only used where byte offsets are needed: it gives the byte
+    offset of every line, which text mode files cannot tell while
+    iterating, and seeks to any line start. Lines are split and end
+    with "\\n" like text mode files do, "\\r\\n" and a lone "\\r" are
+    translated. Byte offset of the most recently returned line is
+    kept in `line_offset` for error reporting, and the status of the
+    mapped file in `file_stat`. Reads are timed into metrics, if given.
+    """
+
+    def __init__(self, path: str, encoding: str = "utf-8",
+                 metrics: Metrics = NULL_METRICS):
+        self._encoding = encoding
+        self.line_offset = None
+        if metrics is not NULL_METRICS:
+            self.readline = metrics.instrument("read", self.readline)
+
+        with open(path, "rb") as raw_file:
+            self.file_stat = os.fstat(raw_file.fileno())
+            try:
+                self._map = mmap.mmap(
+                    raw_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Releases the memory map.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def tell(self) -> int:
+        """Returns byte offset of the next line to be read.
+        """
+        return self._map.tell() if self._map is not None else 0
+
+    def seek(self, offset: int):
+        """Moves to a byte offset, which must be a line start.
+
+        Args:
+            offset (int): Byte offset to continue reading from
+        """
+        if self._map is not None:
+            self._map.seek(offset)
+
+    def readline(self) -> str:
+        """Reads next line, returns empty string at the end of file.
+
+        Returns:
+            str: Decoded line including its line ending
+        """
+        if self._map is None:
+            return ""
+
+        start = self._map.tell()
+        line = self._map.readline()
+        if not line:
+            return ""
+
+        # Translate "\r\n" and a lone "\r" into "\n" like text mode
+        # does, a lone "\r" also ends the line
+        carriage_return = line.find(_CARRIAGE_RETURN)
+        if carriage_return != -1:
+            if line[carriage_return + 1:carriage_return + 2] != _NEW_LINE:
+                self._map.seek(start + carriage_return + 1)
+            line = line[:carriage_return] + _NEW_LINE
+        self.line_offset = start
+        return line.decode(self._encoding)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
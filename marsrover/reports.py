@@ -0,0 +1,213 @@
+"""Module for writing rover reports
+
+Reports stream rovers from a repository in registration order and
+write them in chunks of encoded bytes, instead of printing one line
+per rover. Formats:
+
+- text: "name:x y orientation" lines, as printed by report_all_rovers
+- jsonl: one JSON object per rover, with id, name, x, y and orientation
+- csv: header line, then id, name, x, y and orientation per rover
+- binary: fixed-width little endian records of id (int64), x (int64),
+  y (int64) and orientation code (uint8), with no header
+- npy: the same records as a NumPy structured array file
+
+Ids count rovers from 0 in registration order. Orientation codes are
+0 for E, 1 for S, 2 for W and 3 for N.
+"""
+import csv
+import io
+import itertools
+import json
+import struct
+import sys
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterable, List
+
+from .constants import REPORT_CHUNK_SIZE
+from .exceptions import InvalidInputException
+from .models import Rover
+from .programs import ORIENTATION_ORDER
+
+_RECORD = struct.Struct("<qqqB")
+_ORIENTATION_CODES = {orientation: code for code, orientation
+                      in enumerate(ORIENTATION_ORDER)}
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+_NPY_DESCR = ("[('id', '<i8'), ('x', '<i8'), ('y', '<i8'), "
+              "('orientation', '|u1')]")
+# Header length, magic included, leaving room for any rover count
+_NPY_HEADER_SIZE = 256
+
+
+class ReportWriter(ABC):
+    """Writes rovers to a binary output, one chunk of encoded
+    rovers at a time.
+
+    Args:
+        output (BinaryIO): Binary output to write the report to
+        chunk_size (int, optional): Number of rovers encoded
+        per write
+    """
+
+    def __init__(self, output: BinaryIO,
+                 chunk_size: int = REPORT_CHUNK_SIZE):
+        self._output = output
+        self._chunk_size = chunk_size
+
+    def write_header(self):
+        pass
+
+    @abstractmethod
+    def encode_chunk(self, first_id: int, rovers: List[Rover]) -> bytes:
+        pass
+
+    def write_rovers(self, rovers: Iterable[Rover]) -> int:
+        """Writes the report of every rover.
+
+        Args:
+            rovers (Iterable[Rover]): Rovers in registration order
+
+        Returns:
+            int: Number of rovers written
+        """
+        self.write_header()
+        rovers = iter(rovers)
+        rover_count = 0
+        while True:
+            chunk = list(itertools.islice(rovers, self._chunk_size))
+            if not chunk:
+                return rover_count
+            self._output.write(self.encode_chunk(rover_count, chunk))
+            rover_count += len(chunk)
+
+
+class TextReportWriter(ReportWriter):
+    def encode_chunk(self, first_id: int, rovers: List[Rover]) -> bytes:
+        return "".join([f"{rover.report_status()}\n"
+                        for rover in rovers]).encode()
+
+
+class JSONLinesReportWriter(ReportWriter):
+    def encode_chunk(self, first_id: int, rovers: List[Rover]) -> bytes:
+        dumps = json.dumps
+        return "".join([
+            f'{{"id": {rover_id}, "name": {dumps(rover.name)}, '
+            f'"x": {rover.current_x}, "y": {rover.current_y}, '
+            f'"orientation": "{rover.current_orientation.name}"}}\n'
+            for rover_id, rover in enumerate(rovers, first_id)]).encode()
+
+
+class CSVReportWriter(ReportWriter):
+    def write_header(self):
+        self._output.write(b"id,name,x,y,orientation\r\n")
+
+    def encode_chunk(self, first_id: int, rovers: List[Rover]) -> bytes:
+        # csv quotes names holding commas, quotes or line breaks
+        text = io.StringIO()
+        csv.writer(text).writerows(
+            (rover_id, rover.name, rover.current_x, rover.current_y,
+             rover.current_orientation.name)
+            for rover_id, rover in enumerate(rovers, first_id))
+        return text.getvalue().encode()
+
+
+class BinaryReportWriter(ReportWriter):
+    def encode_chunk(self, first_id: int, rovers: List[Rover]) -> bytes:
+        buffer = bytearray(_RECORD.size * len(rovers))
+        for offset, (rover_id, rover) in zip(
+                range(0, len(buffer), _RECORD.size),
+                enumerate(rovers, first_id)):
+            _RECORD.pack_into(
+                buffer, offset, rover_id, rover.current_x, rover.current_y,
+                _ORIENTATION_CODES[rover.current_orientation])
+        return bytes(buffer)
+
+
+def _npy_header(rover_count: int) -> bytes:
+    header = (f"{{'descr': {_NPY_DESCR}, 'fortran_order': False, "
+              f"'shape': ({rover_count},), }}")
+    padding = _NPY_HEADER_SIZE - len(_NPY_MAGIC) - 2 - len(header) - 1
+    return (_NPY_MAGIC
+            + struct.pack("<H", _NPY_HEADER_SIZE - len(_NPY_MAGIC) - 2)
+            + header.encode() + b" " * padding + b"\n")
+
+
+class NpyReportWriter(BinaryReportWriter):
+    """Writes binary records as a .npy file. The header holds the
+    rover count, so it is written with a count of 0 first and
+    rewritten at the end, which needs a seekable output.
+    """
+
+    def write_rovers(self, rovers: Iterable[Rover]) -> int:
+        start = self._output.tell()
+        self._output.write(_npy_header(0))
+        rover_count = super().write_rovers(rovers)
+
+        end = self._output.tell()
+        self._output.seek(start)
+        self._output.write(_npy_header(rover_count))
+        self._output.seek(end)
+        return rover_count
+
+
+REPORT_WRITERS = {
+    "text": TextReportWriter,
+    "jsonl": JSONLinesReportWriter,
+    "csv": CSVReportWriter,
+    "binary": BinaryReportWriter,
+    "npy": NpyReportWriter,
+}
+
+
+class _StdoutOutput:
+    """Binary output over sys.stdout. Text already written to it is
+    flushed first so lines stay in order, and its raw buffer is
+    written to when it has one.
+    """
+
+    def __init__(self):
+        sys.stdout.flush()
+        self._buffer = getattr(sys.stdout, "buffer", None)
+
+    def write(self, data: bytes):
+        if self._buffer is not None:
+            self._buffer.write(data)
+        else:
+            sys.stdout.write(data.decode())
+
+    def flush(self):
+        if self._buffer is not None:
+            self._buffer.flush()
+        sys.stdout.flush()
+
+
+def write_report(rover_repo, report_format: str = "text",
+                 output: BinaryIO = None) -> int:
+    """Streams the report of every rover of a repository.
+
+    Args:
+        rover_repo (RoverRepo): Repository to report rovers of
+        report_format (str, optional): One of text, jsonl, csv,
+        binary or npy
+        output (BinaryIO, optional): Binary output, stdout by default
+
+    Raises:
+        InvalidInputException: If report format is unknown, or npy
+        is asked for on an output which cannot seek
+
+    Returns:
+        int: Number of rovers written
+    """
+    writer_class = REPORT_WRITERS.get(report_format)
+    if writer_class is None:
+        raise InvalidInputException(f"Unknown report format: {report_format}")
+
+    if output is None:
+        output = _StdoutOutput()
+    if writer_class is NpyReportWriter and not (
+            hasattr(output, "seekable") and output.seekable()):
+        raise InvalidInputException(
+            "npy reports need an output file which can seek")
+
+    rover_count = writer_class(output).write_rovers(rover_repo.iter_rovers())
+    output.flush()
+    return rover_count
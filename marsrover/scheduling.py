@@ -0,0 +1,334 @@
+"""Module for running rovers that cannot interact on parallel threads
+
+Instruction lines are read in windows. Within a window, each line's
+swept area is predicted from its compiled program, assuming every
+earlier line succeeds: it holds the rover's path, its previous
+location released and its new location occupied. Lines whose areas
+overlap are joined into one component of the conflict graph, found
+with a sort and sweep over the areas followed by union find.
+
+Components touch disjoint sets of cells, so they commute and run on
+a thread pool, each one running its lines in input order until its
+first error, or until a line past the lowest failing line found so
+far. A component may still have run such lines before another one
+failed: they are undone, newest first, restoring each rover and its
+plateau location to their state before the line. Rovers, the plateau
+and stored rovers therefore end as a sequential run leaves them, and
+the error with the lowest line number wins. Landings and lines
+needing the repository's current state run on the calling thread
+between windows.
+
+With the GIL, threads run Python code one at a time, so this mode
+orders lines for parallel runs without making them faster. Measured
+with python3 -m marsrover.bench threads on CPython 3.11, it ran short
+instruction lines at about 0.4x the sequential speed, for any thread
+count, and long lines on NumPy gained nothing from more threads.
+It is not offered on the command line until it pays off, on
+free-threaded builds.
+"""
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, TextIO, Tuple
+
+from .constants import SCHEDULER_WINDOW_SIZE
+from .database import RoverRepo
+from .enums import RoverInputType
+from .exceptions import InvalidInputException, InvalidRoverOperationException
+from .models import Plateau, Rover
+from .parsers import (PlateauInputTextParser, RoverLandingTextParser,
+                      RoverMovingTextParser)
+from .programs import ORIENTATION_ORDER
+from .tokenizer import tokenize_rover_input_line
+
+
+class ScheduledLine(NamedTuple):
+    """Instruction line waiting in a scheduling window"""
+    line_number: int
+    byte_offset: Optional[int]
+    rover_name: str
+    payload: str
+
+
+class ScheduledError(NamedTuple):
+    """Error raised while running a scheduled line"""
+    line_number: int
+    byte_offset: Optional[int]
+    exception: Exception
+
+
+class _LineStart(NamedTuple):
+    """State a scheduled line starts from, to undo the line"""
+    x: int
+    y: int
+    heading: int
+    # Whether the rover's location is marked on the plateau, which
+    # only happens once the rover has moved
+    marked: bool
+
+
+def find_conflict_components(
+        areas: List[Tuple[int, int, int, int]]) -> List[List[int]]:
+    """Groups areas into connected components of their overlap graph.
+
+    Args:
+        areas (List[Tuple[int, int, int, int]]): Areas as
+        (min_x, min_y, max_x, max_y), inclusive
+
+    Returns:
+        List[List[int]]: Indexes of areas of each component, in
+        increasing order, components ordered by their first index
+    """
+    parents = list(range(len(areas)))
+
+    def find_root(index):
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    # Sweep along x, only areas still open at min_x can overlap
+    active = []
+    for index in sorted(range(len(areas)), key=lambda i: areas[i][0]):
+        min_x, min_y, max_x, max_y = areas[index]
+        active = [other for other in active if areas[other][2] >= min_x]
+        for other in active:
+            if areas[other][1] <= max_y and min_y <= areas[other][3]:
+                parents[find_root(other)] = find_root(index)
+        active.append(index)
+
+    components = {}
+    for index in range(len(areas)):
+        components.setdefault(find_root(index), []).append(index)
+    return list(components.values())
+
+
+class _Scheduler:
+    def __init__(self, plateau: Plateau, rover_repo: RoverRepo,
+                 moving_parser: RoverMovingTextParser, threads: int):
+        self._plateau = plateau
+        self._rover_repo = rover_repo
+        self._moving_parser = moving_parser
+        self._threads = threads
+        self._executor = (
+            ThreadPoolExecutor(max_workers=threads) if threads > 1 else None)
+        self._window = []
+        self._areas = []
+        self._starts = []
+        # Rover state after the window's lines, as (x, y, heading)
+        self._predicted_states = {}
+        # Lowest failing line number of the running window
+        self._stop_line = None
+        self._stop_lock = threading.Lock()
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown()
+
+    def __len__(self):
+        return len(self._window)
+
+    def add(self, line: ScheduledLine, rover: Rover):
+        """Adds an instruction line of an existing rover to the
+        window, predicting its swept area and resulting state.
+        """
+        state = self._predicted_states.get(line.rover_name)
+        if state is None:
+            x, y = rover.current_x, rover.current_y
+            heading = ORIENTATION_ORDER.index(rover.current_orientation)
+            marked = self._plateau.get_occupant((x, y)) == line.rover_name
+        else:
+            # Lines before have run, and marked the rover, if this runs
+            x, y, heading = state
+            marked = True
+
+        program = Rover.program_cache.get(line.payload)
+        min_dx, min_dy, max_dx, max_dy = program.bounding_boxes[heading]
+        delta_x, delta_y = program.displacements[heading]
+
+        self._window.append(line)
+        self._areas.append((x + min_dx, y + min_dy, x + max_dx, y + max_dy))
+        self._starts.append(_LineStart(x, y, heading, marked))
+        self._predicted_states[line.rover_name] = (
+            x + delta_x, y + delta_y, (heading + program.total_turn) % 4)
+
+    def _run_component(
+            self, lines: List[Tuple[ScheduledLine, _LineStart]]) \
+            -> Tuple[Optional[ScheduledError],
+                     List[Tuple[ScheduledLine, _LineStart]]]:
+        """Runs lines of a component in input order, until its first
+        error or a line past the lowest failing line found so far.
+
+        Returns:
+            Tuple[Optional[ScheduledError], List]: Error of the
+            failing line, None if none failed, and lines run
+        """
+        for index, (line, _) in enumerate(lines):
+            stop_line = self._stop_line
+            if stop_line is not None and line.line_number > stop_line:
+                return None, lines[:index]
+            try:
+                self._moving_parser.parse_rover_input(
+                    line.rover_name, line.payload)
+            except (InvalidInputException,
+                    InvalidRoverOperationException) as ex:
+                with self._stop_lock:
+                    if (self._stop_line is None
+                            or line.line_number < self._stop_line):
+                        self._stop_line = line.line_number
+                return (ScheduledError(line.line_number, line.byte_offset, ex),
+                        lines[:index + 1])
+        return None, lines
+
+    def _run_components(self, components: list) -> list:
+        return [self._run_component(lines) for lines in components]
+
+    def _undo_line(self, line: ScheduledLine, start: _LineStart):
+        """Moves a rover back to where a line started from."""
+        rover = self._rover_repo.get_rover_by_name(line.rover_name)
+        self._plateau.release_location((rover.current_x, rover.current_y))
+        rover.current_x = start.x
+        rover.current_y = start.y
+        rover.current_orientation = ORIENTATION_ORDER[start.heading]
+        if start.marked:
+            self._plateau.occupy_location((start.x, start.y), rover.name)
+        self._rover_repo.update_rover(rover)
+
+    def flush(self) -> Optional[ScheduledError]:
+        """Runs lines of the window up to the lowest failing one,
+        leaving rovers as a sequential run would.
+
+        Returns:
+            ScheduledError: Error of the lowest failing line,
+            None if all lines succeed
+        """
+        if not self._window:
+            return None
+
+        components = [
+            [(self._window[index], self._starts[index])
+             for index in component]
+            for component in find_conflict_components(self._areas)]
+        self._window = []
+        self._areas = []
+        self._starts = []
+        self._predicted_states = {}
+        self._stop_line = None
+
+        if self._executor is None or len(components) == 1:
+            results = self._run_components(components)
+        else:
+            # Largest components first, each to the least loaded thread
+            buckets = [(0, thread, []) for thread in range(self._threads)]
+            for lines in sorted(components, key=len, reverse=True):
+                load, thread, bucket = heapq.heappop(buckets)
+                bucket.append(lines)
+                heapq.heappush(buckets, (load + len(lines), thread, bucket))
+            results = [
+                result
+                for bucket_results in self._executor.map(
+                    self._run_components,
+                    [bucket for _, _, bucket in buckets if bucket])
+                for result in bucket_results]
+
+        errors = [error for error, _ in results if error is not None]
+        if not errors:
+            return None
+        error = min(errors, key=lambda error: error.line_number)
+
+        # Lines past the failing one ran before it failed, components
+        # touch disjoint cells so they are undone one at a time
+        for _, ran_lines in results:
+            for line, start in reversed(ran_lines):
+                if line.line_number <= error.line_number:
+                    break
+                self._undo_line(line, start)
+        return error
+
+
+def parse_input_scheduled(input_file: TextIO, rover_repo: RoverRepo,
+                          threads: int,
+                          window_size: int = SCHEDULER_WINDOW_SIZE):
+    """Parser for input file, running instruction lines of rovers
+    that cannot interact on parallel threads. Registered rovers and
+    raised errors are the same as parse_input.
+
+    Args:
+        input_file (TextIO): TextIO object for user's input,
+        or a MappedInputFile
+        rover_repo (RoverRepo): Repository to register rovers into
+        threads (int): Number of threads, 1 runs in calling thread
+        window_size (int, optional): Maximum number of instruction
+        lines scheduled together
+    """
+    current_line = 1
+    first_line = input_file.readline()
+    try:
+        plateau = PlateauInputTextParser().parse_input_line(first_line)
+    except InvalidInputException as invalid_input_ex:
+        raise InvalidInputException(
+            invalid_input_ex.message, current_line,
+            getattr(input_file, "line_offset", None))
+
+    landing_parser = RoverLandingTextParser(plateau, rover_repo)
+    moving_parser = RoverMovingTextParser(plateau, rover_repo)
+    scheduler = _Scheduler(plateau, rover_repo, moving_parser, threads)
+
+    error = None
+    try:
+        for line in input_file:
+            current_line += 1
+            byte_offset = getattr(input_file, "line_offset", None)
+
+            try:
+                rover_name, input_type, payload = \
+                    tokenize_rover_input_line(line)
+            except InvalidInputException as invalid_input_ex:
+                error = scheduler.flush() or ScheduledError(
+                    current_line, byte_offset, invalid_input_ex)
+                break
+
+            if input_type == RoverInputType.INSTRUCTIONS:
+                # Parser skips these lines, nothing to schedule
+                if not (rover_name and payload):
+                    continue
+
+                rover = rover_repo.get_rover_by_name(rover_name)
+                if rover:
+                    scheduler.add(ScheduledLine(
+                        current_line, byte_offset, rover_name, payload),
+                        rover)
+                    if len(scheduler) >= window_size:
+                        error = scheduler.flush()
+                    if error:
+                        break
+                    continue
+
+            # Landings change the repository, and unknown rovers
+            # raise, so both run after the window in input order
+            error = scheduler.flush()
+            if error:
+                break
+            try:
+                if input_type == RoverInputType.LANDING:
+                    landing_parser.parse_rover_input(rover_name, payload)
+                else:
+                    moving_parser.parse_rover_input(
+                        rover_name, payload)
+            except InvalidInputException as invalid_input_ex:
+                error = ScheduledError(
+                    current_line, byte_offset, invalid_input_ex)
+                break
+
+        else:
+            error = scheduler.flush()
+
+    finally:
+        scheduler.close()
+
+    if error is None:
+        return
+    if isinstance(error.exception, InvalidInputException):
+        raise InvalidInputException(
+            error.exception.message, error.line_number, error.byte_offset)
+    raise error.exception
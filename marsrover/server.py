@@ -0,0 +1,250 @@
+"""Module for a long-lived asyncio mission server
+
+Usage: python3 -m marsrover.server [--unix PATH | --host HOST --port N
+                                   [--allow-remote]]
+
+The server hosts named missions, each with its own plateau and rover
+repository, so callers pay interpreter startup once. Clients send one
+request per line and get replies in request order, requests may be
+pipelined:
+
+    OPEN mission Plateau:5 5           -> OK
+    RUN mission Rover1 Landing:1 2 N   -> OK
+    RUN mission Rover1 Instructions:M  -> OK
+    STATUS mission Rover1              -> OK Rover1:1 3 N
+    STATUS mission                     -> OK 1, then one line per rover
+    CLOSE mission                      -> OK
+
+A failing request gets "ERR <message>", as does a request which is
+not valid UTF-8. Opening a mission already open fails, it must be
+closed first. Rover lines run through the same parsers as
+parse_input, with line numbers counted per mission. A failing line
+does not close its mission, its moves made before the failure are
+kept and the rover occupies the cell it stopped on.
+
+Requests run on a thread pool, so a long instruction line does not
+hold up other clients, and requests to one mission run one at a
+time. A request line longer than SERVER_MAX_LINE_BYTES gets an error
+and its connection is closed, so a client never sending a line end
+cannot grow the server's memory.
+
+Requests are not authenticated, so TCP hosts other than loopback
+addresses are refused unless explicitly allowed.
+"""
+import argparse
+import asyncio
+import ipaddress
+import os
+import threading
+from typing import List
+
+from .constants import SERVER_DEFAULT_PORT, SERVER_MAX_LINE_BYTES
+from .database import RoverMemoryRepo
+from .exceptions import InvalidInputException, InvalidRoverOperationException
+from .missions import Mission
+from .parsers import PlateauInputTextParser
+
+_NEW_LINE = b"\n"
+
+
+def _error_reply(message: str) -> str:
+    return "ERR " + message.replace("\n", "")
+
+
+def is_loopback_host(host: str) -> bool:
+    """Tells whether a TCP host only accepts local clients.
+
+    Args:
+        host (str): localhost or an IP address
+
+    Returns:
+        bool: True for localhost and loopback addresses
+    """
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class MissionServer:
+    """Named missions shared by every connection of a server"""
+
+    def __init__(self):
+        self.missions = {}
+        # Guards missions, and each mission's lock runs its requests
+        # one at a time
+        self._lock = threading.Lock()
+        self._mission_locks = {}
+
+    def handle_request(self, request: str) -> List[str]:
+        """Runs one request, safe to call from several threads.
+
+        Args:
+            request (str): Request line without line ending
+
+        Returns:
+            List[str]: Reply lines
+        """
+        command, _, arguments = request.partition(" ")
+        mission_name, _, argument = arguments.partition(" ")
+        command = command.upper()
+
+        if command == "OPEN":
+            try:
+                plateau = PlateauInputTextParser().parse_input_line(argument)
+            except InvalidInputException as invalid_input_ex:
+                return [_error_reply(str(invalid_input_ex))]
+            with self._lock:
+                if mission_name in self.missions:
+                    return [_error_reply(
+                        f"Mission {mission_name} is already open")]
+                self.missions[mission_name] = Mission(
+                    plateau, RoverMemoryRepo())
+                self._mission_locks[mission_name] = threading.Lock()
+            return ["OK"]
+
+        if command not in ("RUN", "STATUS", "CLOSE"):
+            return [_error_reply(f"Unknown request: {request}")]
+
+        with self._lock:
+            mission = self.missions.get(mission_name)
+            if mission is None:
+                return [_error_reply(
+                    f"Mission {mission_name} does not exist")]
+            if command == "CLOSE":
+                del self.missions[mission_name]
+                del self._mission_locks[mission_name]
+                return ["OK"]
+            mission_lock = self._mission_locks[mission_name]
+
+        with mission_lock:
+            return self._handle_mission_request(mission, command, argument)
+
+    def _handle_mission_request(self, mission: Mission, command: str,
+                                argument: str) -> List[str]:
+        if command == "RUN":
+            try:
+                mission.run_line(argument)
+            except InvalidInputException as invalid_input_ex:
+                return [_error_reply(str(InvalidInputException(
+                    invalid_input_ex.message, mission.line_number)))]
+            except InvalidRoverOperationException as invalid_operation_ex:
+                return [_error_reply(str(invalid_operation_ex))]
+            return ["OK"]
+
+        if argument:
+            rover = mission.rover_repo.get_rover_by_name(argument)
+            if rover is None:
+                return [_error_reply(f"Rover {argument} does not exist")]
+            return [f"OK {rover.report_status()}"]
+
+        reports = [rover.report_status()
+                   for rover in mission.rover_repo.iter_rovers()]
+        return [f"OK {len(reports)}"] + reports
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter):
+        """Serves one client. Each request runs on the loop's thread
+        pool, and nothing more is read until the client has taken
+        its reply, so slow clients are pushed back on.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    request = await reader.readline()
+                except ValueError:
+                    # Reader's limit was reached before a line end
+                    writer.write((_error_reply(
+                        "Request line is longer than "
+                        f"{SERVER_MAX_LINE_BYTES} bytes") + "\n").encode())
+                    await writer.drain()
+                    break
+                # An unterminated last request is dropped
+                if not request.endswith(_NEW_LINE):
+                    break
+
+                try:
+                    request_line = request.decode()
+                except UnicodeDecodeError:
+                    replies = [_error_reply("Request is not valid UTF-8")]
+                else:
+                    replies = await loop.run_in_executor(
+                        None, self.handle_request, request_line.rstrip("\r\n"))
+
+                writer.write(("\n".join(replies) + "\n").encode())
+                await writer.drain()
+
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def serve(mission_server: MissionServer, unix_path: str = None,
+                host: str = "127.0.0.1",
+                port: int = SERVER_DEFAULT_PORT) -> asyncio.AbstractServer:
+    """Starts listening for clients.
+
+    Args:
+        mission_server (MissionServer): Missions to serve
+        unix_path (str, optional): Unix domain socket path, TCP on
+        host and port is used if not given
+        host (str, optional): TCP host, localhost by default
+        port (int, optional): TCP port, 0 picks a free port
+
+    Returns:
+        asyncio.AbstractServer: Started server
+    """
+    if unix_path:
+        return await asyncio.start_unix_server(
+            mission_server.handle_connection, path=unix_path,
+            limit=SERVER_MAX_LINE_BYTES)
+    return await asyncio.start_server(
+        mission_server.handle_connection, host=host, port=port,
+        limit=SERVER_MAX_LINE_BYTES)
+
+
+async def _serve_forever(arguments: argparse.Namespace):
+    server = await serve(MissionServer(), arguments.unix, arguments.host,
+                         arguments.port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        prog="python3 -m marsrover.server",
+        description="Serves named rover missions over a local socket.")
+    parser.add_argument("--unix", metavar="PATH",
+                        help="listens on a Unix domain socket at PATH")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="TCP host, defaults to 127.0.0.1")
+    parser.add_argument("--port", type=int, default=SERVER_DEFAULT_PORT,
+                        help=f"TCP port, defaults to {SERVER_DEFAULT_PORT}")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="allows a --host other than a loopback "
+                             "address, requests are not authenticated")
+    arguments = parser.parse_args(argv)
+    if (not arguments.unix and not arguments.allow_remote
+            and not is_loopback_host(arguments.host)):
+        parser.error(f"refusing to listen on non-loopback host "
+                     f"{arguments.host} without --allow-remote")
+
+    try:
+        asyncio.run(_serve_forever(arguments))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if arguments.unix and os.path.exists(arguments.unix):
+            os.remove(arguments.unix)
+
+
+if __name__ == '__main__':
+    main()
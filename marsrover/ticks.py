@@ -0,0 +1,296 @@
+"""Module for tick-synchronous missions, where all rovers move at once
+
+Every rover's instruction lines are queued in input order, then at
+each tick every rover with commands left runs its next one at the
+same time. Fleet positions and headings are kept in NumPy arrays, and
+each tick is a handful of vector operations over the whole fleet.
+
+Rules of a tick:
+
+- Turns always succeed.
+- A move leaving the plateau is blocked.
+- Rovers moving to the same cell: the rover landed first moves, the
+  others are blocked.
+- Two rovers moving into each other's cell are both blocked.
+- A move into the cell of a rover which stays put, because it turns,
+  has no command left or is blocked itself, is blocked.
+
+Blocked rovers stay where they are and the command is used up, no
+error is raised. Rovers moving in a ring of three or more follow each
+other. Unlike sequential missions, a rover occupies its landing cell
+from the moment it lands.
+"""
+from typing import List, TextIO
+
+import numpy
+
+from .database import RoverRepo
+from .enums import RoverInputType
+from .exceptions import InvalidInputException
+from .metrics import NULL_METRICS, Metrics
+from .models import (DEFAULT_PLATEAU_SETTINGS, Plateau, PlateauSettings,
+                     Rover)
+from .parsers import PlateauInputTextParser, RoverLandingTextParser
+from .programs import ORIENTATION_ORDER, UNKNOWN_COMMAND_PATTERN
+from .tokenizer import tokenize_rover_input_line
+
+_STEPS_X = numpy.array([orientation.value[0]
+                        for orientation in ORIENTATION_ORDER])
+_STEPS_Y = numpy.array([orientation.value[1]
+                        for orientation in ORIENTATION_ORDER])
+# Clockwise quarter turns of each command byte, moves turn by 0
+_TURNS = numpy.zeros(256, dtype=numpy.int8)
+_TURNS[ord("R")] = 1
+_TURNS[ord("L")] = 3
+_MOVE = ord("M")
+
+
+class TickSimulation:
+    """Fleet of rovers moving one command per tick.
+
+    Args:
+        plateau (Plateau): Plateau the rovers are on, for its bounds
+        rovers (List[Rover]): Rovers in landing order, which is also
+        their priority order, on distinct cells
+        programs (List[str]): Instruction string of each rover,
+        made of L, R and M commands only
+    """
+
+    def __init__(self, plateau: Plateau, rovers: List[Rover],
+                 programs: List[str]):
+        self._plateau = plateau
+        self._rovers = rovers
+        self._width = plateau.max_x + 1
+
+        self.x = numpy.array([rover.current_x for rover in rovers],
+                             dtype=numpy.int64)
+        self.y = numpy.array([rover.current_y for rover in rovers],
+                             dtype=numpy.int64)
+        self.headings = numpy.array(
+            [ORIENTATION_ORDER.index(rover.current_orientation)
+             for rover in rovers], dtype=numpy.int8)
+        self._cells = self.y * self._width + self.x
+
+        self._commands = numpy.frombuffer(
+            "".join(programs).encode("ascii"), dtype=numpy.uint8)
+        self._lengths = numpy.array([len(program) for program in programs],
+                                    dtype=numpy.int64)
+        self._starts = numpy.zeros(len(programs), dtype=numpy.int64)
+        numpy.cumsum(self._lengths[:-1], out=self._starts[1:])
+        # Rovers with commands left, shrunk as programs end
+        self._active = numpy.flatnonzero(self._lengths)
+
+        self.tick = 0
+        self.moves = 0
+        self.blocked_moves = 0
+
+    def step(self) -> bool:
+        """Runs one tick.
+
+        Returns:
+            bool: False if no rover had a command left
+        """
+        active = self._active = self._active[
+            self._lengths[self._active] > self.tick]
+        if not len(active):
+            return False
+
+        codes = self._commands[self._starts[active] + self.tick]
+        self.tick += 1
+        self.headings[active] = (self.headings[active] + _TURNS[codes]) % 4
+
+        movers = active[codes == _MOVE]
+        headings = self.headings[movers]
+        target_x = self.x[movers] + _STEPS_X[headings]
+        target_y = self.y[movers] + _STEPS_Y[headings]
+        inside = ((target_x >= 0) & (target_x <= self._plateau.max_x)
+                  & (target_y >= 0) & (target_y <= self._plateau.max_y))
+        self.blocked_moves += len(movers) - int(inside.sum())
+        movers = movers[inside]
+        if not len(movers):
+            return True
+        target_x = target_x[inside]
+        target_y = target_y[inside]
+        targets = target_y * self._width + target_x
+
+        blocked = self._find_blocked_moves(movers, targets)
+        moved = ~blocked
+        self.moves += int(moved.sum())
+        self.blocked_moves += int(blocked.sum())
+        movers = movers[moved]
+        self.x[movers] = target_x[moved]
+        self.y[movers] = target_y[moved]
+        self._cells[movers] = targets[moved]
+        return True
+
+    def _find_blocked_moves(self, movers: numpy.ndarray,
+                            targets: numpy.ndarray) -> numpy.ndarray:
+        """Resolves conflicts between moves to cells on the plateau.
+
+        Args:
+            movers (numpy.ndarray): Ascending ids of moving rovers
+            targets (numpy.ndarray): Linearised target cell of each
+
+        Returns:
+            numpy.ndarray: Whether each move is blocked
+        """
+        # Same cell, sorting is stable so the lowest id comes first
+        order = numpy.argsort(targets, kind="stable")
+        sorted_targets = targets[order]
+        blocked = numpy.zeros(len(movers), dtype=bool)
+        blocked[order[1:]] = sorted_targets[1:] == sorted_targets[:-1]
+
+        # Rover currently on each target cell, -1 if free
+        cells = self._cells
+        cell_order = numpy.argsort(cells)
+        sorted_cells = cells[cell_order]
+        found = numpy.minimum(numpy.searchsorted(sorted_cells, targets),
+                              len(cells) - 1)
+        occupants = numpy.where(sorted_cells[found] == targets,
+                                cell_order[found], -1)
+        occupied = occupants >= 0
+        occupants = occupants[occupied]
+
+        # Swaps, occupant moving to the mover's cell
+        target_cells = numpy.full(len(cells), -1, dtype=numpy.int64)
+        target_cells[movers] = targets
+        blocked[occupied] |= target_cells[occupants] == cells[movers[occupied]]
+
+        # Occupants staying put block moves into their cells, which
+        # may make them block others in turn
+        moving = numpy.zeros(len(cells), dtype=bool)
+        while True:
+            moving[movers] = ~blocked
+            newly_blocked = ~blocked[occupied] & ~moving[occupants]
+            if not newly_blocked.any():
+                return blocked
+            blocked[numpy.flatnonzero(occupied)[newly_blocked]] = True
+
+    def run(self) -> int:
+        """Runs ticks until every program has ended.
+
+        Returns:
+            int: Number of ticks run
+        """
+        while self.step():
+            pass
+        return self.tick
+
+    def write_back(self, rover_repo: RoverRepo):
+        """Copies fleet state back to the rovers, the plateau's
+        occupied locations and the rover repository.
+
+        Args:
+            rover_repo (RoverRepo): Repository holding the rovers
+        """
+        plateau = self._plateau
+        # Every cell is released first, rovers may have moved into
+        # cells left by others
+        for rover in self._rovers:
+            plateau.release_location((rover.current_x, rover.current_y))
+        for rover, x, y, heading in zip(self._rovers, self.x.tolist(),
+                                        self.y.tolist(),
+                                        self.headings.tolist()):
+            rover.current_x = x
+            rover.current_y = y
+            rover.current_orientation = ORIENTATION_ORDER[heading]
+            plateau.occupy_location((x, y), rover.name)
+            rover_repo.update_rover(rover)
+
+
+def load_tick_mission(input_file: TextIO, rover_repo: RoverRepo,
+                      metrics: Metrics = NULL_METRICS,
+                      plateau_settings: PlateauSettings =
+                      DEFAULT_PLATEAU_SETTINGS) -> TickSimulation:
+    """Lands the rovers of a mission and queues their instructions.
+
+    Args:
+        input_file (TextIO): TextIO object for user's input,
+        or a MappedInputFile
+        rover_repo (RoverRepo): Repository to register rovers into
+        metrics (Metrics, optional): Metrics recording tokenizing
+        and landings
+        plateau_settings (PlateauSettings, optional): Occupancy
+        settings of the mission's plateau, blocked moves follow
+        the rules of a tick
+
+    Raises:
+        InvalidInputException: If a line is invalid, a landing
+        location is taken or instructions are for an unknown rover,
+        with the line number
+
+    Returns:
+        TickSimulation: Simulation of the landed rovers, before
+        the first tick
+    """
+    line_number = 1
+    rover_ids = {}
+    rovers = []
+    programs = []
+    try:
+        plateau = PlateauInputTextParser(
+            metrics, plateau_settings).parse_input_line(input_file.readline())
+        land_rover = metrics.instrument("land", RoverLandingTextParser(
+            plateau, rover_repo, metrics=metrics).parse_rover_input)
+        tokenize = metrics.instrument(
+            "tokenize", tokenize_rover_input_line, "lines")
+        for line in input_file:
+            line_number += 1
+            record = tokenize(line)
+            if not (record.name and record.payload):
+                continue
+
+            if record.kind is RoverInputType.LANDING:
+                land_rover(record.name, record.payload)
+                rover = rover_repo.get_rover_by_name(record.name)
+                plateau.occupy_location(
+                    (rover.current_x, rover.current_y), rover.name)
+                rover_ids[record.name] = len(rovers)
+                rovers.append(rover)
+                programs.append([])
+                continue
+
+            rover_id = rover_ids.get(record.name)
+            if rover_id is None:
+                raise InvalidInputException(
+                    f"Rover {record.name} does not exist")
+            unknown_command = UNKNOWN_COMMAND_PATTERN.search(record.payload)
+            if unknown_command:
+                raise InvalidInputException(
+                    f"Unknown rover instruction: {unknown_command.group()}")
+            programs[rover_id].append(record.payload)
+
+    except InvalidInputException as invalid_input_ex:
+        raise InvalidInputException(
+            invalid_input_ex.message, line_number,
+            getattr(input_file, "line_offset", None))
+
+    return TickSimulation(plateau, rovers,
+                          ["".join(program) for program in programs])
+
+
+def run_tick_mission(input_file: TextIO, rover_repo: RoverRepo,
+                     metrics: Metrics = NULL_METRICS,
+                     plateau_settings: PlateauSettings =
+                     DEFAULT_PLATEAU_SETTINGS) -> TickSimulation:
+    """Runs a mission with every rover moving at each tick.
+
+    Args:
+        input_file (TextIO): TextIO object for user's input,
+        or a MappedInputFile
+        rover_repo (RoverRepo): Repository to register rovers into
+        metrics (Metrics, optional): Metrics recording the mission,
+        ticks run as a whole within the parse stage
+        plateau_settings (PlateauSettings, optional): Occupancy
+        settings of the mission's plateau
+
+    Returns:
+        TickSimulation: Finished simulation, with its tick, move
+        and blocked move counts
+    """
+    with metrics.stage("parse"):
+        simulation = load_tick_mission(
+            input_file, rover_repo, metrics, plateau_settings)
+        simulation.run()
+        simulation.write_back(rover_repo)
+    return simulation
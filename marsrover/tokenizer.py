@@ -0,0 +1,89 @@
+"""Module for rover input tokenizing
+
+A line is classified and split into a typed record by one call, with
+str methods running in C instead of list building splits. A regex
+grammar over whole lines was tried and left out: it is slower on long
+instruction strings, and case-insensitive regex matching accepts
+keyword spellings such as "\u0130nstructions" that str.upper() does
+not, which would change the lines accepted.
+"""
+from typing import NamedTuple, Tuple
+
+from .enums import RoverInputType
+from .exceptions import InvalidInputException
+
+_LANDING_KEYWORD = RoverInputType.LANDING.value
+_INSTRUCTIONS_KEYWORD = RoverInputType.INSTRUCTIONS.value
+
+
+class RoverInputRecord(NamedTuple):
+    """Typed record of one rover input line"""
+    name: str
+    kind: RoverInputType
+    payload: str
+
+
+def classify_rover_input_line(input_line: str) -> RoverInputType:
+    """Finds out the input type of a rover input line.
+    Keywords are searched anywhere in the line regardless
+    of case, landing takes precedence over instructions.
+
+    Args:
+        input_line (str): Rover input line
+
+    Raises:
+        InvalidInputException: If no known keyword is found
+
+    Returns:
+        RoverInputType: Input type of the line
+    """
+    upper_line = input_line.upper()
+    if _LANDING_KEYWORD in upper_line:
+        return RoverInputType.LANDING
+    if _INSTRUCTIONS_KEYWORD in upper_line:
+        return RoverInputType.INSTRUCTIONS
+
+    raise InvalidInputException(
+        f"Unknown rover input type: {input_line}")
+
+
+def split_rover_input_line(input_line: str) -> Tuple[str, str]:
+    """Splits a rover input line into rover name and payload
+    without building intermediate lists. The line is scanned
+    once for colons, only the header is scanned for spaces.
+
+    Args:
+        input_line (str): Rover input line
+        valid sample: "Rover1 Landing:1 2 N"
+
+    Raises:
+        InvalidInputException: If none or more than one colon found from input
+        InvalidInputException: If none or more than one space found from input header part
+
+    Returns:
+        Tuple[str, str]: Rover name and stripped payload
+    """
+    # Scans up to the first colon, then the rest for a second one
+    header, colon, payload = input_line.partition(":")
+    if not colon or ":" in payload:
+        raise InvalidInputException("Invalid Rover input")
+
+    header = header.strip()
+    if header.count(" ") != 1:
+        raise InvalidInputException("Invalid Rover input")
+
+    return header.partition(" ")[0], payload.strip()
+
+
+def tokenize_rover_input_line(input_line: str) -> RoverInputRecord:
+    """Classifies and splits a rover input line.
+
+    Args:
+        input_line (str): Rover input line
+
+    Returns:
+        RoverInputRecord: Typed record of the line
+    """
+    kind = classify_rover_input_line(input_line)
+    name, payload = split_rover_input_line(input_line)
+    return RoverInputRecord(name, kind, payload)
@@ -0,0 +1,249 @@
+"""Module for checking mission input syntax in parallel
+
+The input file is split into byte ranges aligned to line boundaries,
+which worker processes check and tokenize independently. Line numbers
+are made global afterwards by counting the lines of the ranges before.
+
+Only syntax is checked, which needs no mission state: the plateau
+line, the rover line format, landing coordinates and orientation, and
+instruction commands. Errors depending on mission state, such as
+collisions or unknown rovers, are still found by running the mission.
+"""
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import (TYPE_CHECKING, Iterator, List, NamedTuple, Optional,
+                    Tuple)
+
+from .constants import VALIDATION_CHUNK_BYTES
+from .database import RoverRepo
+from .enums import Orientation, RoverInputType
+from .exceptions import InvalidInputException
+from .metrics import NULL_METRICS, Metrics
+from .missions import LineError, parse_input
+from .models import DEFAULT_PLATEAU_SETTINGS, PlateauSettings
+from .parsers import PlateauInputTextParser
+from .programs import UNKNOWN_COMMAND_PATTERN
+from .readers import MappedInputFile
+from .tokenizer import RoverInputRecord, tokenize_rover_input_line
+
+if TYPE_CHECKING:
+    from .journal import MoveJournalWriter
+
+_NEW_LINE = b"\n"
+
+
+class ValidationReport(NamedTuple):
+    """Outcome of a validation pass over a whole input"""
+    line_count: int
+    errors: List[InvalidInputException]
+
+    def iter_error_lines(self) -> Iterator[str]:
+        """Describes each error on one line, with its line number
+        and byte offset.
+        """
+        for error in self.errors:
+            yield (f"Line {error.line_number} (byte offset "
+                   f"{error.byte_offset}): {error.message.rstrip()}")
+
+
+class _ChunkResult(NamedTuple):
+    line_count: int
+    # Line index within the chunk, byte offset and message per error
+    errors: List[Tuple[int, int, str]]
+
+
+def split_line_ranges(input_path: str,
+                      chunk_bytes: int = VALIDATION_CHUNK_BYTES) \
+        -> List[Tuple[int, int]]:
+    """Splits a file into byte ranges of about chunk_bytes, each
+    starting at a line start and ending after a line ending.
+
+    Returns:
+        List[Tuple[int, int]]: Start and end offsets of each range
+    """
+    size = os.path.getsize(input_path)
+    if not size:
+        return []
+
+    with open(input_path, "rb") as input_file, mmap.mmap(
+            input_file.fileno(), 0, access=mmap.ACCESS_READ) as input_map:
+        ranges = []
+        start = 0
+        while start < size:
+            end = input_map.find(_NEW_LINE, start + chunk_bytes - 1) + 1
+            if not end:
+                end = size
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def check_rover_record(record: RoverInputRecord):
+    """Checks syntax of a tokenized rover line, raising the same
+    errors as the parsers would.
+
+    Args:
+        record (RoverInputRecord): Tokenized rover line
+
+    Raises:
+        InvalidInputException: If landing input or instructions
+        are malformed
+    """
+    # Parsers skip lines without a name or payload
+    if not (record.name and record.payload):
+        return
+
+    if record.kind is RoverInputType.INSTRUCTIONS:
+        unknown_command = UNKNOWN_COMMAND_PATTERN.search(record.payload)
+        if unknown_command:
+            raise InvalidInputException(
+                f"Unknown rover instruction: {unknown_command.group()}")
+        return
+
+    landing_input_parts = record.payload.split(" ")
+    if len(landing_input_parts) != 3:
+        raise InvalidInputException("Invalid rover landing input")
+
+    try:
+        int(landing_input_parts[0])
+        int(landing_input_parts[1])
+    except ValueError:
+        raise InvalidInputException(
+            f"Invalid rover landing coordinates input: {record.payload}")
+
+    if landing_input_parts[2].upper() not in Orientation.__members__:
+        raise InvalidInputException(
+            f"Invalid rover orientation input: {landing_input_parts[2]}")
+
+
+def _scan_range(input_path: str, start: int, end: int) -> _ChunkResult:
+    """Checks lines of one byte range. Runs in a worker process."""
+    errors = []
+    line_index = 0
+    with MappedInputFile(input_path) as input_file:
+        input_file.seek(start)
+        while input_file.tell() < end:
+            line = input_file.readline()
+            try:
+                if start == 0 and line_index == 0:
+                    PlateauInputTextParser().parse_input_line(line)
+                else:
+                    check_rover_record(tokenize_rover_input_line(line))
+            except InvalidInputException as invalid_input_ex:
+                errors.append((line_index, input_file.line_offset,
+                               invalid_input_ex.message))
+            line_index += 1
+
+    return _ChunkResult(line_index, errors)
+
+
+def _iter_chunk_results(input_path: str, workers: Optional[int],
+                        chunk_bytes: int) -> Iterator[_ChunkResult]:
+    """Scans byte ranges across a process pool, yielding results in
+    file order. Only a few ranges per worker are scanned ahead of
+    the caller.
+    """
+    ranges = split_line_ranges(input_path, chunk_bytes)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(ranges) < 2:
+        for start, end in ranges:
+            yield _scan_range(input_path, start, end)
+        return
+
+    window_size = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_scan_range, input_path, start, end)
+            for start, end in ranges[:window_size]]
+        for start, end in ranges[window_size:]:
+            yield futures.pop(0).result()
+            futures.append(executor.submit(
+                _scan_range, input_path, start, end))
+        for future in futures:
+            yield future.result()
+
+
+def _check_input_path(input_path: str):
+    if not os.path.isfile(input_path):
+        raise InvalidInputException(f"Input file not found: {input_path}")
+
+
+def validate_input(input_path: str, workers: int = None,
+                   chunk_bytes: int = VALIDATION_CHUNK_BYTES) \
+        -> ValidationReport:
+    """Checks syntax of every line of a mission input file.
+
+    Args:
+        input_path (str): Path to the mission input file
+        workers (int, optional): Number of worker processes,
+        defaults to number of CPUs, 1 runs in this process
+        chunk_bytes (int, optional): Approximate size of the
+        byte range checked by a worker at once
+
+    Raises:
+        InvalidInputException: If input file does not exist
+
+    Returns:
+        ValidationReport: Line count and every syntax error found,
+        with global line numbers and byte offsets, in file order
+    """
+    _check_input_path(input_path)
+    line_count = 0
+    errors = []
+    for chunk in _iter_chunk_results(input_path, workers, chunk_bytes):
+        errors.extend(
+            InvalidInputException(message, line_count + line_index + 1,
+                                  byte_offset)
+            for line_index, byte_offset, message in chunk.errors)
+        line_count += chunk.line_count
+    return ValidationReport(line_count, errors)
+
+
+def parse_input_validated(input_path: str, rover_repo: RoverRepo,
+                          workers: int = None,
+                          chunk_bytes: int = VALIDATION_CHUNK_BYTES,
+                          error_log: List[LineError] = None,
+                          journal: 'MoveJournalWriter' = None,
+                          metrics: Metrics = NULL_METRICS,
+                          plateau_settings: PlateauSettings =
+                          DEFAULT_PLATEAU_SETTINGS) -> ValidationReport:
+    """Validates a mission input file in parallel, then runs it
+    with parse_input in a second, streaming pass. The mission is
+    only run if no syntax error is found, and then gives the same
+    rovers and errors as parse_input.
+
+    Args:
+        input_path (str): Path to the mission input file
+        rover_repo (RoverRepo): Repository to register rovers into
+        workers (int, optional): Number of worker processes,
+        defaults to number of CPUs, 1 runs in this process
+        chunk_bytes (int, optional): Approximate size of the
+        byte range checked by a worker at once
+        error_log (List[LineError], optional): Keeps going after a
+        failing rover line, appending its error here instead of
+        raising
+        journal (MoveJournalWriter, optional): Journal recording
+        rover states as lines run
+        metrics (Metrics, optional): Metrics recording the stages
+        of the mission run, the validation pass is not recorded
+        plateau_settings (PlateauSettings, optional): Occupancy and
+        blocked move settings of the mission's plateau
+
+    Raises:
+        InvalidInputException: If input file does not exist
+        InvalidInputException: If input file is empty
+
+    Returns:
+        ValidationReport: Result of the validation pass, the
+        mission has not been run if it holds any error
+    """
+    report = validate_input(input_path, workers, chunk_bytes)
+    if report.errors:
+        return report
+
+    with MappedInputFile(input_path, metrics=metrics) as input_file:
+        parse_input(input_file, rover_repo, error_log=error_log,
+                    journal=journal, metrics=metrics,
+                    plateau_settings=plateau_settings)
+    return report
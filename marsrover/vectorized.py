@@ -0,0 +1,123 @@
+"""Module for NumPy based execution of long instruction strings"""
+from .exceptions import InvalidInputException, InvalidRoverOperationException
+from .programs import ORIENTATION_ORDER, UNKNOWN_COMMAND_PATTERN
+
+# NumPy is optional and slow to import, so it is imported on first
+# use, rovers fall back to compiled programs without it
+numpy = None
+_numpy_checked = False
+
+
+def is_available() -> bool:
+    """Checks whether the vectorized engine can be used,
+    importing NumPy on the first call.
+
+    Returns:
+        bool: True if NumPy is installed
+    """
+    global numpy, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_checked = True
+    return numpy is not None
+
+
+def _border_message(plateau, x: int, y: int) -> str:
+    """Builds the same message Plateau.verify_target_location would
+    raise for a rejected target location.
+    """
+    if x < 0:
+        return "Crossing left border"
+    if x > plateau.max_x:
+        return "Crossing right border"
+    if y < 0:
+        return "Crossing lower border"
+    if y > plateau.max_y:
+        return "Crossing upper border"
+    return "Collision detected"
+
+
+def execute_commands_vectorized(rover, commands: str):
+    """Executes a series of movement command characters with
+    prefix sums instead of one call per command.
+    Final state, partial state on errors and raised errors are
+    the same as executing commands one by one.
+
+    Args:
+        rover (Rover): Rover to move
+        commands (str): Input string consists of a series
+        of character commands
+
+    Raises:
+        InvalidRoverOperationException: If a move crosses a border
+        or collides, raised for the first failing move
+        InvalidInputException: If an unknown command is reached
+    """
+    plateau = rover.plateau
+    original_location = (rover.current_x, rover.current_y)
+
+    unknown_command = UNKNOWN_COMMAND_PATTERN.search(commands)
+    valid_length = (
+        unknown_command.start() if unknown_command else len(commands))
+
+    codes = numpy.frombuffer(
+        commands[:valid_length].encode("ascii"), dtype=numpy.uint8)
+    turns = numpy.zeros(valid_length, dtype=numpy.int64)
+    turns[codes == ord('R')] = 1
+    turns[codes == ord('L')] = -1
+    is_move = codes == ord('M')
+
+    # Heading after each command, then position after each command
+    start_heading = ORIENTATION_ORDER.index(rover.current_orientation)
+    headings = (start_heading + numpy.cumsum(turns)) % 4
+    step_x = numpy.array([o.value[0] for o in ORIENTATION_ORDER])
+    step_y = numpy.array([o.value[1] for o in ORIENTATION_ORDER])
+    xs = rover.current_x + numpy.cumsum(step_x[headings] * is_move)
+    ys = rover.current_y + numpy.cumsum(step_y[headings] * is_move)
+
+    failing_index = None
+    if valid_length and (
+            xs.min() < 0 or xs.max() > plateau.max_x
+            or ys.min() < 0 or ys.max() > plateau.max_y):
+        out_of_borders = ((xs < 0) | (xs > plateau.max_x)
+                          | (ys < 0) | (ys > plateau.max_y))
+        failing_index = int(numpy.argmax(out_of_borders))
+
+    # Only moves before the first border crossing can collide, and
+    # only cells on their path are looked up
+    checked_length = valid_length if failing_index is None else failing_index
+    move_indexes = numpy.flatnonzero(is_move[:checked_length])
+    if len(move_indexes):
+        path_ids = (ys[move_indexes] * (plateau.max_x + 1)
+                    + xs[move_indexes])
+        collisions = plateau.find_occupied_cells(path_ids)
+        if collisions.any():
+            failing_index = int(move_indexes[numpy.argmax(collisions)])
+
+    stop_index = valid_length if failing_index is None else failing_index
+    if stop_index:
+        rover.current_x = int(xs[stop_index - 1])
+        rover.current_y = int(ys[stop_index - 1])
+    try:
+        if failing_index is not None:
+            # The failing move still sees turns made before it
+            rover.current_orientation = ORIENTATION_ORDER[
+                int(headings[failing_index])]
+            raise InvalidRoverOperationException(
+                _border_message(plateau, int(xs[failing_index]),
+                                int(ys[failing_index])),
+                rover.name)
+
+        if stop_index:
+            rover.current_orientation = ORIENTATION_ORDER[
+                int(headings[stop_index - 1])]
+        if unknown_command:
+            raise InvalidInputException(
+                f"Unknown rover instruction: {unknown_command.group()}")
+    finally:
+        # Moves made before an error are kept, so the plateau must
+        # know where the rover stopped
+        rover.update_location_on_plateau(original_location)
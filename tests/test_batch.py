@@ -0,0 +1,45 @@
+import pytest
+from marsrover.batch import (print_batch_results, resolve_batch_inputs,
+                             run_batch)
+
+
+@pytest.fixture()
+def batch_dir(tmp_path):
+    missions = {
+        "a.txt": "Plateau:5 5\nRover1 Landing:1 2 N\n"
+                 "Rover1 Instructions:LMLMLMLMM\n",
+        "b.txt": "Plateau:5 5\nRover1 Restart:1 2 N\n",
+        "c.txt": "Plateau:5 5\nRover2 Landing:3 3 E\n"
+                 "Rover2 Instructions:MMRMMRMRRM\n",
+    }
+    for file_name, content in missions.items():
+        (tmp_path / file_name).write_text(content)
+    return tmp_path
+
+
+def test_resolve_batch_inputs(batch_dir):
+    expected = [str(batch_dir / name) for name in ("a.txt", "b.txt", "c.txt")]
+    assert resolve_batch_inputs(str(batch_dir)) == expected
+    assert resolve_batch_inputs(str(batch_dir / "*.txt")) == expected
+
+    manifest = batch_dir / "missions.manifest"
+    manifest.write_text("c.txt\n\na.txt\n")
+    assert resolve_batch_inputs(str(manifest)) == [
+        str(batch_dir / "c.txt"), str(batch_dir / "a.txt")]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch(batch_dir, workers, capsys):
+    input_paths = resolve_batch_inputs(str(batch_dir / "*.txt"))
+    results = list(run_batch(input_paths, workers))
+
+    assert [result.input_path for result in results] == input_paths
+    assert results[0].report == "Rover1:1 3 N\n"
+    assert results[1].error.endswith("Unknown rover input type: "
+                                     "Rover1 Restart:1 2 N\n")
+    assert results[2].report == "Rover2:5 1 E\n"
+
+    assert print_batch_results(results) == (2, 1)
+    output = capsys.readouterr().out
+    assert output.endswith(
+        "Missions: 3, succeeded: 2, failed: 1, rovers: 2\n")
@@ -0,0 +1,113 @@
+import io
+import json
+import random
+
+import pytest
+from marsrover.bench import (Scenario, build_lane_trip, build_mission,
+                             build_mission_lines, compare_results,
+                             iter_scenarios, main, run_scenario,
+                             run_threads_benchmark)
+from marsrover.database import RoverMemoryRepo
+from marsrover.missions import parse_input
+from marsrover.programs import CompiledProgram
+
+
+@pytest.fixture()
+def tiny_matrix():
+    return {
+        "plateau_size": [4, 8],
+        "rover_count": [1, 3],
+        "instruction_length": [5, 40],
+        "occupancy_density": [0.0, 0.5],
+    }
+
+
+@pytest.mark.parametrize("length", [1, 2, 5, 10, 37, 200])
+@pytest.mark.parametrize("run", [1, 2, 9])
+def test_lane_trip_stays_in_lane(length, run):
+    commands = build_lane_trip(random.Random(0), length, run)
+    program = CompiledProgram(commands)
+    west = 2
+    assert len(commands) <= max(length, run + 2)
+    assert program.displacements[west] == (run, 0)
+    assert program.total_turn == 2
+    # Never steps back on its start cell, never leaves the lane
+    assert program.bounding_boxes[west] == (0, 0, run, 0)
+    assert not program.revisits_origin
+
+
+def test_iter_scenarios_skips_missing_lanes(tiny_matrix):
+    scenarios = iter_scenarios(tiny_matrix)
+    assert Scenario(4, 3, 5, 0.0) not in scenarios
+    assert Scenario(8, 3, 5, 0.0) in scenarios
+
+
+def test_scenarios_run_without_errors(tiny_matrix):
+    for scenario in iter_scenarios(tiny_matrix):
+        mission, instruction_lines = build_mission(scenario)
+        for _ in range(2):
+            for line in instruction_lines:
+                mission.run_line(line)
+
+
+def test_run_scenario_metrics():
+    result = run_scenario(Scenario(10, 2, 20, 0.3), repeat=1)
+    assert result["lines"] == 40
+    assert set(result["metrics"]) == {
+        "lines_per_second", "commands_per_second", "parse_lines_per_second",
+        "latency_p50_us", "latency_p90_us", "latency_p99_us",
+        "latency_max_us", "peak_memory_bytes"}
+    assert result["metrics"]["latency_p50_us"] <= \
+        result["metrics"]["latency_p99_us"]
+
+
+def test_mission_lines_parse_as_built_mission():
+    scenario = Scenario(10, 2, 20, 0.3)
+    setup_lines, instruction_lines = build_mission_lines(scenario)
+    repo = RoverMemoryRepo()
+    parse_input(io.StringIO("".join(
+        f"{line}\n" for line in setup_lines + instruction_lines)), repo)
+    mission, built_lines = build_mission(scenario)
+    for line in built_lines:
+        mission.run_line(line)
+    assert built_lines == instruction_lines
+    assert [(rover.name, rover.current_x, rover.current_y,
+             rover.current_orientation) for rover in repo.iter_rovers()] == \
+        [(rover.name, rover.current_x, rover.current_y,
+          rover.current_orientation)
+         for rover in mission.rover_repo.iter_rovers()]
+
+
+def test_compare_results_flags_regressions():
+    baseline = {"scenarios": [{"name": "a", "metrics": {
+        "lines_per_second": 100.0, "latency_p99_us": 10.0}}]}
+    current = {"scenarios": [{"name": "a", "metrics": {
+        "lines_per_second": 95.0, "latency_p99_us": 12.0}},
+        {"name": "b", "metrics": {"lines_per_second": 1.0}}]}
+    regressions = compare_results(baseline, current, threshold=0.1)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("a: latency_p99_us")
+    assert compare_results(baseline, current, threshold=0.25) == []
+
+
+def test_compare_command_exit_code(tmp_path, capsys):
+    baseline_path = tmp_path / "baseline.json"
+    current_path = tmp_path / "current.json"
+    baseline_path.write_text(json.dumps({"scenarios": [
+        {"name": "a", "metrics": {"commands_per_second": 100.0}}]}))
+    current_path.write_text(json.dumps({"scenarios": [
+        {"name": "a", "metrics": {"commands_per_second": 50.0}}]}))
+
+    assert main(["compare", str(baseline_path), str(current_path)]) == 1
+    assert main(["compare", str(baseline_path), str(baseline_path)]) == 0
+    assert "Regressions: 0" in capsys.readouterr().out
+
+
+def test_threads_benchmark(capsys):
+    results = run_threads_benchmark([1, 2], rover_count=20, repeat=1)
+    assert list(results) == ["sequential", "threads=1", "threads=2"]
+    assert all(lines_per_second > 0 for lines_per_second in results.values())
+
+    assert main(["threads", "--threads", "2", "--rovers", "5",
+                 "--repeat", "1"]) == 0
+    assert capsys.readouterr().out.startswith("sequential: ")
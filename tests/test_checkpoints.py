@@ -0,0 +1,153 @@
+import io
+import os
+import random
+
+import pytest
+from marsrover.checkpoints import (CheckpointWriter, load_checkpoint,
+                                   resume_mission, write_checkpoint)
+from marsrover.database import RoverMemoryRepo, RoverSQLiteRepo
+from marsrover.exceptions import (InvalidInputException,
+                                  InvalidRoverOperationException)
+from marsrover.missions import parse_input
+from marsrover.readers import MappedInputFile
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingCheckpointWriter(CheckpointWriter):
+    def __init__(self, path, every_lines, crash_after_lines):
+        super().__init__(path, every_lines)
+        self._lines_left = crash_after_lines
+
+    def line_done(self, mission, input_file):
+        super().line_done(mission, input_file)
+        self._lines_left -= 1
+        if not self._lines_left:
+            raise Crash()
+
+
+def random_mission(rng, line_count):
+    size = rng.randint(5, 30)
+    lines = [f"Plateau ÄÖ:{size} {size}"]
+    names = []
+    for _ in range(line_count):
+        if not names or rng.random() < 0.2:
+            name = f"Rover{len(names)}é"
+            names.append(name)
+            lines.append(f"{name} Landing:{rng.randint(0, size)} "
+                         f"{rng.randint(0, size)} {rng.choice('NESW')}")
+        else:
+            commands = "".join(rng.choice("LRM") for _ in range(
+                rng.randint(0, 4)))
+            lines.append(f"{rng.choice(names)} Instructions:{commands}")
+    return "\r\n".join(lines)
+
+
+def run_and_capture(run, rover_repo):
+    try:
+        run(rover_repo)
+    except (InvalidInputException, InvalidRoverOperationException) as ex:
+        return type(ex), str(ex)
+    return [rover.report_status() for rover in rover_repo.iter_rovers()]
+
+
+@pytest.fixture()
+def checkpoint_path(tmp_path):
+    return str(tmp_path / "mission.ckpt")
+
+
+@pytest.mark.parametrize("seed", range(15))
+def test_resume_matches_uninterrupted_run(tmp_path, checkpoint_path, seed):
+    rng = random.Random(seed)
+    line_count = rng.randint(10, 80)
+    input_path = tmp_path / "mission.txt"
+    input_path.write_bytes(random_mission(rng, line_count).encode())
+
+    def run_uninterrupted(rover_repo):
+        with MappedInputFile(str(input_path)) as input_file:
+            parse_input(input_file, rover_repo)
+
+    try:
+        with MappedInputFile(str(input_path)) as input_file:
+            parse_input(input_file, RoverMemoryRepo(),
+                        CrashingCheckpointWriter(
+                            checkpoint_path, rng.randint(1, 5),
+                            rng.randint(5, line_count)))
+    except (Crash, InvalidInputException, InvalidRoverOperationException):
+        pass
+
+    def run_resumed(rover_repo):
+        with MappedInputFile(str(input_path)) as input_file:
+            resume_mission(input_file, rover_repo, checkpoint_path)
+
+    assert run_and_capture(run_resumed, RoverMemoryRepo()) == \
+        run_and_capture(run_uninterrupted, RoverMemoryRepo())
+
+
+def test_checkpoint_round_trip(tmp_path, checkpoint_path):
+    mission = io.StringIO("\n".join([
+        'Plateau:5 5',
+        'Rover1 Landing:1 2 N',
+        'Rover1 Instructions:LMLMLMLMM',
+        'Rover2 Landing:3 3 E',
+    ]))
+    with RoverSQLiteRepo(str(tmp_path / "fleet.db")) as rover_repo:
+        parse_input(mission, rover_repo, CheckpointWriter(
+            checkpoint_path, every_lines=2))
+
+    rover_repo = RoverMemoryRepo()
+    restored_mission, input_offset = load_checkpoint(
+        checkpoint_path, rover_repo)
+    assert input_offset == mission.getvalue().index("Rover2")
+    assert restored_mission.line_number == 3
+    assert restored_mission.plateau.get_occupants() == [((1, 3), "Rover1")]
+    assert [rover.report_status() for rover in rover_repo.iter_rovers()] == \
+        ["Rover1:1 3 N"]
+
+    write_checkpoint(checkpoint_path, restored_mission, input_offset)
+    assert load_checkpoint(checkpoint_path, RoverMemoryRepo())[1] == \
+        input_offset
+
+
+def test_invalid_checkpoint(tmp_path):
+    checkpoint_path = tmp_path / "mission.ckpt"
+    checkpoint_path.write_bytes(b"")
+    with pytest.raises(InvalidInputException):
+        load_checkpoint(str(checkpoint_path), RoverMemoryRepo())
+
+    checkpoint_path.write_bytes(bytes(100))
+    with pytest.raises(InvalidInputException):
+        load_checkpoint(str(checkpoint_path), RoverMemoryRepo())
+
+
+@pytest.mark.parametrize("change", ["append", "rewrite", "touch"])
+def test_resume_refuses_changed_input(tmp_path, checkpoint_path, change):
+    input_path = tmp_path / "mission.txt"
+    input_path.write_text("Plateau:5 5\nRover1 Landing:1 2 N\n"
+                          "Rover1 Instructions:M\nRover1 Instructions:M\n")
+    with MappedInputFile(str(input_path)) as input_file:
+        parse_input(input_file, RoverMemoryRepo(),
+                    CheckpointWriter(checkpoint_path, every_lines=2))
+
+    input_stat = os.stat(input_path)
+    if change == "append":
+        with open(input_path, "a") as input_file:
+            input_file.write("Rover1 Instructions:M\n")
+    elif change == "rewrite":
+        input_path.write_text("Plateau:5 5\nRover2 Landing:4 4 S\n"
+                              "Rover2 Instructions:M\nRover2 Instructions:M\n")
+    os.utime(input_path, ns=(input_stat.st_atime_ns,
+                             input_stat.st_mtime_ns + 10 ** 9))
+
+    rover_repo = RoverMemoryRepo()
+    with MappedInputFile(str(input_path)) as input_file:
+        with pytest.raises(InvalidInputException, match="other input"):
+            resume_mission(input_file, rover_repo, checkpoint_path)
+    assert list(rover_repo.iter_rovers()) == []
+
+    # Checkpoints of a file do not match inline input either
+    with pytest.raises(InvalidInputException, match="other input"):
+        resume_mission(io.StringIO(input_path.read_text()),
+                       RoverMemoryRepo(), checkpoint_path)
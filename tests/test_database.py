@@ -0,0 +1,252 @@
+import io
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import threading
+
+import marsrover.__main__
+import pytest
+from marsrover.database import (RoverCachingRepo, RoverMemoryRepo, RoverRepo,
+                                RoverSQLiteRepo, RoverTableRepo)
+from marsrover.enums import Orientation
+from marsrover.exceptions import InvalidRoverOperationException
+from marsrover.missions import parse_input
+from marsrover.models import Plateau, Rover
+
+
+@pytest.fixture()
+def database_path(tmp_path):
+    return str(tmp_path / "fleet.db")
+
+
+@pytest.fixture()
+def test_input():
+    return "\n".join([
+        'Plateau:5 5',
+        'Rover1 Landing:1 2 N',
+        'Rover1 Instructions:LMLMLMLMM',
+        'Rover2 Landing:3 3 E',
+        'Rover2 Instructions:MMRMMRMRRM',
+    ])
+
+
+def test_sqlite_repo_matches_memory_repo(database_path, test_input, capsys):
+    reports = []
+    for rover_repo in (RoverMemoryRepo(), RoverSQLiteRepo(database_path)):
+        parse_input(io.StringIO(test_input), rover_repo)
+        rover_repo.report_all_rovers()
+        reports.append(capsys.readouterr().out)
+
+    assert reports[0] == reports[1] == "Rover1:1 3 N\nRover2:5 1 E\n"
+
+
+def test_sqlite_repo_keeps_state_after_reopening(database_path, test_input,
+                                                 capsys):
+    with RoverSQLiteRepo(database_path) as rover_repo:
+        parse_input(io.StringIO(test_input), rover_repo)
+
+    with RoverSQLiteRepo(database_path) as rover_repo:
+        rover = rover_repo.get_rover_by_name("Rover2")
+        assert rover.report_status() == "Rover2:5 1 E"
+        assert (rover.plateau.max_x, rover.plateau.max_y) == (5, 5)
+        assert rover_repo.get_rover_by_name("Rover3") is None
+        rover_repo.report_all_rovers()
+    assert capsys.readouterr().out == "Rover1:1 3 N\nRover2:5 1 E\n"
+
+    with sqlite3.connect(database_path) as connection:
+        assert connection.execute(
+            "SELECT x, y, orientation FROM rovers WHERE name = 'Rover1'"
+        ).fetchone() == (1, 3, "N")
+
+    with RoverSQLiteRepo(database_path, reset=True) as rover_repo:
+        assert rover_repo.get_rover_by_name("Rover1") is None
+
+
+def test_sqlite_repo_overwrite_keeps_order(database_path, capsys):
+    plateau = Plateau("Plateau", 5, 5)
+    with RoverSQLiteRepo(database_path) as rover_repo:
+        for name, x in (("A", 0), ("B", 1), ("A", 2)):
+            rover_repo.register_new_rover(
+                name, Rover(plateau, name, x, 0, Orientation.N))
+            rover_repo.flush()
+        rover_repo.report_all_rovers()
+    assert capsys.readouterr().out == "A:2 0 N\nB:1 0 N\n"
+
+
+def test_sqlite_repo_keeps_partial_moves(database_path):
+    mission = "\n".join([
+        'Plateau:5 5',
+        'Rover1 Landing:1 2 N',
+        'Rover1 Instructions:RMMMMMM',
+    ])
+    with RoverSQLiteRepo(database_path) as rover_repo:
+        with pytest.raises(InvalidRoverOperationException):
+            parse_input(io.StringIO(mission), rover_repo)
+
+    with RoverSQLiteRepo(database_path) as rover_repo:
+        assert rover_repo.get_rover_by_name("Rover1").report_status() == \
+            "Rover1:5 2 E"
+
+
+def test_sqlite_repo_batched_writes(database_path, monkeypatch, capsys):
+    monkeypatch.setattr("marsrover.database.SQLITE_WRITE_BATCH_SIZE", 7)
+    rng = random.Random(0)
+    lines = ["Plateau:50 50"]
+    for rover_index in range(40):
+        lines.append(f"Rover{rover_index} Landing:{rover_index} 0 N")
+    for _ in range(200):
+        lines.append(f"Rover{rng.randrange(40)} Instructions:"
+                     f"{rng.choice(['M', 'LR', 'RL', 'LLRRM'])}")
+    mission = "\n".join(lines)
+
+    reports = []
+    for rover_repo in (RoverMemoryRepo(), RoverSQLiteRepo(database_path)):
+        parse_input(io.StringIO(mission), rover_repo)
+        rover_repo.report_all_rovers()
+        reports.append(capsys.readouterr().out)
+    assert reports[0] == reports[1]
+
+
+def test_sqlite_repo_writes_while_iterating(database_path, monkeypatch):
+    monkeypatch.setattr("marsrover.database.SQLITE_READ_PAGE_SIZE", 2)
+    plateau = Plateau("Plateau", 9, 9)
+    with RoverSQLiteRepo(database_path) as rover_repo:
+        for rover_index in range(5):
+            rover_repo.register_new_rover(f"Rover{rover_index}", Rover(
+                plateau, f"Rover{rover_index}", rover_index, 0,
+                Orientation.N))
+
+        rovers = rover_repo.iter_rovers()
+        assert next(rovers).name == "Rover0"
+
+        # Another thread writes while the iteration is paused
+        def move_last_rover():
+            rover = rover_repo.get_rover_by_name("Rover4")
+            rover.current_y = 5
+            rover_repo.update_rover(rover)
+            rover_repo.flush()
+
+        writer = threading.Thread(target=move_last_rover, daemon=True)
+        writer.start()
+        writer.join(5)
+        assert not writer.is_alive()
+
+        assert [rover.report_status() for rover in rovers] == [
+            "Rover1:1 0 N", "Rover2:2 0 N", "Rover3:3 0 N", "Rover4:4 5 N"]
+
+
+class CountingRepo(RoverMemoryRepo):
+    def __init__(self):
+        super().__init__()
+        self.lookups = 0
+        self.updates = []
+
+    def get_rover_by_name(self, rover_name, *args, **kwargs):
+        self.lookups += 1
+        return super().get_rover_by_name(rover_name)
+
+    def update_rover(self, rover, *args, **kwargs):
+        self.updates.append(rover.report_status())
+
+
+def test_caching_repo_counters_and_write_back():
+    plateau = Plateau("Plateau", 5, 5)
+    stored_repo = CountingRepo()
+    rover_repo = RoverCachingRepo(stored_repo, maxsize=2)
+
+    assert rover_repo.get_rover_by_name("A") is None
+    assert rover_repo.get_rover_by_name("A") is None
+    assert stored_repo.lookups == 1
+
+    for name in "ABC":
+        rover_repo.register_new_rover(
+            name, Rover(plateau, name, 0, 0, Orientation.N))
+    assert list(stored_repo.rover_registry) == ["A", "B", "C"]
+
+    rover = rover_repo.get_rover_by_name("B")
+    rover.execute_move_commands("MM")
+    rover_repo.update_rover(rover)
+    assert stored_repo.updates == []
+
+    # Clean rovers are dropped, B is written back once evicted
+    rover_repo.get_rover_by_name("A")
+    rover_repo.get_rover_by_name("C")
+    assert stored_repo.updates == ["B:0 2 N"]
+    assert rover_repo.cache_info() == (2, 3, 3, 2, 2)
+
+
+def test_caching_repo_flushes_on_report(database_path, test_input, capsys):
+    with RoverSQLiteRepo(database_path) as stored_repo:
+        rover_repo = RoverCachingRepo(stored_repo, maxsize=1)
+        parse_input(io.StringIO(test_input), rover_repo)
+        rover_repo.report_all_rovers()
+    assert capsys.readouterr().out == "Rover1:1 3 N\nRover2:5 1 E\n"
+
+
+def test_caching_repo_on_rover_table(test_input, capsys):
+    rover_repo = RoverCachingRepo(RoverTableRepo())
+    parse_input(io.StringIO(test_input), rover_repo)
+    rover_repo.report_all_rovers()
+    assert capsys.readouterr().out == "Rover1:1 3 N\nRover2:5 1 E\n"
+
+
+class ListingRepo(RoverRepo):
+    """Repo implementing only what RoverRepo asks for"""
+
+    def __init__(self):
+        super().__init__()
+        self.rovers = {}
+
+    def get_rover_by_name(self, rover_name, *args, **kwargs):
+        return self.rovers.get(rover_name)
+
+    def register_new_rover(self, rover_name, new_rover_obj, *args,
+                           **kwargs):
+        self.rovers[rover_name] = new_rover_obj
+
+    def iter_rovers(self):
+        return iter(self.rovers.values())
+
+
+def test_reports_stream_from_iter_rovers(test_input, capsys):
+    rover_repo = ListingRepo()
+    parse_input(io.StringIO(test_input), rover_repo)
+    marsrover.__main__.report_rovers(rover_repo, {})
+    assert capsys.readouterr().out == "Rover1:1 3 N\nRover2:5 1 E\n"
+
+    output = io.BytesIO()
+    rover_repo.report_all_rovers("csv", output)
+    assert output.getvalue().splitlines()[1:] == [
+        b"0,Rover1,1,3,N", b"1,Rover2,5,1,E"]
+
+
+def test_iter_rovers_is_required():
+    class UnlistedRepo(RoverRepo):
+        get_rover_by_name = register_new_rover = None
+
+    with pytest.raises(TypeError):
+        UnlistedRepo()
+
+
+@pytest.mark.parametrize("cache_options", [[], ["--cache=1"]])
+def test_command_line_saves_rovers_of_failed_mission(database_path,
+                                                     tmp_path, cache_options):
+    input_path = tmp_path / "mission.txt"
+    input_path.write_text("Plateau:5 5\n"
+                          "Rover1 Landing:1 2 N\nRover1 Instructions:M\n"
+                          "Rover2 Landing:3 3 E\nRover2 Instructions:M\n"
+                          "Ghost Instructions:M\n")
+    subprocess.run(
+        [sys.executable, "-m", "marsrover", f"--db={database_path}",
+         *cache_options, str(input_path)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        check=True, capture_output=True)
+
+    # Rovers were waiting for a batched write, or with a cache, Rover2
+    # was only changed in the cache when the mission failed
+    with sqlite3.connect(database_path) as connection:
+        assert connection.execute(
+            "SELECT name, x, y, orientation FROM rovers ORDER BY id"
+        ).fetchall() == [("Rover1", 1, 3, "N"), ("Rover2", 4, 3, "E")]
@@ -0,0 +1,85 @@
+import io
+
+import marsrover.__main__
+import marsrover.database
+import pytest
+from marsrover.database import (RoverCachingRepo, RoverMemoryRepo,
+                                RoverTableRepo)
+from marsrover.enums import BlockedMovePolicy, Orientation
+from marsrover.fleet import RoverTable, RoverView
+from marsrover.models import Plateau, PlateauSettings, Rover
+
+
+@pytest.fixture()
+def rover_table():
+    return RoverTable(Plateau("Plateau", 5, 5))
+
+
+def test_rover_view_reads_and_writes_columns(rover_table):
+    rover_id = rover_table.add("Rover1", 1, 2, Orientation.N)
+    rover = rover_table.view(rover_id)
+    assert isinstance(rover, RoverView)
+    assert not hasattr(rover, "__dict__")
+    assert not any(hasattr(RoverView, slot) for slot in Rover.__slots__)
+    assert rover.name == "Rover1"
+    assert rover.plateau is rover_table.plateau
+
+    rover.execute_move_commands("LMLMLMLMM")
+    assert rover.report_status() == "Rover1:1 3 N"
+    assert rover_table.view(rover_id).current_y == 3
+    assert (1, 3) in rover_table.plateau._occupied_locations
+
+
+def test_table_repo_matches_memory_repo(capsys):
+    test_input = "\n".join([
+        'Plateau:5 5',
+        'Rover1 Landing:1 2 N',
+        'Rover1 Instructions:LMLMLMLMM',
+        'Rover2 Landing:3 3 E',
+        'Rover2 Instructions:MMRMMRMRRM',
+    ])
+
+    reports = []
+    for rover_repo in (RoverMemoryRepo(), RoverTableRepo()):
+        marsrover.__main__.parse_input(io.StringIO(test_input), rover_repo)
+        rover_repo.report_all_rovers()
+        reports.append(capsys.readouterr().out)
+
+    assert reports[0] == reports[1] == "Rover1:1 3 N\nRover2:5 1 E\n"
+
+
+def test_table_repo_unknown_rover():
+    assert RoverTableRepo().get_rover_by_name("Nobody") is None
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_table_repo_lands_rovers_in_place(monkeypatch, cached):
+    # Landing must not build a rover object to copy into the table
+    monkeypatch.setattr(marsrover.database, "Rover", None)
+    rover_repo = RoverTableRepo()
+    marsrover.__main__.parse_input(io.StringIO(
+        "Plateau:5 5\nRover1 Landing:1 2 N\nRover1 Instructions:M\n"),
+        RoverCachingRepo(rover_repo) if cached else rover_repo)
+    assert isinstance(rover_repo.get_rover_by_name("Rover1"), RoverView)
+    assert [rover.report_status() for rover in rover_repo.iter_rovers()] == \
+        ["Rover1:1 3 N"]
+
+
+def test_rover_views_follow_plateau_settings():
+    rover_repo = RoverTableRepo()
+    marsrover.__main__.parse_input(io.StringIO(
+        "Plateau:5 5\nRover1 Landing:1 4 N\nRover1 Instructions:MMRM\n"),
+        rover_repo, plateau_settings=PlateauSettings(
+            blocked_move_policy=BlockedMovePolicy.SKIP))
+    assert rover_repo.get_rover_by_name("Rover1").report_status() == \
+        "Rover1:2 5 E"
+
+
+def test_parse_command_line_argv_table():
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--table', '--cache', 'input'])
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--table', '--keep-going', 'input'])
+    for option in ['--db=fleet.db', '--batch', '--follow']:
+        assert (False, True) == marsrover.__main__.parse_command_line_argv(
+            ['app', '--table', option, 'input'])
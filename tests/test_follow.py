@@ -0,0 +1,108 @@
+import pytest
+from marsrover.database import RoverMemoryRepo
+from marsrover.exceptions import InvalidInputException
+from marsrover.follow import MissionFollower
+
+
+@pytest.fixture()
+def input_path(tmp_path):
+    path = tmp_path / "mission.txt"
+    path.write_bytes(b"")
+    return path
+
+
+def append(path, text):
+    with open(path, "ab") as input_file:
+        input_file.write(text.encode())
+
+
+def test_follower_reports_changed_rovers(input_path):
+    with MissionFollower(str(input_path), RoverMemoryRepo()) as follower:
+        assert follower.poll() == ([], [])
+
+        append(input_path, "Plateau:5 5\r\nRover1 Landing:1 2 N\nRover2 La")
+        assert follower.poll() == (["Rover1:1 2 N"], [])
+
+        append(input_path, "nding:3 3 E\nRover1 Instructions:LMLMLMLMM\n")
+        assert follower.poll() == (["Rover2:3 3 E", "Rover1:1 3 N"], [])
+
+        append(input_path, "Rover2 Instructions:MMRMMRMRRM\n")
+        assert follower.poll() == (["Rover2:5 1 E"], [])
+        assert follower.poll() == ([], [])
+
+
+def test_follower_keeps_going_after_errors(input_path):
+    append(input_path, "\n".join([
+        "Plateau:5 5",
+        "Rover1 Landing:1 2 N",
+        "Rover1 Instructions:MMMMMM",
+        "Rover3 Instructions:M",
+        "Rover1 Instructions:RMX",
+        "",
+    ]))
+    with MissionFollower(str(input_path), RoverMemoryRepo()) as follower:
+        reports, errors = follower.poll()
+        assert reports == ["Rover1:2 5 E"]
+        assert [type(error) for error in errors] == [
+            InvalidInputException] * 3
+        assert [error.line_number for error in errors] == [3, 4, 5]
+        assert errors[0].byte_offset == len(
+            "Plateau:5 5\nRover1 Landing:1 2 N\n")
+        assert errors[1].byte_offset == len(
+            "Plateau:5 5\nRover1 Landing:1 2 N\nRover1 Instructions:MMMMMM\n")
+        assert "Rover1" in errors[0].message
+
+        append(input_path, "Rover1 Instructions:RM\n")
+        assert follower.poll() == (["Rover1:2 4 S"], [])
+
+
+def test_follower_invalid_plateau(input_path):
+    append(input_path, "Plateau:5\n")
+    with MissionFollower(str(input_path), RoverMemoryRepo()) as follower:
+        with pytest.raises(InvalidInputException):
+            follower.poll()
+
+
+def test_follower_partial_move_occupies_cell(input_path):
+    append(input_path,
+           "Plateau:5 5\nR1 Landing:0 0 N\nR1 Instructions:MMMMMMMM\n")
+    with MissionFollower(str(input_path), RoverMemoryRepo()) as follower:
+        reports, errors = follower.poll()
+        assert reports == ["R1:0 5 N"]
+        assert [error.message.split(": \n")[-1] for error in errors] == [
+            "Crossing upper border"]
+
+        # Later collision checks see R1 where it stopped
+        append(input_path, "R3 Landing:2 5 W\nR3 Instructions:MM\n")
+        reports, errors = follower.poll()
+        assert reports == ["R3:1 5 W"]
+        assert [error.message.split(": \n")[-1] for error in errors] == [
+            "Collision detected"]
+        assert sorted(follower.mission.plateau.get_occupants()) == [
+            ((0, 5), "R1"), ((1, 5), "R3")]
+
+
+def test_follower_stops_on_truncated_file(input_path):
+    append(input_path, "Plateau:5 5\nR1 Landing:0 0 N\n")
+    with MissionFollower(str(input_path), RoverMemoryRepo()) as follower:
+        assert follower.poll() == (["R1:0 0 N"], [])
+
+        input_path.write_bytes(b"Plateau:5 5\n")
+        with pytest.raises(InvalidInputException, match="truncated"):
+            follower.poll()
+
+
+def test_follower_stops_on_replaced_file(input_path):
+    append(input_path, "Plateau:5 5\nR1 Landing:0 0 N\n")
+    with MissionFollower(str(input_path), RoverMemoryRepo()) as follower:
+        assert follower.poll() == (["R1:0 0 N"], [])
+
+        rotated_path = input_path.with_name("mission.txt.1")
+        input_path.rename(rotated_path)
+        # Lines still written to the renamed file are followed
+        append(rotated_path, "R1 Instructions:M\n")
+        assert follower.poll() == (["R1:0 1 N"], [])
+
+        append(input_path, "Plateau:5 5\nR2 Landing:0 0 N\n" * 2)
+        with pytest.raises(InvalidInputException, match="replaced"):
+            follower.poll()
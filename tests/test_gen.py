@@ -0,0 +1,67 @@
+import io
+
+import pytest
+from marsrover.database import RoverMemoryRepo
+from marsrover.exceptions import InvalidInputException
+from marsrover.gen import MissionGenerator, main, write_mission
+from marsrover.missions import parse_input
+
+
+def generate(**parameters):
+    mission, expected = io.StringIO(), io.StringIO()
+    write_mission(MissionGenerator(**parameters), mission, expected)
+    return mission.getvalue(), expected.getvalue()
+
+
+def run_mission(mission):
+    rover_repo = RoverMemoryRepo()
+    parse_input(io.StringIO(mission), rover_repo)
+    return "".join(f"{rover.report_status()}\n"
+                   for rover in rover_repo.iter_rovers())
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("interleaving", ["grouped", "mixed"])
+@pytest.mark.parametrize("length_distribution",
+                         ["fixed", "uniform", "exponential"])
+def test_generated_mission_matches_expected_report(
+        seed, interleaving, length_distribution):
+    mission, expected = generate(
+        rover_count=30, max_x=19, lane_length=3 + seed, lines_per_rover=6,
+        length=12, length_distribution=length_distribution,
+        interleaving=interleaving, seed=seed)
+    assert run_mission(mission) == expected
+    assert expected.count("\n") == 30
+
+
+def test_generator_is_deterministic():
+    assert generate(rover_count=10, seed=1) == generate(rover_count=10, seed=1)
+    assert generate(rover_count=10, seed=1) != generate(rover_count=10, seed=2)
+
+
+def test_invalid_lines_do_not_change_expected_report():
+    mission, expected = generate(rover_count=20, max_x=9, seed=4,
+                                 invalid_fraction=0.2)
+    with pytest.raises(InvalidInputException):
+        run_mission(mission)
+
+    valid_lines = [line for line in mission.splitlines()
+                   if not line.startswith("Ghost") and "Hover" not in line]
+    assert run_mission("\n".join(valid_lines)) == expected
+    assert generate(rover_count=20, max_x=9, seed=4)[0] != mission
+
+
+def test_lanes_must_fit():
+    with pytest.raises(ValueError):
+        MissionGenerator(rover_count=11, max_x=9, max_y=1, lane_length=2)
+    assert MissionGenerator(rover_count=10, max_x=9, max_y=1,
+                            lane_length=2).max_y == 1
+    assert MissionGenerator(rover_count=11, max_x=9, lane_length=2).max_y == 2
+
+
+def test_main_writes_files(tmp_path):
+    output_path = tmp_path / "mission.txt"
+    expected_path = tmp_path / "expected.txt"
+    main(["--rovers", "3", "--max-x", "9", "--output", str(output_path),
+          "--expected", str(expected_path)])
+    assert run_mission(output_path.read_text()) == expected_path.read_text()
@@ -0,0 +1,256 @@
+import io
+import os
+
+import pytest
+import marsrover.__main__
+import marsrover.journal
+from marsrover.database import RoverMemoryRepo
+from marsrover.enums import Orientation, RoverInputType
+from marsrover.exceptions import (InvalidInputException,
+                                  InvalidRoverOperationException)
+from marsrover.gen import MissionGenerator
+from marsrover.journal import (JOURNAL_INDEX_SUFFIX, JournalEntry,
+                               MoveJournalReader, MoveJournalWriter, main)
+from marsrover.missions import Mission, parse_input
+from marsrover.parsers import PlateauInputTextParser
+from marsrover.tokenizer import tokenize_rover_input_line
+
+MISSION = ("Plateau:5 5\n"
+           "Rover1 Landing:1 2 N\n"
+           "Rover1 Instructions:LMLMLMLMM\n"
+           "Rover2 Landing:3 3 E\n"
+           "Rover2 Instructions:MMRMMRMRRM\n"
+           "Rover1 Instructions:RMMMMMM\n"
+           "Rover2 Instructions:L\n")
+
+
+def run_reference(mission_text):
+    """Runs a mission line by line, keeping every state of each
+    rover as journal entries, and the fleet after each line.
+    """
+    lines = io.StringIO(mission_text)
+    mission = Mission(PlateauInputTextParser().parse_input_line(
+        lines.readline()), RoverMemoryRepo())
+    histories = {}
+    fleets = [{}]
+    for line in lines:
+        failed = False
+        try:
+            record = mission.run_line(line)
+        except (InvalidInputException, InvalidRoverOperationException):
+            failed = True
+            try:
+                record = tokenize_rover_input_line(line)
+            except InvalidInputException:
+                record = None
+
+        rover = (record and record.name and record.payload
+                 and mission.rover_repo.get_rover_by_name(record.name))
+        # Only instructions lines of landed rovers fail partway
+        if rover and not (failed
+                          and record.kind is not RoverInputType.INSTRUCTIONS):
+            history = histories.setdefault(rover.name, [])
+            batch = sum(not entry.failed for entry in history)
+            history.append(JournalEntry(
+                mission.line_number, batch - failed, rover.current_x,
+                rover.current_y, rover.current_orientation, failed))
+        fleets.append({name: history[-1][2:5]
+                       for name, history in histories.items()})
+    return histories, fleets
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "mission.journal")
+
+
+@pytest.mark.parametrize("keyframe_every", [1, 7, 1000000])
+@pytest.mark.parametrize("indexed", [True, False])
+def test_queries_match_reference(monkeypatch, journal_path, keyframe_every,
+                                 indexed):
+    monkeypatch.setattr(marsrover.journal, "JOURNAL_INDEX_EVERY", 3)
+    mission = io.StringIO()
+    for line_number, line in enumerate(MissionGenerator(
+            rover_count=12, max_x=19, lines_per_rover=8, seed=keyframe_every,
+            interleaving="mixed", invalid_fraction=0.1).iter_lines()):
+        # Some lines fail partway on an unknown command
+        if "Instructions" in line and not line_number % 7:
+            line += "X"
+        mission.write(f"{line}\n")
+    histories, fleets = run_reference(mission.getvalue())
+
+    with MoveJournalWriter(journal_path, keyframe_every) as journal:
+        parse_input(io.StringIO(mission.getvalue()), RoverMemoryRepo(),
+                    error_log=[], journal=journal)
+    if not indexed:
+        os.remove(journal_path + JOURNAL_INDEX_SUFFIX)
+
+    with MoveJournalReader(journal_path) as reader:
+        assert reader.rover_names == list(histories)
+        for name, history in histories.items():
+            completed = [entry for entry in history if not entry.failed]
+            assert [reader.rover_after_batch(name, batch)
+                    for batch in range(len(completed) + 1)] == \
+                completed + [None]
+            for line_number in range(len(fleets)):
+                states = [entry for entry in history
+                          if entry.line_number <= line_number]
+                assert reader.rover_at_line(name, line_number) == (
+                    states[-1] if states else None)
+
+        for line_number, fleet in enumerate(fleets, 1):
+            assert reader.fleet_at_line(line_number) == fleet
+            occupants = {(x, y): name for name, (x, y, _) in fleet.items()}
+            for location in [(0, 0), (3, 0), (19, 1), (4, 2)]:
+                assert reader.occupant_at_line(location, line_number) == \
+                    occupants.get(location)
+
+
+def test_failing_lines_keep_partial_moves(journal_path):
+    error_log = []
+    with MoveJournalWriter(journal_path) as journal:
+        parse_input(io.StringIO(MISSION), RoverMemoryRepo(),
+                    error_log=error_log, journal=journal)
+    assert [error.line_number for error in error_log] == [6]
+
+    with MoveJournalReader(journal_path) as reader:
+        # Failed lines are journaled, but not counted as batches
+        assert reader.rover_at_line("Rover1", 6) == JournalEntry(
+            6, 1, 5, 3, Orientation.E, True)
+        assert reader.rover_after_batch("Rover1", 1) == JournalEntry(
+            3, 1, 1, 3, Orientation.N)
+        assert reader.rover_after_batch("Rover1", 2) is None
+        assert reader.occupant_at_line((5, 3), 6) == "Rover1"
+        assert reader.rover_at_line("Rover2", 7) == JournalEntry(
+            7, 2, 5, 1, Orientation.N)
+        assert reader.occupant_at_line((1, 3), 3) == "Rover1"
+        assert reader.occupant_at_line((1, 3), 2) is None
+        assert reader.rover_at_line("Rover2", 3) is None
+        with pytest.raises(InvalidInputException):
+            reader.rover_at_line("Ghost", 4)
+
+
+def test_queries_in_any_order(journal_path):
+    histories, fleets = run_reference(MISSION)
+    with MoveJournalWriter(journal_path, keyframe_every=3) as journal:
+        parse_input(io.StringIO(MISSION), RoverMemoryRepo(), error_log=[],
+                    journal=journal)
+
+    with MoveJournalReader(journal_path) as reader:
+        # Replays are continued forwards and restarted backwards
+        for line_number in [7, 2, 4, 4, 1, 6, 3, 7, 5]:
+            assert reader.fleet_at_line(line_number) == fleets[
+                line_number - 1]
+            occupants = {(x, y): name for name, (x, y, _)
+                         in fleets[line_number - 1].items()}
+            for location in [(1, 3), (5, 3), (5, 1), (3, 3)]:
+                assert reader.occupant_at_line(location, line_number) == \
+                    occupants.get(location)
+
+
+def test_failed_states_are_indexed(monkeypatch, journal_path):
+    monkeypatch.setattr(marsrover.journal, "JOURNAL_INDEX_EVERY", 4)
+    mission = "Plateau:5 5\nRover1 Landing:1 2 N\n" + (
+        "Rover1 Instructions:MX\nRover1 Instructions:RRM\n"
+        + "Rover1 Instructions:X\n" * 40) * 3
+    with MoveJournalWriter(journal_path) as journal:
+        parse_input(io.StringIO(mission), RoverMemoryRepo(), error_log=[],
+                    journal=journal)
+
+    with MoveJournalReader(journal_path) as reader:
+        read_state = reader._read_state
+        read_offsets = []
+
+        def counting_read_state(offset):
+            read_offsets.append(offset)
+            return read_state(offset)
+
+        monkeypatch.setattr(reader, "_read_state", counting_read_state)
+        assert reader.rover_after_batch("Rover1", 2) == JournalEntry(
+            46, 2, 1, 2, Orientation.N)
+        assert reader.rover_at_line("Rover1", 80) == JournalEntry(
+            80, 2, 1, 2, Orientation.N, True)
+        # Binary search over 31 indexed states, then one walk back
+        # through at most INDEX_EVERY states, for each query
+        assert len(read_offsets) <= 2 * (6 + 4)
+
+
+def test_writer_refuses_existing_file(journal_path):
+    with open(journal_path, "w") as existing_file:
+        existing_file.write("keep")
+    with pytest.raises(InvalidInputException, match="already exists"):
+        MoveJournalWriter(journal_path)
+    with open(journal_path) as existing_file:
+        assert existing_file.read() == "keep"
+
+
+def test_interrupted_journal_is_scanned(journal_path):
+    with MoveJournalWriter(journal_path, keyframe_every=4) as journal:
+        parse_input(io.StringIO(MISSION), RoverMemoryRepo(), error_log=[],
+                    journal=journal)
+    os.remove(journal_path + JOURNAL_INDEX_SUFFIX)
+    with open(journal_path, "r+b") as journal_file:
+        journal_file.truncate(os.path.getsize(journal_path) - 3)
+
+    with MoveJournalReader(journal_path) as reader:
+        # Last state was cut short
+        assert reader.rover_after_batch("Rover2", 2) is None
+        assert reader.rover_after_batch("Rover2", 1) == JournalEntry(
+            5, 1, 5, 1, Orientation.E)
+
+
+def test_stale_index_is_ignored(journal_path):
+    with MoveJournalWriter(journal_path) as journal:
+        parse_input(io.StringIO(MISSION), RoverMemoryRepo(), error_log=[],
+                    journal=journal)
+    with MoveJournalWriter(journal_path + ".other") as journal:
+        parse_input(io.StringIO(MISSION.replace("Rover1", "Rover3")),
+                    RoverMemoryRepo(), error_log=[], journal=journal)
+    os.replace(journal_path + ".other" + JOURNAL_INDEX_SUFFIX,
+               journal_path + JOURNAL_INDEX_SUFFIX)
+    with open(journal_path, "ab") as journal_file:
+        journal_file.write(b"\x00")
+
+    with MoveJournalReader(journal_path) as reader:
+        assert reader.rover_names == ["Rover1", "Rover2"]
+
+
+def test_reader_rejects_other_files(tmp_path):
+    text_path = tmp_path / "mission.txt"
+    text_path.write_text(MISSION)
+    with pytest.raises(InvalidInputException):
+        MoveJournalReader(str(text_path))
+    empty_path = tmp_path / "empty.journal"
+    empty_path.write_bytes(b"")
+    with pytest.raises(InvalidInputException):
+        MoveJournalReader(str(empty_path))
+
+
+def test_query_command_line(journal_path, capsys):
+    with MoveJournalWriter(journal_path) as journal:
+        parse_input(io.StringIO(MISSION), RoverMemoryRepo(), error_log=[],
+                    journal=journal)
+
+    main([journal_path, "--rover", "Rover1", "--batch", "1"])
+    main([journal_path, "--rover", "Rover2", "--line", "3"])
+    main([journal_path, "--cell", "5", "1", "--line", "5"])
+    main([journal_path, "--cell", "0", "0", "--line", "5"])
+    assert capsys.readouterr().out.splitlines() == [
+        "Rover1:1 3 N line 3 batch 1", "-", "Rover2", "-"]
+
+    with pytest.raises(SystemExit):
+        main([journal_path, "--cell", "5", "1", "--batch", "1"])
+    with pytest.raises(SystemExit):
+        main([journal_path, "--rover", "Ghost", "--batch", "1"])
+    assert "Ghost" in capsys.readouterr().err
+
+
+def test_parse_command_line_argv_journal():
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--journal=mission.journal', '--keep-going', 'input'])
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--journal=mission.journal', '--packed', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--journal=mission.journal', '--batch', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--journal=mission.journal', '--ticks', 'input'])
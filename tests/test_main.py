@@ -2,8 +2,10 @@ import io
 
 import marsrover.__main__
 import pytest
-from marsrover.exceptions import InvalidInputException
+from marsrover.exceptions import (InvalidInputException,
+                                  InvalidRoverOperationException)
 from marsrover.database import RoverMemoryRepo
+from marsrover.missions import write_error_log
 
 
 @pytest.fixture()
@@ -92,3 +94,115 @@ def test_unknown_input_type(test_input_file_io_unknown, rover_repo):
     with pytest.raises(InvalidInputException) as ex:
         marsrover.__main__.parse_input(test_input_file_io_unknown, rover_repo)
     assert ex.value.message == expected_msg.format("Rover1 Restart:1 2 N\n")
+
+
+def test_parse_command_line_argv_resume_needs_checkpoint():
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--resume', 'input'])
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--checkpoint=mission.ckpt', '--resume', 'input'])
+
+
+def test_parse_command_line_argv_keep_going():
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--keep-going', '--error-log=errors.tsv',
+         '--blocked-moves=skip', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--error-log=errors.tsv', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--keep-going', '--batch', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--blocked-moves=stop', '--batch', 'input'])
+
+
+@pytest.mark.parametrize("arguments, expected_error", [
+    (['input'], None),
+    (['--debug', '--help'], None),
+    (['a', 'b'], "Only one input can be given, got 2"),
+    (['--rovers', 'input'], "Unknown option: --rovers"),
+    (['--resume', 'input'], "--resume needs one of --checkpoint"),
+    (['--workers=2', 'input'],
+     "--workers needs one of --batch, --validate-only, --validate"),
+    (['--batch', '--keep-going', 'input'],
+     "--keep-going cannot be combined with --batch"),
+    (['--checkpoint=mission.ckpt', '--ticks', 'input'],
+     "--ticks cannot be combined with --checkpoint"),
+    (['--error-log=errors.tsv', 'input'], "--error-log needs --keep-going"),
+    (['--table', '--db=rovers.db', 'input'],
+     "--table cannot be combined with --db"),
+    (['--occupancy=tree', 'input'], "Unknown occupancy backend: tree"),
+])
+def test_find_command_line_error(arguments, expected_error):
+    options, inputs = marsrover.__main__.parse_command_line_options(
+        ['app'] + arguments)
+    assert marsrover.__main__.find_command_line_error(
+        options, inputs) == expected_error
+
+
+def test_plateau_settings_do_not_leak_between_missions(rover_repo):
+    mission = io.StringIO(
+        "Plateau:5 5\nRover1 Landing:1 4 N\nRover1 Instructions:MMRM\n")
+    marsrover.__main__.parse_input(
+        mission, rover_repo,
+        plateau_settings=marsrover.__main__.get_plateau_settings(
+            {"--blocked-moves": "skip"}))
+    assert rover_repo.get_rover_by_name("Rover1").report_status() == \
+        "Rover1:2 5 E"
+
+    mission.seek(0)
+    with pytest.raises(InvalidRoverOperationException):
+        marsrover.__main__.parse_input(mission, RoverMemoryRepo())
+
+
+def test_parse_input_keep_going(rover_repo, capsys):
+    error_log = []
+    marsrover.__main__.parse_input(io.StringIO("\n".join([
+        'Plateau:5 5',
+        'Rover1 Landing:1 2 N',
+        'Rover1 Instructions:MMMMRM',
+        'Ghost Instructions:M',
+        'Rover1 Restart:1 2 N',
+        'Rover2 Landing:3 3 E',
+        'Rover2 Instructions:MMRMMRMRRM',
+    ])), rover_repo, error_log=error_log)
+
+    rover_repo.report_all_rovers()
+    assert capsys.readouterr().out == "Rover1:1 5 N\nRover2:5 1 E\n"
+    assert [tuple(error) for error in error_log] == [
+        (3, None, "Rover1", "Crossing upper border"),
+        (4, None, "Ghost", "Rover Ghost does not exist"),
+        (5, None, None, "Unknown rover input type: Rover1 Restart:1 2 N\n"),
+    ]
+
+    error_log_file = io.StringIO()
+    write_error_log(error_log, error_log_file)
+    assert error_log_file.getvalue().splitlines() == [
+        "3\t\tRover1\tCrossing upper border",
+        "4\t\tGhost\tRover Ghost does not exist",
+        "5\t\t\tUnknown rover input type: Rover1 Restart:1 2 N",
+    ]
+
+
+def test_keep_going_partial_move_keeps_plateau_in_sync(rover_repo, capsys):
+    error_log = []
+    marsrover.__main__.parse_input(io.StringIO("\n".join([
+        'Plateau:5 5',
+        'R1 Landing:0 0 N',
+        'R1 Instructions:MMMMMMMM',
+        'R2 Landing:0 1 E',
+        'R2 Instructions:LM',
+        'R3 Landing:2 5 W',
+        'R3 Instructions:MM',
+    ])), rover_repo, error_log=error_log)
+
+    # R1 stopped at the upper border and still holds that cell
+    rover_repo.report_all_rovers()
+    assert capsys.readouterr().out == "R1:0 5 N\nR2:0 2 N\nR3:1 5 W\n"
+    assert [(error.line_number, error.rover_name, error.message)
+            for error in error_log] == [
+        (3, "R1", "Crossing upper border"),
+        (7, "R3", "Collision detected"),
+    ]
+    plateau = rover_repo.get_rover_by_name("R1").plateau
+    assert sorted(plateau.get_occupants()) == [
+        ((0, 2), "R2"), ((0, 5), "R1"), ((1, 5), "R3")]
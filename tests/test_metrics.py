@@ -0,0 +1,164 @@
+import io
+import json
+import time
+
+import pytest
+from marsrover import vectorized
+from marsrover.database import (RoverCachingRepo, RoverMemoryRepo,
+                                RoverTableRepo)
+from marsrover.enums import Orientation
+from marsrover.exceptions import InvalidRoverOperationException
+from marsrover.metrics import (NULL_METRICS, Metrics, PeriodicMetricsWriter,
+                               collect_metrics)
+from marsrover.missions import parse_input
+from marsrover.models import Plateau, Rover
+from marsrover.readers import MappedInputFile
+
+MISSION = ("Plateau:5 5\n"
+           "Rover1 Landing:1 2 N\n"
+           "Rover1 Instructions:LMLMLMLMM\n"
+           "Rover2 Landing:3 3 E\n"
+           "Rover2 Instructions:MMRMMRMRRM\n")
+
+
+@pytest.fixture
+def metrics():
+    return Metrics()
+
+
+def test_null_metrics_instrument_nothing():
+    plateau = Plateau("Test", 5, 5)
+    assert "check_target_location" not in vars(plateau)
+    assert NULL_METRICS.instrument("move", parse_input) is parse_input
+    with NULL_METRICS.stage("parse"):
+        pass
+
+
+def test_metrics_only_record_their_mission(metrics):
+    parse_input(io.StringIO(MISSION), RoverMemoryRepo(), metrics=metrics)
+    parse_input(io.StringIO(MISSION), RoverMemoryRepo())
+    assert metrics.counters["lines"] == 4
+    assert metrics.stage_calls["parse"] == 1
+
+
+def test_metrics_count_stages(metrics, capsys):
+    rover_repo = RoverMemoryRepo()
+    parse_input(io.StringIO(MISSION), rover_repo, metrics=metrics)
+    with metrics.stage("report"):
+        rover_repo.report_all_rovers()
+    capsys.readouterr()
+
+    assert metrics.counters == {
+        "lines": 4, "commands": 19, "collision_probes": 4,
+        "border_rejections": 0, "collisions": 0, "repo_lookups": 4}
+    for stage in ("parse", "report"):
+        assert metrics.stage_calls[stage] == 1
+    assert metrics.stage_calls["land"] == 2
+    assert metrics.stage_calls["move"] == 2
+    assert metrics.stage_calls["execute"] == 2
+    assert metrics.stage_seconds["parse"] >= metrics.stage_seconds["move"]
+    assert metrics.stage_seconds["move"] >= metrics.stage_seconds["execute"]
+
+
+def test_metrics_count_rejections(metrics):
+    with pytest.raises(InvalidRoverOperationException):
+        parse_input(io.StringIO(
+            "Plateau:5 5\nRover1 Landing:1 1 N\nRover1 Instructions:M\n"
+            "Rover2 Landing:1 4 S\nRover2 Instructions:MMM\n"),
+            RoverMemoryRepo(), metrics=metrics)
+    assert metrics.counters["collisions"] == 1
+
+    plateau = Plateau("Test", 2, 2, metrics=metrics)
+    with pytest.raises(InvalidRoverOperationException):
+        plateau.verify_target_location(3, 0)
+    assert plateau.find_first_obstacle(0, 0, 0, -1, 1) == (
+        0, "Crossing lower border")
+    assert metrics.counters["border_rejections"] == 2
+
+
+@pytest.mark.skipif(not vectorized.is_available(),
+                    reason="vectorized engine needs NumPy")
+def test_metrics_count_vectorized_collisions(monkeypatch, metrics):
+    monkeypatch.setattr(Rover, "vectorized_min_commands", 4)
+    with pytest.raises(InvalidRoverOperationException):
+        parse_input(io.StringIO(
+            "Plateau:5 5\nRover1 Landing:1 3 N\nRover1 Instructions:L\n"
+            "Rover2 Landing:1 0 N\nRover2 Instructions:RLMMMM\n"),
+            RoverMemoryRepo(), metrics=metrics)
+    # Two landings, then one cell lookup for the whole path
+    assert metrics.counters["collision_probes"] == 3
+    assert metrics.counters["collisions"] == 1
+    assert metrics.counters["commands"] == 7
+
+
+def test_metrics_count_failing_lines_once(metrics):
+    error_log = []
+    parse_input(io.StringIO(MISSION + "Rover1 Instructions:MX\n"
+                            "Rover3 Instructions:M\nRover1 Nowhere\n"),
+                RoverMemoryRepo(), error_log=error_log, metrics=metrics)
+    assert len(error_log) == 3
+    assert metrics.counters["lines"] == 7
+    assert metrics.stage_calls["tokenize"] == 7
+
+
+def test_metrics_read_mapped_input(metrics, tmp_path):
+    input_path = tmp_path / "mission.txt"
+    input_path.write_text(MISSION)
+    with MappedInputFile(str(input_path), metrics=metrics) as input_file:
+        parse_input(input_file, RoverMemoryRepo(), metrics=metrics)
+    # Last read finds the end of the file
+    assert metrics.stage_calls["read"] == 6
+
+
+@pytest.mark.parametrize("rover_repo_class",
+                         [RoverMemoryRepo, RoverTableRepo])
+def test_nested_repo_lookups_counted_once(metrics, rover_repo_class):
+    rover_repo = RoverCachingRepo(rover_repo_class(), 1)
+    parse_input(io.StringIO(MISSION), rover_repo, metrics=metrics)
+    assert metrics.counters["repo_lookups"] == 4
+    assert metrics.stage_calls["repo_lookup"] == 4
+
+
+def test_metrics_formats():
+    metrics = Metrics()
+    metrics.add_time("move", 0.5)
+    metrics.count("commands", 7)
+
+    snapshot = json.loads(metrics.to_json())
+    assert snapshot["stages"]["move"] == {"seconds": 0.5, "calls": 1}
+    assert snapshot["counters"]["commands"] == 7
+
+    prometheus_lines = metrics.to_prometheus().splitlines()
+    assert 'marsrover_stage_seconds_total{stage="move"} 0.5' \
+        in prometheus_lines
+    assert 'marsrover_stage_calls_total{stage="move"} 1' in prometheus_lines
+    assert "# TYPE marsrover_commands_total counter" in prometheus_lines
+    assert "marsrover_commands_total 7" in prometheus_lines
+
+
+def test_collect_metrics_writes_at_the_end(tmp_path):
+    json_path = str(tmp_path / "metrics.json")
+    prometheus_path = str(tmp_path / "metrics.prom")
+    with collect_metrics(json_path) as metrics:
+        parse_input(io.StringIO(MISSION), RoverMemoryRepo(),
+                    metrics=metrics)
+    with collect_metrics(prometheus_path):
+        parse_input(io.StringIO(MISSION), RoverMemoryRepo())
+
+    with open(json_path) as metrics_file:
+        assert json.load(metrics_file)["counters"]["lines"] == 4
+    with open(prometheus_path) as metrics_file:
+        assert "marsrover_lines_total 0\n" in metrics_file.read()
+
+
+def test_periodic_metrics_writer(tmp_path):
+    metrics = Metrics()
+    metrics_path = tmp_path / "metrics.json"
+    with PeriodicMetricsWriter(metrics, str(metrics_path), 0.01):
+        deadline = time.monotonic() + 5
+        while not metrics_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert metrics_path.exists()
+        metrics.count("lines", 3)
+
+    assert json.loads(metrics_path.read_text())["counters"]["lines"] == 3
@@ -0,0 +1,154 @@
+import io
+import random
+
+import pytest
+import marsrover.__main__
+from marsrover.database import RoverMemoryRepo
+from marsrover.exceptions import (InvalidInputException,
+                                  InvalidRoverOperationException)
+from marsrover.missions import parse_input
+from marsrover.models import Plateau, PlateauSettings
+from marsrover.occupancy import (DenseOccupancy, create_occupancy,
+                                 select_occupancy_backend)
+
+MISSION = ("Plateau:5 5\n"
+           "Rover1 Landing:1 2 N\n"
+           "Rover1 Instructions:LMLMLMLMM\n"
+           "Rover2 Landing:3 3 E\n"
+           "Rover2 Instructions:MMRMMRMRRM\n"
+           "Rover3 Landing:0 3 S\n"
+           "Rover3 Instructions:RRM\n")
+
+
+@pytest.fixture(params=["dense", "dense file"])
+def occupancy(request, tmp_path):
+    if request.param == "dense":
+        return DenseOccupancy(6, 4)
+    return DenseOccupancy(6, 4, str(tmp_path / "grid.bin"))
+
+
+def test_occupancy_behaves_like_dict(occupancy):
+    rng = random.Random(7)
+    reference = {}
+    for step in range(500):
+        location = (rng.randint(0, 6), rng.randint(0, 4))
+        if rng.random() < 0.6:
+            occupancy[location] = reference[location] = f"Rover{step % 20}"
+        elif location in reference:
+            del occupancy[location], reference[location]
+        else:
+            with pytest.raises(KeyError):
+                del occupancy[location]
+
+        assert len(occupancy) == len(reference)
+        assert (location in occupancy) == (location in reference)
+        assert occupancy.get(location) == reference.get(location)
+
+    assert dict(occupancy.items()) == reference
+    assert occupancy.keys() == reference.keys()
+
+
+def test_locations_outside_plateau(occupancy):
+    occupancy[(0, 1)] = "Rover1"
+    # Would share the linear cell id of (0, 1) if not checked
+    assert (7, 0) not in occupancy
+    assert (-1, 1) not in occupancy
+    assert (0, 5) not in occupancy
+    with pytest.raises(KeyError):
+        occupancy[(7, 0)] = "Rover2"
+    with pytest.raises(KeyError):
+        occupancy[(7, 0)]
+
+
+def test_dense_occupancy_reuses_rover_ids():
+    occupancy = DenseOccupancy(99, 99)
+    occupancy[(0, 0)] = "Rover1"
+    for x in range(1, 100):
+        del occupancy[(x - 1, 0)]
+        occupancy[(x, 0)] = "Rover1"
+    assert occupancy._names == ["Rover1"]
+    assert dict(occupancy) == {(99, 0): "Rover1"}
+
+
+def test_dense_occupancy_file(tmp_path):
+    grid_path = tmp_path / "grid.bin"
+    occupancy = DenseOccupancy(9, 9, str(grid_path))
+    occupancy[(2, 1)] = "Rover1"
+    occupancy._map.flush()
+    grid = grid_path.read_bytes()
+    assert len(grid) == 100 * 4
+    assert grid[12 * 4:13 * 4] == (1).to_bytes(4, "little")
+
+    # An existing file is never overwritten
+    with pytest.raises(InvalidInputException):
+        DenseOccupancy(9, 9, str(grid_path))
+    assert grid_path.read_bytes() == grid
+
+
+@pytest.mark.parametrize("max_x, max_y, expected_rovers, backend", [
+    (999, 999, None, "sparse"),
+    (999, 999, 1000, "sparse"),
+    (999, 999, 100000, "dense"),
+    (99999, 99999, 10 ** 9, "sparse"),
+])
+def test_select_occupancy_backend(max_x, max_y, expected_rovers, backend):
+    assert select_occupancy_backend(max_x, max_y, expected_rovers) == backend
+    occupancy = create_occupancy(max_x, max_y,
+                                 expected_rovers=expected_rovers)
+    # Sparse occupancy is a plain dict, kept off the per-step hot path
+    assert type(occupancy) is (
+        DenseOccupancy if backend == "dense" else dict)
+
+
+def test_unknown_occupancy_backend():
+    with pytest.raises(InvalidInputException):
+        create_occupancy(5, 5, "tree")
+
+
+@pytest.mark.parametrize("backend", ["sparse", "dense"])
+def test_plateau_behaves_the_same_on_backends(backend):
+    rover_repo = RoverMemoryRepo()
+    parse_input(io.StringIO(MISSION), rover_repo,
+                plateau_settings=PlateauSettings(backend))
+    assert [rover.report_status() for rover in rover_repo.iter_rovers()] == [
+        "Rover1:1 3 N", "Rover2:5 1 E", "Rover3:0 4 N"]
+
+    plateau = rover_repo.get_rover_by_name("Rover1").plateau
+    assert sorted(plateau.get_occupants()) == [
+        ((0, 4), "Rover3"), ((1, 3), "Rover1"), ((5, 1), "Rover2")]
+    with pytest.raises(InvalidRoverOperationException) as ex:
+        plateau.verify_target_location(1, 3)
+    assert ex.value.message == "Collision detected"
+    with pytest.raises(InvalidRoverOperationException) as ex:
+        plateau.verify_target_location(6, 0)
+    assert ex.value.message == "Crossing right border"
+    plateau.verify_target_location(0, 0)
+
+
+def test_plateau_expected_rovers():
+    assert type(Plateau("Plateau", 99, 99)._occupied_locations) is dict
+    assert isinstance(Plateau("Plateau", 99, 99, 5000)._occupied_locations,
+                      DenseOccupancy)
+
+    settings = PlateauSettings(expected_rovers=5000)
+    assert isinstance(Plateau("Plateau", 99, 99, settings=settings)
+                      ._occupied_locations, DenseOccupancy)
+    # Settings of one plateau do not leak into the next
+    assert type(Plateau("Plateau", 99, 99)._occupied_locations) is dict
+
+
+def test_parse_command_line_argv_occupancy():
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--occupancy=dense', '--occupancy-file=grid.bin', 'input'])
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--expected-rovers=1000', 'input'])
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--occupancy=auto', '--expected-rovers=1000', 'input'])
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--occupancy=auto', '--packed', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--occupancy=auto', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--occupancy=tree', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--occupancy-file=grid.bin', '--batch', 'input'])
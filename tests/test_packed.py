@@ -0,0 +1,149 @@
+import io
+
+import pytest
+import marsrover.__main__
+from marsrover.database import RoverMemoryRepo
+from marsrover.enums import Orientation, RoverInputType
+from marsrover.exceptions import (InvalidInputException,
+                                  InvalidRoverOperationException)
+from marsrover.gen import MissionGenerator, write_mission
+from marsrover.missions import parse_input
+from marsrover.packed import (PackedMissionReader, convert_text_mission,
+                              main, pack_commands, run_packed_mission,
+                              unpack_commands)
+
+MISSION = ("Plateau:5 5\n"
+           "Rover1 Landing:1 2 N\n"
+           "Rover1 Instructions:LMLMLMLMM\n"
+           "Rover2 Landing:3 3 e\n"
+           "Rover2 Instructions:\n"
+           "Rover2 Instructions:MMRMMRMRRM\n")
+
+
+@pytest.fixture
+def convert(tmp_path):
+    def convert(text):
+        input_path = tmp_path / "mission.txt"
+        input_path.write_text(text)
+        packed_path = str(tmp_path / "mission.mrp")
+        with open(packed_path, "wb") as output:
+            convert_text_mission(str(input_path), output)
+        return packed_path
+    return convert
+
+
+def report(rover_repo):
+    return [rover.report_status() for rover in rover_repo.iter_rovers()]
+
+
+@pytest.mark.parametrize("commands", ["", "M", "LR", "RML", "LRMM",
+                                      "MMRMMRMRRM" * 7])
+def test_pack_commands(commands):
+    packed = pack_commands(commands)
+    assert len(packed) == (len(commands) + 3) // 4
+    assert unpack_commands(packed, len(commands)) == commands
+
+
+def test_unknown_packed_command_fails():
+    assert unpack_commands(b"\xff", 2) == "??"
+
+
+def test_reader_decodes_records(convert):
+    with PackedMissionReader(convert(MISSION)) as reader:
+        plateau = reader.create_plateau()
+        assert (plateau.name, plateau.max_x, plateau.max_y) == (
+            "Plateau", 5, 5)
+        assert reader.rover_names == ["Rover1", "Rover2"]
+        assert [record[1:] for record in reader.iter_records()] == [
+            (RoverInputType.LANDING, "Rover1", (1, 2, Orientation.N)),
+            (RoverInputType.INSTRUCTIONS, "Rover1", "LMLMLMLMM"),
+            (RoverInputType.LANDING, "Rover2", (3, 3, Orientation.E)),
+            (None, None, None),
+            (RoverInputType.INSTRUCTIONS, "Rover2", "MMRMMRMRRM"),
+        ]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_packed_mission_matches_text_mission(convert, seed):
+    mission, expected = io.StringIO(), io.StringIO()
+    write_mission(MissionGenerator(rover_count=30, max_x=19, seed=seed,
+                                   interleaving="mixed"), mission, expected)
+
+    rover_repo = RoverMemoryRepo()
+    run_packed_mission(convert(mission.getvalue()), rover_repo)
+    assert "".join(f"{status}\n" for status in report(rover_repo)) == \
+        expected.getvalue()
+
+
+def test_packed_mission_errors(convert):
+    mission = MISSION + ("Ghost Instructions:M\n"
+                         "Rover1 Landing:0 0 N\n"
+                         "Rover1 Instructions:MMMMM\n")
+    with pytest.raises(InvalidInputException) as ex:
+        run_packed_mission(convert(mission), RoverMemoryRepo())
+    assert ex.value.message == "Rover Ghost does not exist"
+    assert ex.value.line_number == 7
+
+    with pytest.raises(InvalidRoverOperationException):
+        run_packed_mission(convert(MISSION + "Rover1 Instructions:MMMMM\n"),
+                           RoverMemoryRepo())
+
+    # Same errors and rovers as the text mission when keeping going
+    text_error_log, packed_error_log = [], []
+    text_repo, packed_repo = RoverMemoryRepo(), RoverMemoryRepo()
+    parse_input(io.StringIO(mission), text_repo, error_log=text_error_log)
+    run_packed_mission(convert(mission), packed_repo, packed_error_log)
+    assert report(packed_repo) == report(text_repo)
+    assert [(error.line_number, error.rover_name, error.message)
+            for error in packed_error_log] == [
+        (error.line_number, error.rover_name, error.message)
+        for error in text_error_log]
+    assert len(packed_error_log) == 3
+
+
+def test_convert_invalid_mission(convert):
+    with pytest.raises(InvalidInputException) as ex:
+        convert(MISSION.replace("3 3 e", "3 3 Q"))
+    assert (ex.value.line_number, ex.value.byte_offset) == (4, 63)
+
+    with pytest.raises(InvalidInputException) as ex:
+        convert(MISSION + f"Rover3 Landing:{1 << 63} 0 N\n")
+    assert ex.value.message == "Number out of packed mission range"
+
+
+def test_reader_rejects_other_files(tmp_path, convert):
+    text_path = tmp_path / "mission.txt"
+    text_path.write_text(MISSION)
+    with pytest.raises(InvalidInputException):
+        PackedMissionReader(str(text_path))
+
+    packed_path = tmp_path / "truncated.mrp"
+    with open(convert(MISSION), "rb") as packed_file:
+        packed_path.write_bytes(packed_file.read()[:40])
+    with pytest.raises(InvalidInputException):
+        PackedMissionReader(str(packed_path))
+
+
+def test_converter_command_line(tmp_path, capsys):
+    input_path = tmp_path / "mission.txt"
+    input_path.write_text(MISSION)
+    packed_path = str(tmp_path / "mission.mrp")
+    main([str(input_path), packed_path])
+
+    rover_repo = RoverMemoryRepo()
+    run_packed_mission(packed_path, rover_repo)
+    assert report(rover_repo) == ["Rover1:1 3 N", "Rover2:5 1 E"]
+
+    input_path.write_text("Plateau:5\n")
+    with pytest.raises(SystemExit):
+        main([str(input_path), packed_path])
+    assert "line 1" in capsys.readouterr().err
+
+
+def test_parse_command_line_argv_packed():
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--packed', '--keep-going', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--packed', '--validate', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--packed', '--batch', 'input'])
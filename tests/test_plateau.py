@@ -122,7 +122,68 @@ def test_parser_negative_coor(plateau_parser):
     assert ex.value.message == expected_error_message
 
 
+def test_check_target_location(basic_plateau, rover_middle):
+    basic_plateau.update_occupied_location(rover_middle)
+    assert basic_plateau.check_target_location(0, 10) is None
+    assert basic_plateau.check_target_location(-1, 0) == \
+        "Crossing left border"
+    assert basic_plateau.check_target_location(11, 0) == \
+        "Crossing right border"
+    assert basic_plateau.check_target_location(0, -1) == \
+        "Crossing lower border"
+    assert basic_plateau.check_target_location(0, 11) == \
+        "Crossing upper border"
+    assert basic_plateau.check_target_location(5, 5) == "Collision detected"
+
+
 def test_landing_rover(basic_plateau, rover_middle):
     basic_plateau.update_occupied_location(rover_middle)
     with pytest.raises(InvalidRoverOperationException) as ex:
         assert basic_plateau.verify_target_location(5, 5)
+
+
+def test_occupancy_index(basic_plateau):
+    first = Rover(basic_plateau, "First", 2, 5, Orientation.N)
+    second = Rover(basic_plateau, "Second", 7, 5, Orientation.N)
+    basic_plateau.update_occupied_location(first)
+    basic_plateau.update_occupied_location(second)
+    assert basic_plateau._occupied_rows == {5: [2, 7]}
+    assert basic_plateau._occupied_columns == {2: [5], 7: [5]}
+
+    second.current_y = 6
+    basic_plateau.update_occupied_location(second, (7, 5))
+    assert basic_plateau._occupied_rows == {5: [2], 6: [7]}
+    assert basic_plateau._occupied_columns == {2: [5], 7: [6]}
+
+
+def test_has_occupied_location_within(basic_plateau, rover_middle):
+    basic_plateau.update_occupied_location(rover_middle)
+    assert basic_plateau.has_occupied_location_within(0, 0, 10, 10)
+    assert basic_plateau.has_occupied_location_within(5, 5, 5, 5)
+    assert not basic_plateau.has_occupied_location_within(0, 0, 4, 10)
+    assert not basic_plateau.has_occupied_location_within(
+        0, 0, 10, 10, excluded_location=(5, 5))
+
+
+def test_find_first_obstacle(basic_plateau, rover_middle):
+    basic_plateau.update_occupied_location(rover_middle)
+
+    # Free runs
+    assert basic_plateau.find_first_obstacle(0, 5, 1, 0, 4) == (4, None)
+    assert basic_plateau.find_first_obstacle(5, 0, 0, 1, 3) == (3, None)
+
+    # Blocked by the rover in the middle
+    assert basic_plateau.find_first_obstacle(0, 5, 1, 0, 8) == (
+        4, "Collision detected")
+    assert basic_plateau.find_first_obstacle(5, 10, 0, -1, 8) == (
+        4, "Collision detected")
+
+    # Blocked by borders
+    assert basic_plateau.find_first_obstacle(8, 0, 1, 0, 5) == (
+        2, "Crossing right border")
+    assert basic_plateau.find_first_obstacle(2, 0, -1, 0, 5) == (
+        2, "Crossing left border")
+    assert basic_plateau.find_first_obstacle(0, 9, 0, 1, 5) == (
+        1, "Crossing upper border")
+    assert basic_plateau.find_first_obstacle(0, 0, 0, -1, 1) == (
+        0, "Crossing lower border")
@@ -0,0 +1,203 @@
+import random
+
+import pytest
+from marsrover.enums import BlockedMovePolicy, Orientation
+from marsrover.exceptions import (InvalidInputException,
+                                  InvalidRoverOperationException)
+from marsrover.models import Plateau, PlateauSettings, Rover
+from marsrover.programs import CompiledProgram, ProgramCache
+
+
+def run_reference(rover, commands):
+    """Executes commands one by one like the original implementation"""
+    original_location = (rover.current_x, rover.current_y)
+    try:
+        for command in commands:
+            rover.execute_single_move_command(command)
+    finally:
+        # Rover keeps its place on the plateau where it stopped
+        rover.update_location_on_plateau(original_location)
+
+
+def run_and_capture(run, rover, commands):
+    try:
+        run(rover, commands)
+        error = None
+    except (InvalidInputException, InvalidRoverOperationException) as ex:
+        error = (type(ex), str(ex))
+    return (error, rover.current_x, rover.current_y,
+            rover.current_orientation)
+
+
+def test_compile_folds_turns_and_merges_runs():
+    program = CompiledProgram("MMLRMMRRRRLLLM")
+    assert program.segments == ((0, 4), (1, 1))
+    assert program.total_turn == 1
+    assert program.move_count == 5
+    assert program.unknown_command_index is None
+
+    turn_only = CompiledProgram("LLL")
+    assert turn_only.segments == ((1, 0),)
+    assert turn_only.total_turn == 1
+    assert turn_only.move_count == 0
+
+
+def test_compile_displacements_and_boxes():
+    program = CompiledProgram("MMRM")
+    # Starting east: two steps east, then one step south
+    assert program.displacements[0] == (2, -1)
+    assert program.bounding_boxes[0] == (0, -1, 2, 0)
+    # Starting north: two steps north, then one step east
+    assert program.displacements[3] == (1, 2)
+    assert program.bounding_boxes[3] == (0, 0, 1, 2)
+
+
+def test_compile_revisits_origin():
+    assert CompiledProgram("MRRM").revisits_origin
+    assert CompiledProgram("MRMRMRM").revisits_origin
+    assert not CompiledProgram("MRMRM").revisits_origin
+    assert not CompiledProgram("LLRR").revisits_origin
+
+
+def test_compile_unknown_command():
+    program = CompiledProgram("MMXM")
+    assert program.unknown_command_index == 2
+    assert program.move_count == 2
+
+
+def test_program_cache_lru():
+    cache = ProgramCache(maxsize=2)
+    first = cache.get("M")
+    assert cache.get("M") is first
+    cache.get("L")
+    cache.get("M")
+    cache.get("R")
+    assert len(cache) == 2
+    # "L" was least recently used and got evicted
+    assert cache.get("M") is first
+    assert cache.get("L") is not None
+
+
+def test_fast_path_skips_per_step_checks(monkeypatch):
+    plateau = Plateau("Plateau", 10, 10)
+    rover = Rover(plateau, "Rover1", 0, 0, Orientation.N)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("per-step check should not run")
+
+    monkeypatch.setattr(plateau, "verify_target_location", fail)
+    monkeypatch.setattr(plateau, "check_target_location", fail)
+    rover.execute_move_commands("MMMRMM")
+    assert (rover.current_x, rover.current_y) == (2, 3)
+    assert rover.current_orientation == Orientation.E
+    assert (2, 3) in plateau._occupied_locations
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_reference_execution(seed):
+    rng = random.Random(seed)
+    size = rng.randint(0, 6)
+    reference_plateau = Plateau("Plateau", size, size)
+    compiled_plateau = Plateau("Plateau", size, size)
+
+    obstacles = {(rng.randint(0, size), rng.randint(0, size))
+                 for _ in range(rng.randint(0, size))}
+    for plateau in (reference_plateau, compiled_plateau):
+        for x, y in obstacles:
+            plateau.update_occupied_location(
+                Rover(plateau, "Obstacle", x, y, Orientation.N))
+
+    for _ in range(30):
+        x, y = rng.randint(0, size), rng.randint(0, size)
+        orientation = rng.choice(list(Orientation))
+        commands = "".join(rng.choice("LRMMMM") for _ in range(
+            rng.randint(0, 12)))
+        if rng.random() < 0.1:
+            commands += "X" + commands
+
+        reference_rover = Rover(reference_plateau, "Rover", x, y, orientation)
+        compiled_rover = Rover(compiled_plateau, "Rover", x, y, orientation)
+        for _ in range(2):
+            assert run_and_capture(
+                run_reference, reference_rover, commands) == run_and_capture(
+                Rover.execute_move_commands, compiled_rover, commands)
+            assert (reference_plateau._occupied_locations.keys()
+                    == compiled_plateau._occupied_locations.keys())
+
+
+def run_reference_with_policy(policy):
+    """Executes commands one by one, handling blocked moves by policy"""
+    def run(rover, commands):
+        original_location = (rover.current_x, rover.current_y)
+        try:
+            for command in commands:
+                try:
+                    rover.execute_single_move_command(command)
+                except InvalidRoverOperationException:
+                    if policy is BlockedMovePolicy.ABORT:
+                        raise
+                    if policy is BlockedMovePolicy.STOP:
+                        break
+        finally:
+            rover.update_location_on_plateau(original_location)
+    return run
+
+
+def run_steps(rover, commands):
+    original_location = (rover.current_x, rover.current_y)
+    try:
+        rover._execute_program_steps(CompiledProgram(commands))
+    finally:
+        rover.update_location_on_plateau(original_location)
+
+
+@pytest.mark.parametrize("policy", list(BlockedMovePolicy))
+@pytest.mark.parametrize("vectorized_min_commands", [None, 1])
+@pytest.mark.parametrize("seed", range(10))
+def test_blocked_move_policy_matches_reference(
+        monkeypatch, policy, vectorized_min_commands, seed):
+    monkeypatch.setattr(Rover, "vectorized_min_commands",
+                        vectorized_min_commands)
+    rng = random.Random(seed)
+    size = rng.randint(0, 6)
+    obstacles = {(rng.randint(0, size), rng.randint(0, size))
+                 for _ in range(rng.randint(0, size))}
+    plateaus = [Plateau("Plateau", size, size,
+                        settings=PlateauSettings(blocked_move_policy=policy))
+                for _ in range(3)]
+    for plateau in plateaus:
+        for x, y in obstacles:
+            plateau.update_occupied_location(
+                Rover(plateau, "Obstacle", x, y, Orientation.N))
+
+    runs = [run_reference_with_policy(policy), Rover.execute_move_commands,
+            run_steps]
+    for _ in range(30):
+        x, y = rng.randint(0, size), rng.randint(0, size)
+        orientation = rng.choice(list(Orientation))
+        commands = "".join(rng.choice("LRMMMM") for _ in range(
+            rng.randint(0, 12)))
+        if rng.random() < 0.1:
+            commands += "X" + commands
+
+        rovers = [Rover(plateau, "Rover", x, y, orientation)
+                  for plateau in plateaus]
+        for _ in range(2):
+            outcomes = [run_and_capture(run, rover, commands)
+                        for run, rover in zip(runs, rovers)]
+            assert outcomes[0] == outcomes[1] == outcomes[2]
+            assert (plateaus[0]._occupied_locations.keys()
+                    == plateaus[1]._occupied_locations.keys()
+                    == plateaus[2]._occupied_locations.keys())
+
+
+def test_blocked_moves_do_not_raise_per_step():
+    plateau = Plateau("Plateau", 2, 2, settings=PlateauSettings(
+        blocked_move_policy=BlockedMovePolicy.SKIP))
+    rover = Rover(plateau, "Rover1", 0, 0, Orientation.N)
+    rover.execute_move_commands("MMMMMMRMMMMM")
+    assert rover.report_status() == "Rover1:2 2 E"
+
+    plateau.blocked_move_policy = BlockedMovePolicy.STOP
+    rover.execute_move_commands("RMMMMMLM")
+    assert rover.report_status() == "Rover1:2 0 S"
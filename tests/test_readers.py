@@ -0,0 +1,80 @@
+import io
+
+import marsrover.__main__
+import pytest
+from marsrover.database import RoverMemoryRepo
+from marsrover.exceptions import InvalidInputException
+from marsrover.missions import open_mission_input
+from marsrover.readers import MappedInputFile
+
+
+@pytest.fixture()
+def input_path(tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_bytes(
+        b"Plateau:5 5\r\n"
+        b"Rover1 Landing:1 2 N\n"
+        b"Rover2 Landing:3 3 E\r"
+        b"Rover2 Instructions:MMR\r\r\n"
+        b"Rover1 Instructions:LMLMLMLMM")
+    return path
+
+
+def test_mapped_lines_match_text_mode(input_path):
+    with open(input_path) as text_file:
+        expected = list(text_file)
+
+    with MappedInputFile(input_path) as mapped_file:
+        assert list(mapped_file) == expected
+
+
+def test_mapped_offsets(input_path):
+    with MappedInputFile(input_path) as mapped_file:
+        assert mapped_file.readline() == "Plateau:5 5\n"
+        assert mapped_file.line_offset == 0
+        assert mapped_file.tell() == 13
+
+        assert mapped_file.readline() == "Rover1 Landing:1 2 N\n"
+        assert mapped_file.line_offset == 13
+
+        mapped_file.seek(13)
+        assert mapped_file.readline() == "Rover1 Landing:1 2 N\n"
+
+        # A lone "\r" ends a line
+        assert mapped_file.readline() == "Rover2 Landing:3 3 E\n"
+        assert mapped_file.line_offset == 34
+        assert mapped_file.readline() == "Rover2 Instructions:MMR\n"
+        assert mapped_file.line_offset == 55
+        assert mapped_file.readline() == "\n"
+        assert mapped_file.line_offset == 79
+
+
+def test_mapped_empty_file(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    with MappedInputFile(path) as mapped_file:
+        assert mapped_file.readline() == ""
+        assert list(mapped_file) == []
+
+
+def test_parse_input_reports_byte_offset(tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"Plateau:5 5\nRover1 Landing:1 2 N\nRover1 Restart:1\n")
+
+    with MappedInputFile(path) as mapped_file:
+        with pytest.raises(InvalidInputException) as ex:
+            marsrover.__main__.parse_input(mapped_file, RoverMemoryRepo())
+
+    assert ex.value.line_number == 3
+    assert ex.value.byte_offset == 33
+    assert str(ex.value) == InvalidInputException.offset_error_template.format(
+        3, 33, ex.value.message)
+
+
+def test_open_mission_input(input_path):
+    with open_mission_input(str(input_path)) as input_file:
+        assert isinstance(input_file, io.TextIOWrapper)
+    with open_mission_input(str(input_path), True) as input_file:
+        assert isinstance(input_file, MappedInputFile)
+    with open_mission_input("Plateau:5 5\n") as input_file:
+        assert input_file.readline() == "Plateau:5 5\n"
@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+import struct
+
+import pytest
+from marsrover.database import (RoverCachingRepo, RoverMemoryRepo,
+                                RoverSQLiteRepo, RoverTableRepo)
+from marsrover.exceptions import InvalidInputException
+from marsrover.missions import parse_input
+from marsrover.reports import (ReportWriter, TextReportWriter,
+                               write_report)
+
+MISSION = ("Plateau:5 5\n"
+           "Rover1 Landing:1 2 N\n"
+           "Rover1 Instructions:LMLMLMLMM\n"
+           "Rover2 Landing:3 3 E\n"
+           "Rover2 Instructions:MMRMMRMRRM\n"
+           "Rover,\"3\" Landing:0 0 S\n")
+
+
+@pytest.fixture(params=["memory", "table", "sqlite", "caching"])
+def rover_repo(request, tmp_path):
+    if request.param == "memory":
+        rover_repo = RoverMemoryRepo()
+    elif request.param == "table":
+        rover_repo = RoverTableRepo()
+    elif request.param == "sqlite":
+        rover_repo = RoverSQLiteRepo(str(tmp_path / "fleet.db"))
+    else:
+        rover_repo = RoverCachingRepo(RoverMemoryRepo(), 1)
+
+    parse_input(io.StringIO(MISSION), rover_repo)
+    yield rover_repo
+    if request.param == "sqlite":
+        rover_repo.close()
+
+
+def report(rover_repo, report_format):
+    output = io.BytesIO()
+    assert write_report(rover_repo, report_format, output) == 3
+    return output.getvalue()
+
+
+def test_text_report(rover_repo, capsys):
+    assert report(rover_repo, "text").decode() == (
+        'Rover1:1 3 N\nRover2:5 1 E\nRover,"3":0 0 S\n')
+
+    print("Before report")
+    rover_repo.report_all_rovers()
+    assert capsys.readouterr().out == (
+        'Before report\nRover1:1 3 N\nRover2:5 1 E\nRover,"3":0 0 S\n')
+
+
+def test_jsonl_report(rover_repo):
+    lines = report(rover_repo, "jsonl").decode().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"id": 0, "name": "Rover1", "x": 1, "y": 3, "orientation": "N"},
+        {"id": 1, "name": "Rover2", "x": 5, "y": 1, "orientation": "E"},
+        {"id": 2, "name": 'Rover,"3"', "x": 0, "y": 0, "orientation": "S"},
+    ]
+
+
+def test_csv_report(rover_repo):
+    rows = list(csv.reader(io.StringIO(
+        report(rover_repo, "csv").decode(), newline="")))
+    assert rows == [["id", "name", "x", "y", "orientation"],
+                    ["0", "Rover1", "1", "3", "N"],
+                    ["1", "Rover2", "5", "1", "E"],
+                    ["2", 'Rover,"3"', "0", "0", "S"]]
+
+
+def test_binary_report(rover_repo):
+    records = list(struct.iter_unpack("<qqqB", report(rover_repo, "binary")))
+    assert records == [(0, 1, 3, 3), (1, 5, 1, 0), (2, 0, 0, 1)]
+
+
+def test_npy_report(rover_repo, tmp_path):
+    numpy = pytest.importorskip("numpy")
+
+    report_path = tmp_path / "report.npy"
+    with open(report_path, "wb") as report_output:
+        rover_repo.report_all_rovers("npy", report_output)
+
+    rovers = numpy.load(report_path)
+    assert rovers.shape == (3,)
+    assert rovers.dtype.names == ("id", "x", "y", "orientation")
+    assert rovers["x"].tolist() == [1, 5, 0]
+    assert rovers["orientation"].tolist() == [3, 0, 1]
+
+
+def test_report_chunks():
+    rover_repo = RoverMemoryRepo()
+    parse_input(io.StringIO(MISSION), rover_repo)
+
+    writes = []
+
+    class RecordingOutput(io.BytesIO):
+        def write(self, data):
+            writes.append(data)
+            return super().write(data)
+
+    output = RecordingOutput()
+    TextReportWriter(output, chunk_size=2).write_rovers(
+        rover_repo.iter_rovers())
+    assert writes == [b"Rover1:1 3 N\nRover2:5 1 E\n", b'Rover,"3":0 0 S\n']
+
+
+def test_report_writer_needs_encoding():
+    with pytest.raises(TypeError):
+        ReportWriter(io.BytesIO())
+
+
+def test_invalid_report_format():
+    with pytest.raises(InvalidInputException) as ex:
+        write_report(RoverMemoryRepo(), "xml", io.BytesIO())
+    assert ex.value.message == "Unknown report format: xml"
+
+
+def test_npy_report_needs_seekable_output():
+    class Pipe(io.RawIOBase):
+        def writable(self):
+            return True
+
+    with pytest.raises(InvalidInputException):
+        write_report(RoverMemoryRepo(), "npy", Pipe())
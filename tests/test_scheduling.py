@@ -0,0 +1,115 @@
+import io
+import random
+
+import pytest
+from marsrover.database import RoverMemoryRepo, RoverTableRepo
+from marsrover.exceptions import (InvalidInputException,
+                                  InvalidRoverOperationException)
+from marsrover.missions import parse_input
+from marsrover.scheduling import (find_conflict_components,
+                                  parse_input_scheduled)
+
+
+def random_mission(rng, line_count):
+    size = rng.randint(2, 30)
+    lines = [f"Plateau:{size} {size}"]
+    names = []
+    for _ in range(line_count):
+        if not names or rng.random() < 0.15:
+            name = f"Rover{len(names)}"
+            names.append(name)
+            lines.append(f"{name} Landing:{rng.randint(0, size)} "
+                         f"{rng.randint(0, size)} {rng.choice('NESW')}")
+        else:
+            commands = "".join(rng.choice("LRMM") for _ in range(
+                rng.randint(0, 6)))
+            if rng.random() < 0.02:
+                commands += "X"
+            lines.append(f"{rng.choice(names)} Instructions:{commands}")
+    return "\n".join(lines)
+
+
+def run_and_capture(parse, mission, *args, rover_repo_class=RoverMemoryRepo):
+    rover_repo = rover_repo_class()
+    try:
+        parse(io.StringIO(mission), rover_repo, *args)
+    except (InvalidInputException, InvalidRoverOperationException) as ex:
+        return type(ex), str(ex)
+    names = (rover_repo.rover_registry
+             if rover_repo_class is RoverMemoryRepo
+             else rover_repo.rover_table._names)
+    return [rover_repo.get_rover_by_name(name).report_status()
+            for name in names]
+
+
+def run_and_capture_state(parse, mission, *args):
+    # Rovers and plateau are kept even if the mission fails
+    rover_repo = RoverMemoryRepo()
+    try:
+        parse(io.StringIO(mission), rover_repo, *args)
+    except (InvalidInputException, InvalidRoverOperationException) as ex:
+        error = ex.message
+    else:
+        error = None
+    rovers = list(rover_repo.iter_rovers())
+    occupants = sorted(rovers[0].plateau.get_occupants()) if rovers else []
+    return error, [rover.report_status() for rover in rovers], occupants
+
+
+def test_find_conflict_components():
+    areas = [(0, 0, 2, 2), (5, 5, 6, 6), (2, 2, 4, 4), (7, 0, 9, 1),
+             (4, 4, 5, 5)]
+    assert sorted(map(sorted, find_conflict_components(areas))) == \
+        [[0, 1, 2, 4], [3]]
+
+
+def test_scheduled_rovers_in_separate_corners():
+    mission = "\n".join([
+        "Plateau:20 20",
+        "A Landing:0 0 N", "B Landing:20 20 S",
+        "A Instructions:MMRMM", "B Instructions:MMRMM",
+        "A Instructions:LMLM", "B Instructions:LMLM"])
+    assert run_and_capture(parse_input_scheduled, mission, 2) == \
+        ["A:1 3 W", "B:19 17 E"]
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("window_size", [3, 4096])
+def test_scheduled_matches_sequential(seed, window_size):
+    rng = random.Random(seed)
+    mission = random_mission(rng, rng.randint(5, 200))
+    assert run_and_capture(parse_input_scheduled, mission, 4,
+                           window_size) == \
+        run_and_capture(parse_input, mission)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_scheduled_matches_sequential_on_rover_table(seed):
+    rng = random.Random(seed)
+    mission = random_mission(rng, rng.randint(5, 200))
+    assert run_and_capture(parse_input_scheduled, mission, 4,
+                           rover_repo_class=RoverTableRepo) == \
+        run_and_capture(parse_input, mission,
+                        rover_repo_class=RoverTableRepo)
+
+
+@pytest.mark.parametrize("threads", [1, 4])
+def test_scheduled_failure_undoes_later_lines(threads):
+    # Rover A's component runs first, past the line failing for B
+    mission = "\n".join([
+        "Plateau:20 20",
+        "A Landing:0 0 N", "B Landing:20 20 S",
+        "A Instructions:M", "B Instructions:MX", "A Instructions:MM",
+        "A Instructions:R"])
+    assert run_and_capture_state(parse_input_scheduled, mission, threads) == \
+        run_and_capture_state(parse_input, mission) == (
+            "Unknown rover instruction: X", ["A:0 1 N", "B:20 19 S"],
+            [((0, 1), "A"), ((20, 19), "B")])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_scheduled_failure_leaves_sequential_state(seed):
+    rng = random.Random(seed)
+    mission = random_mission(rng, rng.randint(5, 200))
+    assert run_and_capture_state(parse_input_scheduled, mission, 4) == \
+        run_and_capture_state(parse_input, mission)
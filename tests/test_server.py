@@ -0,0 +1,176 @@
+import asyncio
+import threading
+
+import pytest
+import marsrover.server
+from marsrover.server import MissionServer, is_loopback_host, main, serve
+
+
+@pytest.fixture()
+def mission_server():
+    return MissionServer()
+
+
+def test_handle_request(mission_server):
+    assert mission_server.handle_request("OPEN m1 Plateau:5 5") == ["OK"]
+    for request in ("RUN m1 Rover1 Landing:1 2 N",
+                    "RUN m1 Rover1 Instructions:LMLMLMLMM",
+                    "RUN m1 Rover2 Landing:3 3 E",
+                    "RUN m1 Rover2 Instructions:MMRMMRMRRM"):
+        assert mission_server.handle_request(request) == ["OK"]
+
+    assert mission_server.handle_request("STATUS m1 Rover1") == \
+        ["OK Rover1:1 3 N"]
+    assert mission_server.handle_request("STATUS m1") == \
+        ["OK 2", "Rover1:1 3 N", "Rover2:5 1 E"]
+    assert mission_server.handle_request("CLOSE m1") == ["OK"]
+    assert mission_server.handle_request("STATUS m1") == \
+        ["ERR Mission m1 does not exist"]
+
+
+def test_handle_request_errors(mission_server):
+    assert mission_server.handle_request("OPEN m1 Plateau:5") == \
+        ["ERR Invalid coordinates format in configuration input"]
+    assert mission_server.handle_request("OPEN m1 Plateau:5 5") == ["OK"]
+    assert mission_server.handle_request("LAND m1") == \
+        ["ERR Unknown request: LAND m1"]
+    assert mission_server.handle_request("RUN m1 Rover1 Instructions:M") == \
+        ["ERR Invalid input detected on line 2: Rover Rover1 does not exist"]
+    assert mission_server.handle_request("RUN m1 Rover1 Landing:1 5 N") == \
+        ["OK"]
+    assert mission_server.handle_request("RUN m1 Rover1 Instructions:RM") == \
+        ["OK"]
+    assert mission_server.handle_request("RUN m1 Rover1 Instructions:LM") == \
+        ["ERR Invalid operation detected for rover Rover1: "
+         "Crossing upper border"]
+    assert mission_server.handle_request("STATUS m1 Rover1") == \
+        ["OK Rover1:2 5 N"]
+
+
+def test_open_mission_twice(mission_server):
+    assert mission_server.handle_request("OPEN m1 Plateau:5 5") == ["OK"]
+    mission_server.handle_request("RUN m1 Rover1 Landing:1 2 N")
+    assert mission_server.handle_request("OPEN m1 Plateau:9 9") == \
+        ["ERR Mission m1 is already open"]
+    assert mission_server.handle_request("STATUS m1") == \
+        ["OK 1", "Rover1:1 2 N"]
+    assert mission_server.handle_request("CLOSE m1") == ["OK"]
+    assert mission_server.handle_request("OPEN m1 Plateau:9 9") == ["OK"]
+
+
+def test_pipelined_requests_over_tcp(mission_server):
+    async def run_client():
+        server = await serve(mission_server, port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"OPEN m1 Plateau:5 5\r\nRUN m1 Rover1 Landing:1 2 N"
+                         b"\nRUN m1 Rover1 Instruc")
+            await writer.drain()
+            writer.write(b"tions:LMLMLMLMM\nSTATUS m1\n")
+            writer.write_eof()
+            replies = await reader.read()
+            writer.close()
+        return replies
+
+    assert asyncio.run(run_client()) == \
+        b"OK\nOK\nOK\nOK 1\nRover1:1 3 N\n"
+
+
+def test_partial_move_occupies_cell(mission_server):
+    mission_server.handle_request("OPEN m1 Plateau:5 5")
+    mission_server.handle_request("RUN m1 R1 Landing:0 0 N")
+    assert mission_server.handle_request("RUN m1 R1 Instructions:MMMMMMMM") \
+        == ["ERR Invalid operation detected for rover R1: "
+            "Crossing upper border"]
+    mission_server.handle_request("RUN m1 R3 Landing:2 5 W")
+    assert mission_server.handle_request("RUN m1 R3 Instructions:MM") == \
+        ["ERR Invalid operation detected for rover R3: Collision detected"]
+    assert mission_server.handle_request("STATUS m1") == \
+        ["OK 2", "R1:0 5 N", "R3:1 5 W"]
+
+
+def test_invalid_utf8_request_gets_error(mission_server):
+    async def run_client():
+        server = await serve(mission_server, port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"OPEN m1 Plateau:5 5\nRUN m1 \xff\xfe\nSTATUS m1\n")
+            writer.write_eof()
+            replies = await reader.read()
+            writer.close()
+        return replies
+
+    assert asyncio.run(run_client()) == \
+        b"OK\nERR Request is not valid UTF-8\nOK 0\n"
+
+
+def test_long_request_line_closes_connection(monkeypatch, mission_server):
+    monkeypatch.setattr(marsrover.server, "SERVER_MAX_LINE_BYTES", 64)
+
+    async def run_client():
+        server = await serve(mission_server, port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"OPEN m1 Plateau:5 5\nRUN m1 " + b"M" * 100)
+            await writer.drain()
+            replies = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+        return replies
+
+    assert asyncio.run(run_client()) == \
+        b"OK\nERR Request line is longer than 64 bytes\n"
+
+
+def test_running_request_does_not_block_other_clients(monkeypatch,
+                                                      mission_server):
+    release = threading.Event()
+    handle_request = mission_server.handle_request
+
+    def blocking_handle_request(request):
+        if request.startswith("RUN slow"):
+            release.wait(5)
+        return handle_request(request)
+
+    monkeypatch.setattr(mission_server, "handle_request",
+                        blocking_handle_request)
+
+    async def run_clients():
+        server = await serve(mission_server, port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            slow_reader, slow_writer = await asyncio.open_connection(
+                "127.0.0.1", port)
+            slow_writer.write(b"OPEN slow Plateau:5 5\n"
+                              b"RUN slow Rover1 Landing:1 2 N\n")
+            slow_writer.write_eof()
+            assert await slow_reader.readline() == b"OK\n"
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"OPEN fast Plateau:5 5\n")
+            writer.write_eof()
+            replies = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+
+            release.set()
+            slow_replies = await asyncio.wait_for(slow_reader.read(), 5)
+            slow_writer.close()
+        return replies, slow_replies
+
+    assert asyncio.run(run_clients()) == (b"OK\n", b"OK\n")
+
+
+@pytest.mark.parametrize("host, loopback", [
+    ("localhost", True), ("127.0.0.1", True), ("127.8.0.1", True),
+    ("::1", True), ("0.0.0.0", False), ("192.168.1.2", False),
+    ("example.com", False)])
+def test_is_loopback_host(host, loopback):
+    assert is_loopback_host(host) is loopback
+
+
+def test_remote_host_needs_opt_in(capsys):
+    with pytest.raises(SystemExit):
+        main(["--host", "0.0.0.0"])
+    assert "--allow-remote" in capsys.readouterr().err
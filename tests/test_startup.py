@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+# Wall clock budgets depend on the machine, so they are only checked
+# when asked for, lazy imports are always checked
+benchmark = pytest.mark.skipif(
+    not os.environ.get("MARSROVER_BENCHMARKS"),
+    reason="startup budgets run with MARSROVER_BENCHMARKS=1")
+
+HEAVY_MODULES = ["numpy", "sqlite3", "multiprocessing", "asyncio",
+                 "concurrent.futures", "logging"]
+
+# Agreed startup budgets, in milliseconds
+IMPORT_TIME_BUDGET_MS = 60
+COLD_START_BUDGET_MS = 150
+
+TINY_MISSION = "Plateau:5 5\nRover1 Landing:1 2 N\nRover1 Instructions:M"
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(*arguments):
+    return subprocess.run(
+        [sys.executable, *arguments], cwd=PACKAGE_ROOT,
+        capture_output=True, text=True, check=True)
+
+
+def best_wall_time_ms(*arguments, runs=3):
+    wall_times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run_python(*arguments)
+        wall_times.append((time.perf_counter() - start) * 1000)
+    return min(wall_times)
+
+
+def test_heavy_modules_are_not_imported_at_startup():
+    imported = run_python("-c", (
+        "import sys, marsrover.__main__;"
+        f"print([m for m in {HEAVY_MODULES + ['json']} "
+        "if m in sys.modules])")).stdout
+    assert imported.strip() == "[]"
+
+
+def test_tiny_mission_imports_no_heavy_modules():
+    output = run_python("-c", (
+        "import runpy, sys;"
+        "sys.argv = ['marsrover'] + sys.argv[1:];"
+        "runpy.run_module('marsrover', run_name='__main__', alter_sys=True);"
+        f"print([m for m in {HEAVY_MODULES} if m in sys.modules])"),
+        TINY_MISSION).stdout
+    assert output.splitlines() == ["Rover1:1 3 N", "[]"]
+
+
+@benchmark
+def test_import_time_budget():
+    import_times = []
+    for _ in range(3):
+        stderr = run_python(
+            "-X", "importtime", "-c", "import marsrover.__main__").stderr
+        line = next(line for line in stderr.splitlines()
+                    if line.endswith("| marsrover.__main__"))
+        # Cumulative time of the import, in microseconds
+        import_times.append(int(line.split("|")[1]) / 1000)
+    assert min(import_times) < IMPORT_TIME_BUDGET_MS
+
+
+@benchmark
+def test_cold_start_budget():
+    interpreter_ms = best_wall_time_ms("-c", "pass")
+    mission_ms = best_wall_time_ms("-m", "marsrover", TINY_MISSION)
+    assert mission_ms - interpreter_ms < COLD_START_BUDGET_MS
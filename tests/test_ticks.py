@@ -0,0 +1,169 @@
+import io
+import random
+
+import pytest
+import marsrover.__main__
+from marsrover.database import RoverMemoryRepo
+from marsrover.enums import Orientation
+from marsrover.exceptions import InvalidInputException
+from marsrover.models import Plateau, Rover
+
+pytest.importorskip("numpy")
+
+from marsrover.ticks import TickSimulation, run_tick_mission  # noqa: E402
+
+ORIENTATIONS = list(Orientation)
+
+
+def run_reference(max_x, max_y, fleet, programs):
+    """Plain Python tick by tick simulation, fleet holds
+    [x, y, orientation index] lists in priority order.
+    """
+    for tick in range(max(map(len, programs), default=0)):
+        targets = {}
+        for rover_id, program in enumerate(programs):
+            if tick >= len(program):
+                continue
+            x, y, heading = fleet[rover_id]
+            if program[tick] == "R":
+                fleet[rover_id][2] = (heading + 1) % 4
+            elif program[tick] == "L":
+                fleet[rover_id][2] = (heading - 1) % 4
+            else:
+                step_x, step_y = ORIENTATIONS[heading].value
+                if 0 <= x + step_x <= max_x and 0 <= y + step_y <= max_y:
+                    targets[rover_id] = (x + step_x, y + step_y)
+
+        occupants = {(x, y): rover_id
+                     for rover_id, (x, y, _) in enumerate(fleet)}
+        blocked = set()
+        winners = {}
+        for rover_id, target in targets.items():
+            if target in winners:
+                blocked.add(rover_id)
+            else:
+                winners[target] = rover_id
+        for rover_id, target in targets.items():
+            occupant = occupants.get(target)
+            if occupant in targets and \
+                    targets[occupant] == tuple(fleet[rover_id][:2]):
+                blocked.add(rover_id)
+
+        changed = True
+        while changed:
+            changed = False
+            for rover_id, target in targets.items():
+                occupant = occupants.get(target)
+                if rover_id not in blocked and occupant is not None and (
+                        occupant not in targets or occupant in blocked):
+                    blocked.add(rover_id)
+                    changed = True
+
+        for rover_id, target in targets.items():
+            if rover_id not in blocked:
+                fleet[rover_id][:2] = target
+    return fleet
+
+
+def simulate(max_x, max_y, fleet, programs):
+    plateau = Plateau("Plateau", max_x, max_y)
+    rovers = [Rover(plateau, f"Rover{rover_id}", x, y, ORIENTATIONS[heading])
+              for rover_id, (x, y, heading) in enumerate(fleet)]
+    simulation = TickSimulation(plateau, rovers, programs)
+    simulation.run()
+    simulation.write_back(RoverMemoryRepo())
+    return simulation, rovers
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_reference(seed):
+    rng = random.Random(seed)
+    max_x, max_y = rng.randint(0, 6), rng.randint(0, 6)
+    cells = [(x, y) for x in range(max_x + 1) for y in range(max_y + 1)]
+    fleet = [[x, y, rng.randrange(4)]
+             for x, y in rng.sample(cells, rng.randint(1, len(cells)))]
+    programs = ["".join(rng.choice("LRMMM")
+                        for _ in range(rng.randint(0, 30)))
+                for _ in fleet]
+
+    simulation, rovers = simulate(
+        max_x, max_y, [list(rover) for rover in fleet], programs)
+    expected = run_reference(max_x, max_y, fleet, programs)
+    assert [[rover.current_x, rover.current_y,
+             ORIENTATIONS.index(rover.current_orientation)]
+            for rover in rovers] == expected
+    assert simulation.moves + simulation.blocked_moves == sum(
+        program.count("M") for program in programs)
+
+    # Rovers never share a cell, and the plateau knows where they are
+    plateau = rovers[0].plateau if rovers else None
+    assert sorted(plateau.get_occupied_locations()) == sorted(
+        (rover.current_x, rover.current_y) for rover in rovers)
+
+
+def test_same_cell_goes_to_first_landed():
+    _, rovers = simulate(4, 0, [[0, 0, 0], [2, 0, 2]], ["M", "M"])
+    assert [(rover.current_x, rover.current_y) for rover in rovers] == [
+        (1, 0), (2, 0)]
+
+
+def test_swaps_are_blocked():
+    simulation, rovers = simulate(1, 0, [[0, 0, 0], [1, 0, 2]], ["M", "M"])
+    assert [(rover.current_x, rover.current_y) for rover in rovers] == [
+        (0, 0), (1, 0)]
+    assert simulation.blocked_moves == 2
+
+
+def test_trains_and_rings_move_together():
+    # Train heading east, its head blocked by the border a tick later
+    _, rovers = simulate(3, 0, [[0, 0, 0], [1, 0, 0], [2, 0, 0]],
+                         ["MM", "MM", "MM"])
+    assert [rover.current_x for rover in rovers] == [1, 2, 3]
+
+    # Four rovers turning around a 2x2 ring
+    _, rovers = simulate(1, 1, [[0, 0, 3], [0, 1, 0], [1, 1, 1], [1, 0, 2]],
+                         ["M", "M", "M", "M"])
+    assert [(rover.current_x, rover.current_y) for rover in rovers] == [
+        (0, 1), (1, 1), (1, 0), (0, 0)]
+
+
+def test_run_tick_mission():
+    rover_repo = RoverMemoryRepo()
+    simulation = run_tick_mission(io.StringIO(
+        "Plateau:5 5\n"
+        "Rover1 Landing:0 0 E\n"
+        "Rover2 Landing:2 0 W\n"
+        "Rover1 Instructions:M\n"
+        "Rover2 Instructions:M\n"
+        "Rover1 Instructions:LM\n"
+        "Rover3 Landing:3 3 N\n"
+        "Rover3 Instructions:MMMMRM\n"), rover_repo)
+
+    assert [rover.report_status() for rover in rover_repo.iter_rovers()] == [
+        "Rover1:1 1 N", "Rover2:2 0 W", "Rover3:4 5 E"]
+    assert (simulation.tick, simulation.moves, simulation.blocked_moves) == (
+        6, 5, 3)
+
+
+@pytest.mark.parametrize("mission, line_number, message", [
+    ("Plateau:5 5\nRover1 Landing:1 1 N\nRover2 Landing:1 1 S\n",
+     3, "Invalid landing location: (1, 1)"),
+    ("Plateau:5 5\nRover1 Landing:1 1 N\nGhost Instructions:M\n",
+     3, "Rover Ghost does not exist"),
+    ("Plateau:5 5\nRover1 Landing:1 1 N\nRover1 Instructions:MX\n",
+     3, "Unknown rover instruction: X"),
+    ("Plateau:5\n", 1, "Invalid coordinates format in configuration input"),
+])
+def test_tick_mission_errors(mission, line_number, message):
+    with pytest.raises(InvalidInputException) as ex:
+        run_tick_mission(io.StringIO(mission), RoverMemoryRepo())
+    assert (ex.value.line_number, ex.value.message) == (line_number, message)
+
+
+def test_parse_command_line_argv_ticks():
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--ticks', '--report-format=csv', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--ticks', '--keep-going', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--ticks', '--packed', 'input'])
@@ -0,0 +1,73 @@
+import pytest
+from marsrover.enums import RoverInputType
+from marsrover.exceptions import InvalidInputException
+from marsrover.tokenizer import (RoverInputRecord, split_rover_input_line,
+                                 tokenize_rover_input_line)
+from marsrover.util import strip_str_list
+
+
+def reference_split(input_line):
+    """Splitting as done by the original RoverTextParser"""
+    input_parts = input_line.split(":")
+    if len(input_parts) != 2:
+        raise InvalidInputException("Invalid Rover input")
+    input_parts = strip_str_list(input_parts)
+
+    header_parts = input_parts[0].split(" ")
+    if len(header_parts) != 2:
+        raise InvalidInputException("Invalid Rover input")
+
+    return header_parts[0], input_parts[1]
+
+
+def test_tokenize_valid_lines():
+    assert tokenize_rover_input_line(
+        "Rover1 Landing:1 2 N\n") == RoverInputRecord(
+        "Rover1", RoverInputType.LANDING, "1 2 N")
+    assert tokenize_rover_input_line(
+        "Rover1 instructions: LMLM \n") == RoverInputRecord(
+        "Rover1", RoverInputType.INSTRUCTIONS, "LMLM")
+
+
+def test_tokenize_landing_takes_precedence():
+    record = tokenize_rover_input_line("LandingBot Instructions:MM")
+    assert record.kind == RoverInputType.LANDING
+
+
+def test_tokenize_keywords_as_str_upper():
+    # Case folding of regex matching would accept this spelling
+    with pytest.raises(InvalidInputException):
+        tokenize_rover_input_line("Rover1 \u0130nstructions:M")
+    assert tokenize_rover_input_line("Rover1 in\u017ftructions:M").kind == \
+        RoverInputType.INSTRUCTIONS
+
+
+def test_tokenize_unknown_type():
+    with pytest.raises(InvalidInputException) as ex:
+        tokenize_rover_input_line("Rover1 Restart:1 2 N\n")
+    assert ex.value.message == "Unknown rover input type: Rover1 Restart:1 2 N\n"
+
+
+@pytest.mark.parametrize("input_line", [
+    "Rover1 Landing:1 2 N",
+    "  Rover1 Landing :1 2 N\n",
+    "Rover1 Landing 1 2 N",
+    "Rover1:Landing:1 2 N",
+    "Rover1  Landing:1 2 N",
+    "Rover 1 Landing:1 2 N",
+    "\tRover1 Landing\t:\t1 2 N\r\n",
+    "Rover1\tLanding:1 2 N",
+    "Rover1 Landing:1 2 N:",
+    "Rover1 Landing:1:2 N\n",
+    ":",
+    "",
+])
+def test_split_matches_reference(input_line):
+    try:
+        expected = reference_split(input_line)
+    except InvalidInputException as ex:
+        with pytest.raises(InvalidInputException) as split_ex:
+            split_rover_input_line(input_line)
+        assert split_ex.value.message == ex.message
+    else:
+        assert split_rover_input_line(input_line) == expected
@@ -0,0 +1,159 @@
+import io
+
+import pytest
+import marsrover.__main__
+from marsrover.database import RoverMemoryRepo
+from marsrover.exceptions import (InvalidInputException,
+                                  InvalidRoverOperationException)
+from marsrover.gen import MissionGenerator, write_mission
+from marsrover.missions import parse_input
+from marsrover.readers import MappedInputFile
+from marsrover.validation import (parse_input_validated, split_line_ranges,
+                                  validate_input)
+
+INVALID_MISSION = ("Plateau:5 5\n"
+                   "Rover1 Landing:1 2 N\n"
+                   "Rover1 Instructions:LMXLMLMLMM\n"
+                   "Rover2 Landing:3 a E\n"
+                   "Rover2 Instructions:MMRMMRMRRM\n"
+                   "Rover3 Landing:0 0 Q\n"
+                   "foo\n")
+
+
+@pytest.fixture
+def write_input(tmp_path):
+    def write(text):
+        input_path = tmp_path / "mission.txt"
+        input_path.write_text(text)
+        return str(input_path)
+    return write
+
+
+def report(rover_repo):
+    return [rover.report_status() for rover in rover_repo.iter_rovers()]
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 7, 30, 1 << 20])
+def test_split_line_ranges(write_input, chunk_bytes):
+    input_path = write_input(INVALID_MISSION + "Rover4 Landing:0 1 N")
+    ranges = split_line_ranges(input_path, chunk_bytes)
+
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == len(INVALID_MISSION) + 20
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        assert INVALID_MISSION[end - 1] == "\n"
+
+
+def test_split_empty_file(write_input):
+    assert split_line_ranges(write_input("")) == []
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("chunk_bytes", [1, 40, 1 << 20])
+def test_validate_input_reports_every_error(write_input, workers, chunk_bytes):
+    validation_report = validate_input(
+        write_input(INVALID_MISSION), workers, chunk_bytes)
+
+    assert validation_report.line_count == 7
+    assert [(error.line_number, error.byte_offset, error.message)
+            for error in validation_report.errors] == [
+        (3, 33, "Unknown rover instruction: X"),
+        (4, 64, "Invalid rover landing coordinates input: 3 a E"),
+        (6, 116, "Invalid rover orientation input: Q"),
+        (7, 137, "Unknown rover input type: foo\n"),
+    ]
+    assert list(validation_report.iter_error_lines())[0] == (
+        "Line 3 (byte offset 33): Unknown rover instruction: X")
+
+
+def test_validate_input_matches_parsers(write_input):
+    # Each invalid line fails the same way when the mission is run
+    lines = INVALID_MISSION.splitlines()
+    for line in [lines[2], lines[3], lines[5], lines[6]]:
+        input_path = write_input(
+            f"Plateau:5 5\nRover1 Landing:1 2 N\n{line}\n")
+        errors = validate_input(input_path, 1).errors
+        with MappedInputFile(input_path) as input_file, \
+                pytest.raises(InvalidInputException) as ex:
+            parse_input(input_file, RoverMemoryRepo())
+        assert [str(error) for error in errors] == [str(ex.value)]
+
+
+def test_validate_invalid_plateau(write_input):
+    errors = validate_input(write_input("Plateau:5\nRover1 Landing:1 2 N\n"),
+                            2, 1).errors
+    assert [(error.line_number, error.byte_offset) for error in errors] == [
+        (1, 0)]
+
+
+def test_validate_missing_file(tmp_path):
+    with pytest.raises(InvalidInputException):
+        validate_input(str(tmp_path / "missing.txt"))
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+@pytest.mark.parametrize("seed", range(3))
+def test_parse_input_validated_matches_parse_input(write_input, workers, seed):
+    mission, expected = io.StringIO(), io.StringIO()
+    write_mission(MissionGenerator(rover_count=40, max_x=19, seed=seed),
+                  mission, expected)
+    input_path = write_input(mission.getvalue())
+
+    rover_repo = RoverMemoryRepo()
+    validation_report = parse_input_validated(
+        input_path, rover_repo, workers, chunk_bytes=256)
+    assert validation_report.errors == []
+    assert "".join(f"{status}\n" for status in report(rover_repo)) == \
+        expected.getvalue()
+
+
+def test_parse_input_validated_does_not_run_invalid_mission(write_input):
+    rover_repo = RoverMemoryRepo()
+    validation_report = parse_input_validated(
+        write_input(INVALID_MISSION), rover_repo, 1)
+    assert len(validation_report.errors) == 4
+    assert report(rover_repo) == []
+
+
+def test_parse_input_validated_mission_errors(write_input):
+    mission = ("Plateau:5 5\nRover1 Landing:1 2 N\n"
+               "Ghost Instructions:M\nRover1 Instructions:MMMMRM\n")
+    with pytest.raises(InvalidInputException) as ex:
+        parse_input_validated(write_input(mission), RoverMemoryRepo(), 2, 1)
+    assert (ex.value.line_number, ex.value.byte_offset) == (3, 33)
+
+    rover_repo = RoverMemoryRepo()
+    with pytest.raises(InvalidRoverOperationException):
+        parse_input_validated(write_input(mission.replace("Ghost", "Rover1")),
+                              rover_repo, 1)
+
+    error_log = []
+    parse_input_validated(write_input(mission), RoverMemoryRepo(), 2, 1,
+                          error_log=error_log)
+    assert [tuple(error) for error in error_log] == [
+        (3, 33, "Ghost", "Rover Ghost does not exist"),
+        (4, 54, "Rover1", "Crossing upper border"),
+    ]
+
+
+def test_parse_input_validated_empty_input(write_input):
+    input_path = write_input("")
+    with MappedInputFile(input_path) as input_file, \
+            pytest.raises(InvalidInputException) as expected:
+        parse_input(input_file, RoverMemoryRepo())
+    with pytest.raises(InvalidInputException) as ex:
+        parse_input_validated(input_path, RoverMemoryRepo(), 1)
+    assert (ex.value.message, ex.value.line_number) == \
+        (expected.value.message, expected.value.line_number)
+
+
+def test_parse_command_line_argv_validate():
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--validate', '--workers=2', 'input'])
+    assert (False, False) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--validate-only', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--validate', '--batch', 'input'])
+    assert (False, True) == marsrover.__main__.parse_command_line_argv(
+        ['app', '--validate-only', '--checkpoint=state', 'input'])
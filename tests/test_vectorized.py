@@ -0,0 +1,89 @@
+import random
+
+import pytest
+from marsrover.enums import Orientation
+from marsrover.exceptions import (InvalidInputException,
+                                  InvalidRoverOperationException)
+from marsrover.models import Plateau, PlateauSettings, Rover
+from marsrover.occupancy import DenseOccupancy
+
+from .test_programs import run_and_capture, run_reference
+
+pytest.importorskip("numpy")
+
+from marsrover.vectorized import execute_commands_vectorized  # noqa: E402
+
+
+def test_long_commands_use_vectorized_engine(monkeypatch):
+    plateau = Plateau("Plateau", 10, 10)
+    rover = Rover(plateau, "Rover1", 0, 0, Orientation.N)
+    monkeypatch.setattr(Rover, "vectorized_min_commands", 4)
+    monkeypatch.setattr(Rover, "execute_program", None)
+
+    rover.execute_move_commands("MMMRMM" * 2 + "LL")
+    assert (rover.current_x, rover.current_y) == (5, 1)
+    assert rover.current_orientation == Orientation.N
+
+
+def test_collisions_only_look_up_path_cells(monkeypatch):
+    monkeypatch.setattr(DenseOccupancy, "__iter__", None)
+    plateau = Plateau("Plateau", 999, 999,
+                      settings=PlateauSettings("dense"))
+    plateau.update_occupied_location(
+        Rover(plateau, "Obstacle", 0, 500, Orientation.N))
+    rover = Rover(plateau, "Rover1", 0, 0, Orientation.N)
+    with pytest.raises(InvalidRoverOperationException) as ex:
+        execute_commands_vectorized(rover, "M" * 600)
+    assert ex.value.message == "Collision detected"
+    assert (rover.current_x, rover.current_y) == (0, 499)
+
+
+def test_vectorized_errors():
+    plateau = Plateau("Plateau", 3, 3)
+    rover = Rover(plateau, "Rover1", 0, 0, Orientation.E)
+    with pytest.raises(InvalidRoverOperationException) as ex:
+        execute_commands_vectorized(rover, "MMMLMMMLMMMMX")
+    assert ex.value.message == "Crossing left border"
+    assert (rover.current_x, rover.current_y) == (0, 3)
+    assert rover.current_orientation == Orientation.W
+
+    with pytest.raises(InvalidInputException) as ex:
+        execute_commands_vectorized(rover, "LMXM")
+    assert ex.value.message == "Unknown rover instruction: X"
+    assert (rover.current_x, rover.current_y) == (0, 2)
+
+
+@pytest.mark.parametrize("backend", ["sparse", "dense"])
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_reference_execution(seed, backend):
+    rng = random.Random(seed)
+    size = rng.randint(0, 8)
+    settings = PlateauSettings(backend)
+    reference_plateau = Plateau("Plateau", size, size + 1, settings=settings)
+    vectorized_plateau = Plateau("Plateau", size, size + 1,
+                                 settings=settings)
+
+    obstacles = {(rng.randint(0, size), rng.randint(0, size + 1))
+                 for _ in range(rng.randint(0, size * (seed % 4 + 1)))}
+    for plateau in (reference_plateau, vectorized_plateau):
+        for x, y in obstacles:
+            plateau.update_occupied_location(
+                Rover(plateau, "Obstacle", x, y, Orientation.N))
+
+    for _ in range(30):
+        x, y = rng.randint(0, size), rng.randint(0, size + 1)
+        orientation = rng.choice(list(Orientation))
+        commands = "".join(rng.choice("LRMMMM") for _ in range(
+            rng.randint(0, 40)))
+        if rng.random() < 0.1:
+            commands += "X" + commands
+
+        reference_rover = Rover(reference_plateau, "Rover", x, y, orientation)
+        vectorized_rover = Rover(vectorized_plateau, "Rover", x, y,
+                                 orientation)
+        for _ in range(2):
+            assert run_and_capture(
+                run_reference, reference_rover, commands) == run_and_capture(
+                execute_commands_vectorized, vectorized_rover, commands)
+            assert (reference_plateau._occupied_locations.keys()
+                    == vectorized_plateau._occupied_locations.keys())